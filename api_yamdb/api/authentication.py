@@ -0,0 +1,41 @@
+from django.conf import settings
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.settings import api_settings
+
+from .cache import KEY_PREFIX, get_cache, is_shared
+
+
+def get_user_key(user_id):
+    return f'{KEY_PREFIX}:user:{user_id}'
+
+
+def forget_user(user_id):
+    '''Drop the cached user, so that its next request reloads it.'''
+    get_cache().delete(get_user_key(user_id))
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    '''JWT authentication that keeps users in the cache between requests.
+
+    The cached user carries its role, and is dropped whenever the user
+    is saved or deleted, so role changes and deactivation take effect
+    on the next request; AUTH_USER_CACHE_TTL only bounds how long
+    updates that bypass the model signals may go unnoticed. That only
+    holds when every process shares the cache: with a process-local one
+    users are loaded on every request, unless AUTH_USER_CACHE_LOCAL
+    says there is a single process.
+    '''
+
+    def get_user(self, validated_token):
+        user_id = validated_token.get(api_settings.USER_ID_CLAIM)
+        if user_id is None or not (
+            is_shared() or settings.AUTH_USER_CACHE_LOCAL
+        ):
+            return super().get_user(validated_token)
+        cache = get_cache()
+        key = get_user_key(user_id)
+        user = cache.get(key)
+        if user is None:
+            user = super().get_user(validated_token)
+            cache.set(key, user, settings.AUTH_USER_CACHE_TTL)
+        return user
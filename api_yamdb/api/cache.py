@@ -0,0 +1,139 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+from django.utils.http import urlencode
+from rest_framework.response import Response
+
+from .conditional import VALIDATOR_HEADERS, evaluate_preconditions
+
+KEY_PREFIX = 'api-cache'
+
+
+def get_cache():
+    return caches[settings.API_CACHE_ALIAS]
+
+
+def is_shared():
+    '''Whether every process sees the same cache, not a copy of its own.'''
+    return not isinstance(get_cache(), LocMemCache)
+
+
+def get_version(namespace):
+    '''Current version of a namespace, part of every key in it.
+
+    A missing version starts from the current time in milliseconds, so
+    it never repeats a version that was evicted from the cache.
+    '''
+    cache = get_cache()
+    key = f'{KEY_PREFIX}:version:{namespace}'
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, int(time.time() * 1000), None)
+        version = cache.get(key)
+    return version
+
+
+def invalidate(*namespaces):
+    '''Make all responses cached in the namespaces stale.
+
+    Versions are bumped once the transaction commits: a bump before it
+    would let a concurrent read cache the old data under the new version.
+    '''
+    transaction.on_commit(lambda: bump_versions(namespaces))
+
+
+def bump_versions(namespaces):
+    cache = get_cache()
+    for namespace in namespaces:
+        try:
+            cache.incr(f'{KEY_PREFIX}:version:{namespace}')
+        except ValueError:
+            # No version yet, a fresh one is newer than any before.
+            get_version(namespace)
+
+
+def count(namespace, outcome):
+    cache = get_cache()
+    key = f'{KEY_PREFIX}:stats:{namespace}:{outcome}'
+    try:
+        cache.incr(key)
+    except ValueError:
+        cache.add(key, 1, None)
+
+
+def get_stats():
+    '''Hit and miss counters of every cached namespace.'''
+    cache = get_cache()
+    namespaces = sorted({
+        endpoint.split('-')[0] for endpoint in settings.API_CACHE_TTL
+    })
+    stats = {}
+    for namespace in namespaces:
+        counters = cache.get_many([
+            f'{KEY_PREFIX}:stats:{namespace}:hits',
+            f'{KEY_PREFIX}:stats:{namespace}:misses',
+        ])
+        stats[namespace] = {
+            outcome: counters.get(
+                f'{KEY_PREFIX}:stats:{namespace}:{outcome}', 0
+            )
+            for outcome in ('hits', 'misses')
+        }
+    return stats
+
+
+class CachedResponseMixin:
+    '''Serve read actions from the cache until their data changes.
+
+    The namespace is the basename of the viewset. Keys include its
+    version, the path, the sorted query string and the renderer, so
+    every page and filter is cached separately. TTLs are taken from
+    API_CACHE_TTL by url name, e.g. `titles-list`. Validator headers
+    are cached with the data, so a hit can still be answered with 304.
+    '''
+
+    def get_cache_key(self, request, namespace):
+        query = urlencode(sorted(request.query_params.lists()), doseq=True)
+        digest = hashlib.md5(
+            f'{request.path}?{query}'.encode('utf-8')
+        ).hexdigest()
+        return (
+            f'{KEY_PREFIX}:{namespace}:{get_version(namespace)}:'
+            f'{request.accepted_renderer.format}:{digest}'
+        )
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        namespace = self.basename
+        if self.action in ('list', 'retrieve'):
+            endpoint = f'{namespace}-{"detail" if self.detail else "list"}'
+        else:
+            # The default url name of an extra action.
+            endpoint = f'{namespace}-{self.action.replace("_", "-")}'
+        timeout = settings.API_CACHE_TTL.get(endpoint)
+        if not timeout:
+            return handler(request, *args, **kwargs)
+
+        cache = get_cache()
+        key = self.get_cache_key(request, namespace)
+        cached = cache.get(key)
+        if cached is not None:
+            count(namespace, 'hits')
+            data, headers = cached
+            response = Response(data, headers=headers)
+            response['X-Cache'] = 'HIT'
+            return evaluate_preconditions(request, response)
+
+        count(namespace, 'misses')
+        response = handler(request, *args, **kwargs)
+        if response.status_code == 200:
+            headers = {
+                header: response[header] for header in VALIDATOR_HEADERS
+                if response.has_header(header)
+            }
+            cache.set(key, (response.data, headers), timeout)
+        response['X-Cache'] = 'MISS'
+        return response
@@ -0,0 +1,125 @@
+'''Response compression negotiated with Accept-Encoding.
+
+Brotli is preferred when the brotli package is installed and the client
+accepts it, gzip otherwise. Bodies shorter than COMPRESSION['MIN_SIZE']
+bytes are sent as they are, since compressing them saves less than it
+costs. Streaming responses, e.g. exports, are compressed as they are
+read and flushed every COMPRESSION['STREAM_FLUSH_SIZE'] bytes of input.
+'''
+import gzip
+import zlib
+from functools import partial
+
+from django.conf import settings
+from django.utils.cache import patch_vary_headers
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+BROTLI = 'br'
+GZIP = 'gzip'
+
+
+def parse_accept_encoding(header):
+    '''Quality of every coding of an Accept-Encoding header.'''
+    qualities = {}
+    for item in header.split(','):
+        coding, *params = item.split(';')
+        quality = 1.0
+        for param in params:
+            name, _, value = param.strip().partition('=')
+            if name == 'q':
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        qualities[coding.strip().lower()] = quality
+    return qualities
+
+
+def get_encoding(request):
+    '''The best encoding the client accepts, None for the identity.'''
+    qualities = parse_accept_encoding(
+        request.META.get('HTTP_ACCEPT_ENCODING', '')
+    )
+    encodings = (BROTLI, GZIP) if brotli is not None else (GZIP,)
+    for encoding in encodings:
+        if qualities.get(encoding, qualities.get('*', 0)) > 0:
+            return encoding
+    return None
+
+
+def compress(content, encoding):
+    options = settings.COMPRESSION
+    if encoding == BROTLI:
+        return brotli.compress(content, quality=options['BROTLI_QUALITY'])
+    return gzip.compress(
+        content, compresslevel=options['GZIP_LEVEL'], mtime=0
+    )
+
+
+def compress_sequence(chunks, encoding):
+    options = settings.COMPRESSION
+    if encoding == BROTLI:
+        compressor = brotli.Compressor(quality=options['BROTLI_QUALITY'])
+        process, flush = compressor.process, compressor.flush
+        finish = compressor.finish
+    else:
+        compressor = zlib.compressobj(
+            options['GZIP_LEVEL'], zlib.DEFLATED, 16 + zlib.MAX_WBITS
+        )
+        process = compressor.compress
+        flush = partial(compressor.flush, zlib.Z_SYNC_FLUSH)
+        finish = compressor.flush
+    pending = 0
+    for chunk in chunks:
+        data = process(chunk)
+        pending += len(chunk)
+        # Flushing every chunk, e.g. every exported row, costs almost as
+        # much as the row saves; flushing from time to time keeps a slow
+        # stream flowing.
+        if pending >= options['STREAM_FLUSH_SIZE']:
+            data += flush()
+            pending = 0
+        if data:
+            yield data
+    yield finish()
+
+
+class CompressionMiddleware:
+    '''Compress response bodies with brotli or gzip.'''
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        if response.has_header('Content-Encoding'):
+            return response
+        if not response.streaming and (
+            len(response.content) < settings.COMPRESSION['MIN_SIZE']
+        ):
+            return response
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = get_encoding(request)
+        if encoding is None:
+            return response
+        if response.streaming:
+            response.streaming_content = compress_sequence(
+                response.streaming_content, encoding
+            )
+            del response['Content-Length']
+        else:
+            content = compress(response.content, encoding)
+            if len(content) >= len(response.content):
+                return response
+            response.content = content
+            response['Content-Length'] = str(len(content))
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            # The compressed body is not byte for byte the same.
+            response['ETag'] = f'W/{etag}'
+        response['Content-Encoding'] = encoding
+        return response
@@ -0,0 +1,57 @@
+import hashlib
+from calendar import timegm
+
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, parse_http_date_safe, quote_etag
+
+VALIDATOR_HEADERS = ('ETag', 'Last-Modified')
+
+
+def evaluate_preconditions(request, response):
+    '''Turn a response into 304 Not Modified if the client has it.'''
+    last_modified = response.get('Last-Modified')
+    return get_conditional_response(
+        request,
+        etag=response.get('ETag'),
+        last_modified=last_modified and parse_http_date_safe(last_modified),
+        response=response,
+    )
+
+
+class ConditionalResponseMixin:
+    '''Support If-None-Match and If-Modified-Since on read actions.
+
+    Views describe their data with get_conditional_state(), which must
+    be cheap: the point is to answer 304 without running the query and
+    the serializer behind the response.
+    '''
+
+    def get_conditional_state(self, request):
+        '''Return (token, last_modified) of the data, or None.'''
+        raise NotImplementedError
+
+    def get_etag(self, request, token):
+        digest = hashlib.md5(
+            f'{token}:{request.get_full_path()}:'
+            f'{request.accepted_renderer.format}'.encode('utf-8')
+        ).hexdigest()
+        return quote_etag(digest)
+
+    def conditional_response(self, handler, request, *args, **kwargs):
+        state = self.get_conditional_state(request)
+        if state is None:
+            return handler(request, *args, **kwargs)
+        token, last_modified = state
+        etag = self.get_etag(request, token)
+        timestamp = last_modified and timegm(last_modified.utctimetuple())
+        not_modified = get_conditional_response(
+            request, etag=etag, last_modified=timestamp
+        )
+        if not_modified is not None:
+            return not_modified
+        response = handler(request, *args, **kwargs)
+        if response.status_code == 200:
+            response['ETag'] = etag
+            if timestamp:
+                response['Last-Modified'] = http_date(timestamp)
+        return response
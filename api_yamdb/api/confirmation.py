@@ -0,0 +1,99 @@
+'''Confirmation codes that are checked with a single user lookup.
+
+A code is the expiry time in base36 and an HMAC of the user's primary
+key, username, password hash and the expiry. Malformed and expired codes
+are rejected before the user is loaded; the signature binds the code to
+that account, so it stops working once the user is recreated or their
+password changes.
+'''
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.utils.crypto import constant_time_compare, salted_hmac
+from django.utils.http import base36_to_int, int_to_base36
+
+KEY_SALT = 'api.confirmation.code'
+# Hex digits of the HMAC kept in the code, 80 bits.
+SIGNATURE_LENGTH = 20
+
+
+def sign(user, expires):
+    return salted_hmac(
+        KEY_SALT, f'{user.pk}:{user.username}:{user.password}:{expires}'
+    ).hexdigest()[:SIGNATURE_LENGTH]
+
+
+def make_code(user, now=None):
+    now = time.time() if now is None else now
+    expires = int(now) + settings.CONFIRMATION_CODE['TTL']
+    return f'{int_to_base36(expires)}-{sign(user, expires)}'
+
+
+def parse_code(code, now=None):
+    '''Expiry and signature of an unexpired code, None when it is not one.'''
+    now = time.time() if now is None else now
+    try:
+        expires, signature = code.split('-')
+        expires = base36_to_int(expires)
+    except ValueError:
+        return None
+    if expires < now or len(signature) != SIGNATURE_LENGTH:
+        return None
+    return expires, signature
+
+
+def check_code(user, parsed):
+    expires, signature = parsed
+    return constant_time_compare(signature, sign(user, expires))
+
+
+class FailureLimiter:
+    '''Count failed attempts per key in fixed windows, in memory.
+
+    Every process keeps its own counters, which is enough to make
+    guessing codes expensive without a shared store. At most max_keys
+    keys are kept, the least recently failed ones are dropped first.
+    '''
+
+    def __init__(self, max_failures, window, max_keys=10000):
+        self.max_failures = max_failures
+        self.window = window
+        self.max_keys = max_keys
+        self.failures = OrderedDict()
+        self.lock = threading.Lock()
+
+    def _get(self, key, now):
+        started, count = self.failures.get(key, (now, 0))
+        if now - started >= self.window:
+            return now, 0
+        return started, count
+
+    def retry_after(self, key, now=None):
+        '''Seconds until the key may try again, None when it may now.'''
+        now = time.monotonic() if now is None else now
+        with self.lock:
+            started, count = self._get(key, now)
+        if count < self.max_failures:
+            return None
+        return started + self.window - now
+
+    def fail(self, key, now=None):
+        now = time.monotonic() if now is None else now
+        with self.lock:
+            started, count = self._get(key, now)
+            self.failures[key] = (started, count + 1)
+            self.failures.move_to_end(key)
+            while len(self.failures) > self.max_keys:
+                self.failures.popitem(last=False)
+
+    def reset(self, key):
+        with self.lock:
+            self.failures.pop(key, None)
+
+
+limiter = FailureLimiter(
+    settings.CONFIRMATION_CODE['MAX_FAILURES'],
+    settings.CONFIRMATION_CODE['FAILURE_WINDOW']
+)
@@ -0,0 +1,132 @@
+'''Sparse fieldsets: `?fields=` and `?expand=` on read endpoints.
+
+`fields` is a comma separated list of the fields a client wants, e.g.
+`?fields=id,name,rating`; the others are neither serialized nor read
+from the database: the view drops their columns with only() and the
+joins and prefetches of relations that are not requested. Relations
+listed in Meta.compact_fields of a serializer are rendered as nested
+objects by default; `expand` names the ones to keep nested, the others
+are rendered by their slug, e.g. `?fields=id,genre&expand=`.
+'''
+from functools import lru_cache
+
+from django.core.exceptions import FieldDoesNotExist
+from django.utils.functional import cached_property
+from rest_framework import serializers
+
+UNKNOWN_FIELDS_MESSAGE = 'Неизвестные поля: {fields}.'
+
+
+@lru_cache(maxsize=None)
+def get_field_names(serializer_class):
+    return tuple(
+        name for name, field in serializer_class().fields.items()
+        if not field.write_only
+    )
+
+
+def parse_names(value, allowed, param):
+    '''Sorted tuple of the comma separated names, all of them allowed.'''
+    names = {name.strip() for name in value.split(',') if name.strip()}
+    unknown = names - set(allowed)
+    if unknown:
+        raise serializers.ValidationError({param: [
+            UNKNOWN_FIELDS_MESSAGE.format(fields=', '.join(sorted(unknown)))
+        ]})
+    return tuple(sorted(names))
+
+
+class SparseFieldsetMixin:
+    '''Serializer that renders only the fields it is given.
+
+    Relations in Meta.compact_fields, a dict of field factories by name,
+    are replaced by their compact field unless they are in expand.
+    '''
+
+    def __init__(self, *args, fields=None, expand=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        if fields is not None:
+            for name in set(self.fields) - set(fields):
+                self.fields.pop(name)
+        if expand is not None:
+            compact_fields = getattr(self.Meta, 'compact_fields', {})
+            for name, compact in compact_fields.items():
+                if name in self.fields and name not in expand:
+                    self.fields[name] = compact()
+
+
+class SparseFieldsetViewMixin:
+    '''Read `fields` and `expand` on list and retrieve of a viewset.
+
+    Views pass their queryset through select_fieldset(), which loads the
+    relations in select_related_fields and prefetch_related_fields only
+    when they are requested.
+    '''
+    select_related_fields = ()
+    prefetch_related_fields = ()
+    fieldset_actions = ('list', 'retrieve')
+
+    @cached_property
+    def fieldset(self):
+        '''Keyword arguments of the serializer with the requested fields.'''
+        if self.action not in self.fieldset_actions:
+            return {}
+        params = self.request.query_params
+        serializer_class = self.get_serializer_class()
+        options = {}
+        if 'fields' in params:
+            options['fields'] = parse_names(
+                params['fields'], get_field_names(serializer_class),
+                'fields'
+            )
+        if 'expand' in params:
+            options['expand'] = parse_names(
+                params['expand'],
+                getattr(serializer_class.Meta, 'compact_fields', ()),
+                'expand'
+            )
+        return options
+
+    def requested(self, name):
+        return name in self.fieldset.get('fields', (name,))
+
+    def get_serializer_options(self):
+        return self.fieldset
+
+    def get_serializer(self, *args, **kwargs):
+        return super().get_serializer(*args, **self.fieldset, **kwargs)
+
+    def get_columns(self, model):
+        '''Columns of the requested fields and of the page ordering.'''
+        ordering = getattr(self.pagination_class, 'ordering', ())
+        names = [
+            *self.fieldset['fields'],
+            *(name.lstrip('-') for name in ordering)
+        ]
+        columns = []
+        for name in names:
+            try:
+                field = model._meta.get_field(name)
+            except FieldDoesNotExist:
+                continue
+            if field.concrete and not field.many_to_many:
+                columns.append(name)
+        return columns
+
+    def select_fieldset(self, queryset):
+        '''Load only the columns and relations of the requested fields.'''
+        select = [
+            name for name in self.select_related_fields
+            if self.requested(name)
+        ]
+        if select:
+            queryset = queryset.select_related(*select)
+        prefetch = [
+            name for name in self.prefetch_related_fields
+            if self.requested(name)
+        ]
+        if prefetch:
+            queryset = queryset.prefetch_related(*prefetch)
+        if 'fields' in self.fieldset:
+            queryset = queryset.only(*self.get_columns(queryset.model))
+        return queryset
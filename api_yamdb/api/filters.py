@@ -1,5 +1,7 @@
 import django_filters
+from rest_framework.filters import BaseFilterBackend
 from reviews.models import Title
+from reviews.search import search
 
 
 class TitleFilter(django_filters.FilterSet):
@@ -10,3 +12,17 @@ class TitleFilter(django_filters.FilterSet):
     class Meta:
         model = Title
         fields = ['genre', 'category', 'name', 'year']
+
+
+class RankedSearchFilter(BaseFilterBackend):
+    '''Search by the `search` query parameter, best matches first.
+
+    Keyset pages (`cursor`) keep the ordering of their pagination.
+    '''
+    search_param = 'search'
+
+    def filter_queryset(self, request, queryset, view):
+        query = request.query_params.get(self.search_param, '').strip()
+        if not query:
+            return queryset
+        return search(queryset, query)
@@ -0,0 +1,236 @@
+'''Per-view request metrics in the Prometheus text format.
+
+MetricsMiddleware times every request and counts the queries it runs
+with a database execute wrapper. Measurements are added to histograms
+labelled with the view and action, e.g. `TitleViewSet.list`, which are
+kept in the memory of the process: every gunicorn worker has its own,
+so a scrape shows the worker that served it. Requests slower than
+METRICS['SLOW_REQUEST'] seconds are logged with their slowest queries.
+
+The serialization histogram adds up the time the renderer takes and the
+time views spend building the response data inside
+measure_serialization(), which wraps the compiled read path.
+'''
+import logging
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.db import connection
+
+logger = logging.getLogger(__name__)
+
+UNRESOLVED = 'unresolved'
+SECONDS_BUCKETS = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10
+)
+QUERIES_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100, 200)
+BYTES_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+# name: (help, buckets)
+HISTOGRAMS = {
+    'yamdb_request_duration_seconds': (
+        'Wall time of the request', SECONDS_BUCKETS
+    ),
+    'yamdb_db_queries': (
+        'Database queries run by the request', QUERIES_BUCKETS
+    ),
+    'yamdb_db_duration_seconds': (
+        'Time spent in database queries', SECONDS_BUCKETS
+    ),
+    'yamdb_serialization_duration_seconds': (
+        'Time spent building the response data and rendering it',
+        SECONDS_BUCKETS
+    ),
+    'yamdb_response_size_bytes': (
+        'Size of the response body', BYTES_BUCKETS
+    ),
+}
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+
+class Histogram:
+    '''Cumulative histogram with fixed upper bounds.'''
+
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)
+        self.sum = 0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative(self):
+        '''Pairs of upper bound and count of values up to it.'''
+        total = 0
+        for bound, count in zip(self.buckets + ('+Inf',), self.counts):
+            total += count
+            yield bound, total
+
+
+class Registry:
+    '''Histograms of every metric by view, and response counters.'''
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.clear()
+
+    def clear(self):
+        self.histograms = {name: {} for name in HISTOGRAMS}
+        self.responses = {}
+
+    def observe(self, view, status_code, values):
+        with self.lock:
+            for name, value in values.items():
+                histograms = self.histograms[name]
+                if view not in histograms:
+                    histograms[view] = Histogram(HISTOGRAMS[name][1])
+                histograms[view].observe(value)
+            key = (view, status_code)
+            self.responses[key] = self.responses.get(key, 0) + 1
+
+    def render(self):
+        '''Metrics in the Prometheus text exposition format.'''
+        lines = [
+            '# HELP yamdb_responses_total Responses by view and status',
+            '# TYPE yamdb_responses_total counter',
+        ]
+        with self.lock:
+            for (view, status_code), count in sorted(self.responses.items()):
+                lines.append(
+                    f'yamdb_responses_total{{view="{view}",'
+                    f'status="{status_code}"}} {count}'
+                )
+            for name, (help_text, buckets) in HISTOGRAMS.items():
+                lines.append(f'# HELP {name} {help_text}')
+                lines.append(f'# TYPE {name} histogram')
+                for view, histogram in sorted(self.histograms[name].items()):
+                    for bound, count in histogram.cumulative():
+                        lines.append(
+                            f'{name}_bucket{{view="{view}",le="{bound}"}} '
+                            f'{count}'
+                        )
+                    lines.append(
+                        f'{name}_sum{{view="{view}"}} {histogram.sum}'
+                    )
+                    lines.append(
+                        f'{name}_count{{view="{view}"}} {histogram.count}'
+                    )
+        return '\n'.join(lines) + '\n'
+
+
+registry = Registry()
+
+
+def get_view_name(request):
+    '''Name of the view and action that handled the request.'''
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return UNRESOLVED
+    view_class = getattr(match.func, 'cls', None)
+    if view_class is None:
+        return match.view_name or match.func.__name__
+    method = request.method.lower()
+    action = (getattr(match.func, 'actions', None) or {}).get(method, method)
+    # Views made by @api_view are all instances of WrappedAPIView.
+    name = view_class.__name__
+    if name == 'WrappedAPIView':
+        name = match.func.__name__
+    return f'{name}.{action}'
+
+
+@contextmanager
+def measure_serialization(request):
+    '''Count the time of the block as serialization of the request.'''
+    # DRF requests do not pass attribute assignment on to the request
+    # the middleware sees.
+    request = getattr(request, '_request', request)
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        request.serialize_duration = (
+            getattr(request, 'serialize_duration', 0)
+            + time.perf_counter() - start
+        )
+
+
+class QueryRecorder:
+    '''Execute wrapper that counts and times the queries of a request.'''
+
+    def __init__(self):
+        self.queries = []
+        self.duration = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            duration = time.perf_counter() - start
+            self.duration += duration
+            self.queries.append((duration, sql))
+
+    def slowest(self, count):
+        return sorted(self.queries, reverse=True)[:count]
+
+
+class MetricsMiddleware:
+    '''Record the metrics of every request.'''
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        if not settings.METRICS['ENABLED']:
+            return self.get_response(request)
+        request.render_duration = 0
+        request.serialize_duration = 0
+        recorder = QueryRecorder()
+        start = time.perf_counter()
+        with connection.execute_wrapper(recorder):
+            response = self.get_response(request)
+        duration = time.perf_counter() - start
+        view = get_view_name(request)
+        registry.observe(view, response.status_code, {
+            'yamdb_request_duration_seconds': duration,
+            'yamdb_db_queries': len(recorder.queries),
+            'yamdb_db_duration_seconds': recorder.duration,
+            'yamdb_serialization_duration_seconds': (
+                request.serialize_duration + request.render_duration
+            ),
+            'yamdb_response_size_bytes': (
+                0 if response.streaming else len(response.content)
+            ),
+        })
+        if duration >= settings.METRICS['SLOW_REQUEST']:
+            self.log_slow_request(request, view, duration, recorder)
+        return response
+
+    def process_template_response(self, request, response):
+        # DRF responses are rendered right after this hook, the callback
+        # runs once the content is ready.
+        start = time.perf_counter()
+
+        def measure(response):
+            request.render_duration = time.perf_counter() - start
+
+        response.add_post_render_callback(measure)
+        return response
+
+    def log_slow_request(self, request, view, duration, recorder):
+        queries = '\n'.join(
+            f'{query_duration * 1000:.1f} ms: {sql}'
+            for query_duration, sql in recorder.slowest(
+                settings.METRICS['SLOW_QUERIES']
+            )
+        )
+        logger.warning(
+            'Slow request %s %s (%s): %.1f ms, %d queries in %.1f ms\n%s',
+            request.method, request.get_full_path(), view, duration * 1000,
+            len(recorder.queries), recorder.duration * 1000, queries
+        )
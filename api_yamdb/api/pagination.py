@@ -0,0 +1,154 @@
+import base64
+import json
+from collections import OrderedDict
+
+from django.core.exceptions import ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import (BasePagination, LimitOffsetPagination,
+                                       PageNumberPagination)
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import replace_query_param
+
+INVALID_CURSOR_MESSAGE = 'Неверный курсор.'
+
+
+class KeysetPagination(BasePagination):
+    '''Opt-in keyset pagination, enabled by the `cursor` query parameter.
+
+    A page is selected with a WHERE on the ordering columns of the last
+    row seen instead of an OFFSET, and no COUNT(*) is run, so every page
+    costs the same however deep it is. The ordering must end with a
+    unique field. Requests without `cursor` are paginated by
+    fallback_class, as before; `?cursor=` asks for the first page.
+    '''
+    ordering = ('-id',)
+    fallback_class = PageNumberPagination
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'page_size'
+    max_page_size = 100
+
+    def __init__(self):
+        self.fallback = self.fallback_class()
+        self.keyset = False
+
+    @property
+    def display_page_controls(self):
+        return not self.keyset and self.fallback.display_page_controls
+
+    def to_html(self):
+        return self.fallback.to_html()
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return api_settings.PAGE_SIZE
+        return max(1, min(page_size, self.max_page_size))
+
+    def encode_cursor(self, obj, reverse):
+        position = [
+            obj._meta.get_field(name.lstrip('-')).value_to_string(obj)
+            for name in self.ordering
+        ]
+        data = json.dumps({'p': position, 'r': reverse}).encode('utf-8')
+        return base64.urlsafe_b64encode(data).decode('ascii')
+
+    def decode_cursor(self, token, model):
+        '''Position and direction of a cursor, as field values.'''
+        try:
+            data = json.loads(base64.urlsafe_b64decode(token.encode('ascii')))
+            position, reverse = data['p'], bool(data['r'])
+            if not isinstance(position, list) or (
+                len(position) != len(self.ordering)
+            ):
+                raise ValueError(token)
+            position = [
+                model._meta.get_field(name.lstrip('-')).to_python(value)
+                for name, value in zip(self.ordering, position)
+            ]
+            if None in position:
+                raise ValueError(token)
+        except (TypeError, ValueError, KeyError, UnicodeEncodeError,
+                ValidationError):
+            raise NotFound(INVALID_CURSOR_MESSAGE)
+        return position, reverse
+
+    def after(self, position, reverse):
+        '''Rows that come after the position in the (reversed) ordering.'''
+        condition = Q()
+        equal = {}
+        for name, value in zip(self.ordering, position):
+            field = name.lstrip('-')
+            descending = name.startswith('-') != reverse
+            lookup = f'{field}__lt' if descending else f'{field}__gt'
+            condition |= Q(**equal, **{lookup: value})
+            equal[field] = value
+        return condition
+
+    def paginate_queryset(self, queryset, request, view=None):
+        if self.cursor_query_param not in request.query_params:
+            return self.fallback.paginate_queryset(queryset, request, view)
+        self.keyset = True
+        self.request = request
+        token = request.query_params[self.cursor_query_param]
+        position, reverse = None, False
+        if token:
+            position, reverse = self.decode_cursor(token, queryset.model)
+
+        ordering = self.ordering
+        if reverse:
+            ordering = tuple(
+                name[1:] if name.startswith('-') else f'-{name}'
+                for name in ordering
+            )
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            queryset = queryset.filter(self.after(position, reverse))
+
+        page_size = self.get_page_size(request)
+        page = list(queryset[:page_size + 1])
+        has_more = len(page) > page_size
+        page = page[:page_size]
+        if reverse:
+            page.reverse()
+
+        has_next, has_previous = has_more, position is not None
+        if reverse:
+            has_next, has_previous = has_previous, has_next
+        self.next_cursor = self.previous_cursor = None
+        if page and has_next:
+            self.next_cursor = self.encode_cursor(page[-1], False)
+        if page and has_previous:
+            self.previous_cursor = self.encode_cursor(page[0], True)
+        return page
+
+    def get_link(self, cursor):
+        if cursor is None:
+            return None
+        return replace_query_param(
+            self.request.build_absolute_uri(), self.cursor_query_param, cursor
+        )
+
+    def get_paginated_response(self, data):
+        if not self.keyset:
+            return self.fallback.get_paginated_response(data)
+        return Response(OrderedDict([
+            ('next', self.get_link(self.next_cursor)),
+            ('previous', self.get_link(self.previous_cursor)),
+            ('results', data),
+        ]))
+
+
+class ReviewPagination(KeysetPagination):
+    ordering = ('-pub_date', '-id')
+    fallback_class = LimitOffsetPagination
+
+
+class CommentPagination(KeysetPagination):
+    ordering = ('-pub_date', '-id')
+
+
+class TitlePagination(KeysetPagination):
+    ordering = ('year', 'name', 'id')
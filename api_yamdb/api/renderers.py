@@ -0,0 +1,72 @@
+from django.core.exceptions import ImproperlyConfigured
+from rest_framework.renderers import BaseRenderer, JSONRenderer
+from rest_framework.utils.encoders import JSONEncoder
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+# DRF escapes these, they are not valid in JavaScript string literals.
+LINE_SEPARATORS = (
+    ('\u2028'.encode('utf-8'), b'\\u2028'),
+    ('\u2029'.encode('utf-8'), b'\\u2029'),
+)
+
+
+class FastJSONRenderer(JSONRenderer):
+    '''JSONRenderer that encodes with orjson when it is installed.
+
+    The output is the same as JSONRenderer's for compact unicode JSON,
+    the default. Indented or ASCII-only output, and any output without
+    orjson, is left to JSONRenderer. Types orjson does not know are
+    encoded by DRF's JSONEncoder.
+    '''
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if (
+            orjson is None
+            or not self.compact
+            or self.ensure_ascii
+            or self.get_indent(accepted_media_type, renderer_context or {})
+        ):
+            return super().render(
+                data, accepted_media_type, renderer_context
+            )
+        if data is None:
+            return b''
+        content = orjson.dumps(
+            data, default=JSONEncoder().default,
+            option=orjson.OPT_PASSTHROUGH_DATETIME | orjson.OPT_NON_STR_KEYS
+        )
+        for separator, escaped in LINE_SEPARATORS:
+            content = content.replace(separator, escaped)
+        return content
+
+
+class MessagePackRenderer(BaseRenderer):
+    '''MessagePack, for clients that ask for it with Accept.
+
+    The data is the same as in JSON responses: types MessagePack does
+    not know are encoded by DRF's JSONEncoder, dates as strings.
+    '''
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if msgpack is None:
+            raise ImproperlyConfigured(
+                'MessagePackRenderer requires the msgpack package.'
+            )
+        if data is None:
+            return b''
+        return msgpack.packb(
+            data, default=JSONEncoder().default, use_bin_type=True
+        )
@@ -0,0 +1,127 @@
+'''Compiled read path for serializers of the hot list endpoints.
+
+DRF builds every representation by walking the serializer fields and
+calling get_attribute() and to_representation() on each of them. For
+read-only output of model instances most of that work is the same for
+every object, so compile_serializer() resolves it once per serializer
+class into a list of (name, getter, converter) and a plain function.
+The result is the same dict DRF would build, field for field.
+
+Serializers whose fields depend on the serializer context, e.g.
+hyperlinks, must not be compiled.
+'''
+from functools import lru_cache
+from operator import attrgetter
+
+from django.db import models
+from rest_framework import serializers
+from rest_framework.response import Response
+
+from .metrics import measure_serialization
+
+# Renderers that only need the data, not the serializer.
+COMPILED_FORMATS = ('json', 'msgpack')
+# Fields whose to_representation() is a plain type conversion.
+CONVERTERS = {
+    serializers.IntegerField: int,
+    serializers.CharField: str,
+    serializers.SlugField: str,
+}
+
+
+def get_getter(field):
+    if not field.source_attrs:
+        # source='*'
+        return lambda instance: instance
+    return attrgetter('.'.join(field.source_attrs))
+
+
+def get_many(child):
+    represent = compile_fields(child)
+
+    def convert(value):
+        if isinstance(value, models.Manager):
+            value = value.all()
+        return [represent(item) for item in value]
+    return convert
+
+
+def get_related_many(field):
+    convert = get_converter(field.child_relation)
+    return lambda manager: [convert(item) for item in manager.all()]
+
+
+def get_converter(field):
+    if isinstance(field, serializers.ManyRelatedField):
+        return get_related_many(field)
+    if isinstance(field, serializers.ListSerializer):
+        return get_many(field.child)
+    if isinstance(field, serializers.Serializer):
+        return compile_fields(field)
+    return CONVERTERS.get(type(field), field.to_representation)
+
+
+def compile_fields(serializer):
+    '''Function that returns the representation of an instance.'''
+    fields = [
+        (field.field_name, get_getter(field), get_converter(field))
+        for field in serializer._readable_fields
+    ]
+
+    def represent(instance):
+        data = {}
+        for name, getter, convert in fields:
+            value = getter(instance)
+            data[name] = None if value is None else convert(value)
+        return data
+    return represent
+
+
+# Options are the sparse fieldsets requested by clients.
+@lru_cache(maxsize=1024)
+def compile_serializer(serializer_class, **options):
+    return compile_fields(serializer_class(**options))
+
+
+class CompiledReadMixin:
+    '''Serve list and retrieve with the compiled serializer.
+
+    Only JSON and MessagePack responses take this path: the browsable
+    API keeps the serializer instance it uses to render its forms.
+    '''
+
+    def use_compiled(self, request):
+        return request.accepted_renderer.format in COMPILED_FORMATS
+
+    def get_serializer_options(self):
+        '''Keyword arguments the serializer of the action is built with.'''
+        return {}
+
+    def list(self, request, *args, **kwargs):
+        if not self.use_compiled(request):
+            return super().list(request, *args, **kwargs)
+        represent = compile_serializer(
+            self.get_serializer_class(), **self.get_serializer_options()
+        )
+        queryset = self.filter_queryset(self.get_queryset())
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            with measure_serialization(request):
+                data = [represent(instance) for instance in page]
+            return self.get_paginated_response(data)
+        # The queryset is evaluated before the timing starts.
+        instances = list(queryset)
+        with measure_serialization(request):
+            data = [represent(instance) for instance in instances]
+        return Response(data)
+
+    def retrieve(self, request, *args, **kwargs):
+        if not self.use_compiled(request):
+            return super().retrieve(request, *args, **kwargs)
+        represent = compile_serializer(
+            self.get_serializer_class(), **self.get_serializer_options()
+        )
+        instance = self.get_object()
+        with measure_serialization(request):
+            data = represent(instance)
+        return Response(data)
@@ -1,13 +1,35 @@
+from collections import Counter
+from functools import partial
+
+from django.conf import settings
 from django.core.validators import MaxValueValidator, MinValueValidator
+from django.db import connection, transaction
 from rest_framework import serializers
+from rest_framework.settings import api_settings
 from rest_framework.validators import UniqueValidator
-from reviews.models import Category, Comment, Genre, Review, Title, User
+from reviews.export import FORMATS
+from reviews.models import (Category, CategoryStats, Comment, Genre,
+                            GenreStats, PendingReview, Review, ScoreHistogram,
+                            Title, TitleGenre, User)
+from reviews.signals import data_imported
 from reviews.validators import validate_username, validate_year
 
-from api_yamdb.settings import EMAIL_MAX_LENGTH, NAME_MAX_LENGTH
+from api_yamdb.settings import (BULK_MAX_ITEMS, EMAIL_MAX_LENGTH,
+                                NAME_MAX_LENGTH)
+
+from .fieldsets import SparseFieldsetMixin
 
 VALDATE_SCORE = 'Come On! Поставьте оценку от 1 до 10!'
 UNIQUE_EMAIL_MESSAGE = 'Пользователь с таким email уже существует'
+# Title fields maintained by the backend and never shown in the API.
+TITLE_SERVICE_FIELDS = (
+    'rating_sum', 'rating_count', 'weighted_rating', 'version', 'modified'
+)
+BULK_MAX_ITEMS_MESSAGE = f'Не больше {BULK_MAX_ITEMS} элементов за запрос.'
+DUPLICATE_TITLE_MESSAGE = 'Произведение указано в запросе несколько раз.'
+DOES_NOT_EXIST_MESSAGE = serializers.SlugRelatedField.default_error_messages[
+    'does_not_exist'
+]
 
 
 class SignUpSerializer(serializers.Serializer):
@@ -60,7 +82,7 @@ class TokenSerializer(serializers.ModelSerializer):
         fields = ('username', 'confirmation_code')
 
 
-class ReviewSerializer(serializers.ModelSerializer):
+class ReviewSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     '''Serializer for Review model - RETRIEVE, UPDATE or DESTROY actions.'''
     author = serializers.SlugRelatedField(
         slug_field='username',
@@ -75,7 +97,15 @@ class ReviewSerializer(serializers.ModelSerializer):
         model = Review
 
 
-class CommentSerializer(serializers.ModelSerializer):
+class PendingReviewSerializer(serializers.ModelSerializer):
+    '''Serializer for the state of a review queued for ingestion.'''
+
+    class Meta:
+        fields = ('id', 'status', 'review', 'error')
+        model = PendingReview
+
+
+class CommentSerializer(SparseFieldsetMixin, serializers.ModelSerializer):
     '''Serializer for Comment model.'''
     author = serializers.SlugRelatedField(
         slug_field='username', read_only=True
@@ -116,14 +146,15 @@ class TitleSerializerWritable(serializers.ModelSerializer):
     year = serializers.IntegerField(
         validators=[validate_year, ]
     )
+    rating = serializers.IntegerField(read_only=True)
 
     class Meta:
         model = Title
-        fields = '__all__'
-        read_only_fields = ('rating',)
+        exclude = TITLE_SERVICE_FIELDS
 
 
-class TitleSerializerReadOnly(serializers.ModelSerializer):
+class TitleSerializerReadOnly(SparseFieldsetMixin,
+                              serializers.ModelSerializer):
     '''Serializer for Title model for reading data.'''
     genre = GenreSerializer(many=True)
     category = CategorySerializer()
@@ -131,5 +162,278 @@ class TitleSerializerReadOnly(serializers.ModelSerializer):
 
     class Meta:
         model = Title
-        fields = '__all__'
+        exclude = TITLE_SERVICE_FIELDS
         read_only_fields = ('category', 'rating')
+        # Rendered by their slug unless expanded.
+        compact_fields = {
+            'genre': partial(
+                serializers.SlugRelatedField, slug_field='slug', many=True,
+                read_only=True
+            ),
+            'category': partial(
+                serializers.SlugRelatedField, slug_field='slug',
+                read_only=True
+            ),
+        }
+
+
+class TitleTopSerializer(TitleSerializerReadOnly):
+    '''Serializer for titles ranked by their weighted rating.'''
+    weighted_rating = serializers.FloatField(read_only=True)
+
+    class Meta(TitleSerializerReadOnly.Meta):
+        exclude = ('rating_sum', 'version', 'modified')
+
+
+class TopTitlesSerializer(serializers.Serializer):
+    '''Query parameters of the top titles.'''
+    category = serializers.SlugField(required=False)
+    genre = serializers.SlugField(required=False)
+    min_reviews = serializers.IntegerField(min_value=1, required=False)
+    limit = serializers.IntegerField(
+        min_value=1, max_value=settings.RANKING['MAX_LIMIT'], required=False
+    )
+
+
+class ExportSerializer(serializers.Serializer):
+    '''Query parameters of a table export.'''
+    output = serializers.ChoiceField(choices=FORMATS, default=FORMATS[0])
+    after = serializers.IntegerField(min_value=0, default=0)
+
+
+class FacetStatsSerializer(serializers.Serializer):
+    '''Stats of the titles of a genre or category.'''
+    title_count = serializers.IntegerField(source='stats.title_count')
+    review_count = serializers.IntegerField(source='stats.rating_count')
+    rating = serializers.FloatField(source='stats.rating')
+
+    STATS_FIELDS = ('title_count', 'review_count', 'rating')
+
+
+class GenreStatsSerializer(FacetStatsSerializer, GenreSerializer):
+    '''Serializer for Genre model with the stats of its titles.'''
+
+    class Meta(GenreSerializer.Meta):
+        fields = (
+            GenreSerializer.Meta.fields + FacetStatsSerializer.STATS_FIELDS
+        )
+
+
+class CategoryStatsSerializer(FacetStatsSerializer, CategorySerializer):
+    '''Serializer for Category model with the stats of its titles.'''
+
+    class Meta(CategorySerializer.Meta):
+        fields = (
+            CategorySerializer.Meta.fields + FacetStatsSerializer.STATS_FIELDS
+        )
+
+
+class FacetsSerializer(serializers.Serializer):
+    '''Query parameters of genre and category lists.'''
+    with_stats = serializers.BooleanField(default=False)
+
+
+class ScoreHistogramSerializer(serializers.ModelSerializer):
+    '''Serializer for the score distribution of a title.'''
+    count = serializers.IntegerField()
+    mean = serializers.FloatField()
+    median = serializers.FloatField()
+    histogram = serializers.DictField(child=serializers.IntegerField())
+
+    class Meta:
+        model = ScoreHistogram
+        fields = ('title', 'count', 'mean', 'median', 'histogram')
+
+
+class BulkListSerializer(serializers.ListSerializer):
+    '''List of items validated one by one, with errors reported per item.
+
+    Subclasses resolve the references of all items at once in
+    resolve(), with one query per model. References of items with
+    invalid fields are resolved as well, so that every item gets all of
+    its errors in one response.
+    '''
+    # Fields resolved by resolve(), looked up in invalid items too.
+    reference_fields = ()
+
+    def __init__(self, *args, **kwargs):
+        kwargs.setdefault('allow_empty', False)
+        super().__init__(*args, **kwargs)
+
+    def to_internal_value(self, data):
+        if isinstance(data, list) and len(data) > BULK_MAX_ITEMS:
+            raise serializers.ValidationError({
+                api_settings.NON_FIELD_ERRORS_KEY: [BULK_MAX_ITEMS_MESSAGE]
+            })
+        try:
+            items = super().to_internal_value(data)
+            errors = [{} for _ in items]
+        except serializers.ValidationError as error:
+            if not isinstance(error.detail, list):
+                raise
+            errors = error.detail
+            items = [
+                self.get_references(item, item_errors)
+                for item, item_errors in zip(data, errors)
+            ]
+        self.resolve(items, errors)
+        if any(errors):
+            raise serializers.ValidationError(errors)
+        return items
+
+    def get_references(self, item, item_errors):
+        '''Valid reference fields of an item that failed validation.'''
+        references = {}
+        if not isinstance(item, dict):
+            return references
+        for name in self.reference_fields:
+            if name not in item or name in item_errors:
+                continue
+            try:
+                references[name] = self.child.fields[name].run_validation(
+                    item[name]
+                )
+            except serializers.ValidationError:
+                pass
+        return references
+
+    def resolve(self, items, errors):
+        '''Replace references by objects, adding errors of missing ones.'''
+
+    @staticmethod
+    def resolve_slugs(model, items, field, errors):
+        '''Replace slugs in field of every item by objects of the model.'''
+        slugs = set()
+        for item in items:
+            value = item.get(field, ())
+            slugs.update(value if isinstance(value, list) else [value])
+        objects = model.objects.in_bulk(slugs, field_name='slug')
+        for item, item_errors in zip(items, errors):
+            if field not in item:
+                continue
+            value = item[field]
+            values = value if isinstance(value, list) else [value]
+            missing = [
+                DOES_NOT_EXIST_MESSAGE.format(slug_name='slug', value=slug)
+                for slug in values if slug not in objects
+            ]
+            if missing:
+                item_errors[field] = missing
+            elif isinstance(value, list):
+                item[field] = [objects[slug] for slug in dict.fromkeys(value)]
+            else:
+                item[field] = objects[value]
+
+
+class TitleBulkListSerializer(BulkListSerializer):
+    reference_fields = ('genre', 'category')
+
+    def resolve(self, items, errors):
+        self.resolve_slugs(Genre, items, 'genre', errors)
+        self.resolve_slugs(Category, items, 'category', errors)
+
+    def create(self, validated_data):
+        '''Create the titles, their genre links and facet stats.
+
+        Only backends that return ids from a bulk insert (PostgreSQL)
+        insert the titles with a constant number of queries. Elsewhere,
+        e.g. on SQLite, every title is saved on its own with its signals,
+        so the queries grow with the number of titles.
+        '''
+        titles = [
+            Title(**{
+                field: value for field, value in item.items()
+                if field != 'genre'
+            })
+            for item in validated_data
+        ]
+        with transaction.atomic():
+            if connection.features.can_return_ids_from_bulk_insert:
+                Title.objects.bulk_create(titles)
+                # Signals count the titles of categories on save only.
+                categories = Counter(title.category_id for title in titles)
+                for category, count in categories.items():
+                    CategoryStats.objects.shift([category], titles=count)
+            else:
+                # The ids are needed for the genres below.
+                for title in titles:
+                    title.save()
+            links = TitleGenre.objects.bulk_create([
+                TitleGenre(title_id=title, genre_id=genre)
+                for title, item in zip(titles, validated_data)
+                for genre in item['genre']
+            ])
+            # New titles have no reviews yet.
+            genres = Counter(link.genre_id_id for link in links)
+            for genre, count in genres.items():
+                GenreStats.objects.shift([genre], titles=count)
+        data_imported.send(sender=self.__class__, models=[Title, TitleGenre])
+        return titles
+
+
+class TitleBulkSerializer(serializers.ModelSerializer):
+    '''Serializer for one title of a bulk create.'''
+    genre = serializers.ListField(child=serializers.SlugField())
+    category = serializers.SlugField()
+    year = serializers.IntegerField(
+        validators=[validate_year, ]
+    )
+
+    class Meta:
+        model = Title
+        fields = ('name', 'year', 'description', 'genre', 'category')
+        list_serializer_class = TitleBulkListSerializer
+
+
+class TitleGenresListSerializer(BulkListSerializer):
+    reference_fields = ('title', 'genre')
+
+    def resolve(self, items, errors):
+        ids = [item['title'] for item in items if 'title' in item]
+        titles = Title.objects.in_bulk(ids)
+        seen = set()
+        for item, item_errors in zip(items, errors):
+            if 'title' not in item:
+                continue
+            title_id = item['title']
+            if title_id not in titles:
+                item_errors['title'] = [DOES_NOT_EXIST_MESSAGE.format(
+                    slug_name='id', value=title_id
+                )]
+            elif title_id in seen:
+                item_errors['title'] = [DUPLICATE_TITLE_MESSAGE]
+            else:
+                item['title'] = titles[title_id]
+            seen.add(title_id)
+        self.resolve_slugs(Genre, items, 'genre', errors)
+
+    def create(self, validated_data):
+        '''Replace the genre links with a constant number of queries.'''
+        titles = [item['title'] for item in validated_data]
+        with transaction.atomic():
+            old = TitleGenre.objects.filter(title_id__in=titles)
+            genres = set(old.values_list('genre_id', flat=True))
+            # A single DELETE: the per-link receivers would shift the stats
+            # and touch the titles row by row, which the rebuild and touch()
+            # below do once. Nothing references the links.
+            old._raw_delete(old.db)
+            TitleGenre.objects.bulk_create([
+                TitleGenre(title_id=item['title'], genre_id=genre)
+                for item in validated_data
+                for genre in item['genre']
+            ])
+            GenreStats.objects.rebuild(genres | {
+                genre.pk for item in validated_data for genre in item['genre']
+            })
+            Title.objects.filter(pk__in=[title.pk for title in titles]).touch()
+        data_imported.send(sender=self.__class__, models=[TitleGenre])
+        return titles
+
+
+class TitleGenresSerializer(serializers.Serializer):
+    '''Serializer for the new genres of one title of a bulk update.'''
+    title = serializers.IntegerField()
+    genre = serializers.ListField(child=serializers.SlugField())
+
+    class Meta:
+        list_serializer_class = TitleGenresListSerializer
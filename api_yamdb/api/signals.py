@@ -0,0 +1,44 @@
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from reviews.models import Category, Genre, Review, Title, TitleGenre, User
+from reviews.signals import data_imported
+
+from .authentication import forget_user
+from .cache import invalidate
+
+# Cached namespaces that embed data of each model.
+CACHE_DEPENDENCIES = {
+    Title: ('titles',),
+    Genre: ('genres', 'titles'),
+    Category: ('categories', 'titles'),
+    TitleGenre: ('titles',),
+    Review: ('titles',),
+}
+
+
+@receiver(post_save)
+@receiver(post_delete)
+def invalidate_cached_responses(sender, **kwargs):
+    if sender in CACHE_DEPENDENCIES:
+        invalidate(*CACHE_DEPENDENCIES[sender])
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def forget_cached_user(sender, instance, **kwargs):
+    forget_user(instance.pk)
+
+
+@receiver(m2m_changed, sender=TitleGenre)
+def invalidate_cached_titles(sender, action, **kwargs):
+    if action.startswith('post_'):
+        invalidate(*CACHE_DEPENDENCIES[TitleGenre])
+
+
+@receiver(data_imported)
+def invalidate_imported(sender, models, **kwargs):
+    invalidate(*{
+        namespace
+        for model in models if model in CACHE_DEPENDENCIES
+        for namespace in CACHE_DEPENDENCIES[model]
+    })
@@ -1,9 +1,9 @@
 from django.urls import include, path
 from rest_framework.routers import DefaultRouter
 
-from .views import (CategoryViewSet, CommentViewSet, GenreViewSet,
-                    ReviewViewSet, SignupView, TitleViewSet, UserViewSet,
-                    token)
+from .views import (CacheStatsView, CategoryViewSet, CommentViewSet,
+                    ExportView, GenreViewSet, MetricsView, ReviewViewSet,
+                    SignupView, TitleViewSet, UserViewSet, token)
 
 app_name = 'api'
 
@@ -27,6 +27,9 @@ auth_url = [
 ]
 
 urlpatterns = [
+    path('v1/cache/stats/', CacheStatsView.as_view(), name='cache-stats'),
+    path('v1/metrics/', MetricsView.as_view(), name='metrics'),
+    path('v1/export/<str:table>/', ExportView.as_view(), name='export'),
     path('v1/', include(v1_router.urls)),
     path('v1/auth/', include(auth_url)),
 ]
@@ -1,66 +1,176 @@
-from django.contrib.auth.tokens import default_token_generator
-from django.core.mail import EmailMessage
-from django.db.models import Avg
+from functools import partial
+
+from django.conf import settings
+from django.db import IntegrityError
+from django.http import Http404, HttpResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
+from django.utils.functional import cached_property
 from django_filters.rest_framework import DjangoFilterBackend
 from rest_framework import (filters, mixins, permissions, serializers, status,
                             viewsets)
 from rest_framework.decorators import action, api_view, permission_classes
+from rest_framework.exceptions import NotFound, Throttled
 from rest_framework.pagination import LimitOffsetPagination
 from rest_framework.permissions import IsAuthenticatedOrReadOnly
 from rest_framework.response import Response
+from rest_framework.reverse import reverse
 from rest_framework.views import APIView
 from rest_framework_simplejwt.tokens import RefreshToken
-from reviews.models import Category, Genre, Review, Title, User
-
-from .filters import TitleFilter
+from reviews.export import CONTENT_TYPES, export_lines, get_file_name
+from reviews.ingestion import UNIQUE_REVIEW_MESSAGE, queue_review
+from reviews.management.commands.import_csv import TABLES_BY_NAME
+from reviews.models import (Category, Genre, PendingReview, Review,
+                            ScoreHistogram, Title, User)
+from reviews.outbox import queue_email
+
+from .cache import CachedResponseMixin, get_stats, get_version
+from .conditional import ConditionalResponseMixin
+from .confirmation import check_code, limiter, make_code, parse_code
+from .fieldsets import SparseFieldsetViewMixin
+from .filters import RankedSearchFilter, TitleFilter
+from .metrics import CONTENT_TYPE, registry
+from .pagination import CommentPagination, ReviewPagination, TitlePagination
 from .permissions import (IsAdminOrReadOnly, IsAuthorOrReadOnly,
                           IsSuperUserOrAdmin)
-from .serializers import (CategorySerializer, CommentSerializer,
-                          GenreSerializer, ReviewSerializer, SignUpSerializer,
-                          TitleSerializerReadOnly, TitleSerializerWritable,
-                          TokenSerializer, UserSerializer)
-
-UNIQUE_REVIEW_MESSAGE = 'Вы уже оставляли ревью к этому произведению!'
-
-
-class ReviewViewSet(viewsets.ModelViewSet):
+from .representation import CompiledReadMixin
+from .serializers import (CategorySerializer, CategoryStatsSerializer,
+                          CommentSerializer, ExportSerializer,
+                          FacetsSerializer, GenreSerializer,
+                          GenreStatsSerializer, PendingReviewSerializer,
+                          ReviewSerializer, ScoreHistogramSerializer,
+                          SignUpSerializer, TitleBulkSerializer,
+                          TitleGenresSerializer, TitleSerializerReadOnly,
+                          TitleSerializerWritable, TitleTopSerializer,
+                          TokenSerializer, TopTitlesSerializer, UserSerializer)
+
+
+class ReviewViewSet(ConditionalResponseMixin, SparseFieldsetViewMixin,
+                    CompiledReadMixin, viewsets.ModelViewSet):
     '''CRUD for Review model.'''
     permission_classes = (IsAuthenticatedOrReadOnly, IsAuthorOrReadOnly)
-    filter_backends = (filters.SearchFilter,)
-    search_fields = ('text', )
-    pagination_class = LimitOffsetPagination
+    filter_backends = (RankedSearchFilter,)
+    pagination_class = ReviewPagination
     serializer_class = ReviewSerializer
+    select_related_fields = ('author',)
 
     def get_title(self):
-        return get_object_or_404(Title, id=self.kwargs.get('title_id'))
+        if not hasattr(self, '_title'):
+            self._title = get_object_or_404(
+                Title, id=self.kwargs.get('title_id')
+            )
+        return self._title
+
+    def check_title(self):
+        '''Make sure the title exists without loading it.'''
+        title_id = self.kwargs.get('title_id')
+        if not Title.objects.filter(id=title_id).exists():
+            raise Http404
+        return int(title_id)
 
     def get_queryset(self):
-        return self.get_title().reviews.all()
+        return self.select_fieldset(self.get_title().reviews.all())
 
-    def perform_create(self, serializer):
+    def get_conditional_state(self, request):
         title = self.get_title()
-        if title.reviews.filter(author=self.request.user).exists():
+        return title.version, title.modified
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(
+            super().list, request, *args, **kwargs
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(
+            super().retrieve, request, *args, **kwargs
+        )
+
+    def create(self, request, *args, **kwargs):
+        if not settings.REVIEW_INGESTION['WRITE_BEHIND']:
+            return super().create(request, *args, **kwargs)
+        serializer = self.get_serializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        pending = queue_review(
+            title_id=self.check_title(),
+            author_id=request.user.id,
+            text=serializer.validated_data['text'],
+            score=serializer.validated_data['score']
+        )
+        return Response(
+            PendingReviewSerializer(pending).data,
+            status=status.HTTP_202_ACCEPTED,
+            headers={'Location': reverse(
+                'api:reviews-pending',
+                kwargs={'title_id': pending.title_id, 'pk': pending.id},
+                request=request
+            )}
+        )
+
+    @action(
+        detail=False, url_path=r'pending/(?P<pk>[\d]+)',
+        permission_classes=(permissions.IsAuthenticated,)
+    )
+    def pending(self, request, title_id=None, pk=None):
+        '''State of a review of the user queued for ingestion.'''
+        pending = get_object_or_404(
+            PendingReview, pk=pk, title_id=title_id, author=request.user
+        )
+        return Response(PendingReviewSerializer(pending).data)
+
+    def perform_create(self, serializer):
+        title_id = self.check_title()
+        try:
+            # The unique constraint catches the duplicates, concurrent
+            # ones included; Review.save runs in a savepoint.
+            serializer.save(author=self.request.user, title_id=title_id)
+        except IntegrityError:
             raise serializers.ValidationError(UNIQUE_REVIEW_MESSAGE)
-        serializer.save(author=self.request.user, title=title)
 
 
-class CommentViewSet(viewsets.ModelViewSet):
+class CommentViewSet(ConditionalResponseMixin, SparseFieldsetViewMixin,
+                     CompiledReadMixin, viewsets.ModelViewSet):
     '''CRUD for Comment model.'''
     permission_classes = (IsAuthenticatedOrReadOnly, IsAuthorOrReadOnly)
     serializer_class = CommentSerializer
     filter_backends = (filters.SearchFilter, )
     search_fields = ('text', )
+    pagination_class = CommentPagination
+    select_related_fields = ('author',)
 
     def get_review(self):
-        return get_object_or_404(Review, id=self.kwargs.get('review_id'))
+        if not hasattr(self, '_review'):
+            self._review = get_object_or_404(
+                Review.objects.select_related('title'),
+                id=self.kwargs.get('review_id')
+            )
+        return self._review
+
+    def check_review(self):
+        '''Make sure the review exists without loading it.'''
+        review_id = self.kwargs.get('review_id')
+        if not Review.objects.filter(id=review_id).exists():
+            raise Http404
+        return int(review_id)
 
     def get_queryset(self):
-        return self.get_review().comments.all()
+        return self.select_fieldset(self.get_review().comments.all())
+
+    def get_conditional_state(self, request):
+        title = self.get_review().title
+        return title.version, title.modified
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(
+            super().list, request, *args, **kwargs
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(
+            super().retrieve, request, *args, **kwargs
+        )
 
     def perform_create(self, serializer):
         serializer.save(
-            review=self.get_review(),
+            review_id=self.check_review(),
             author=self.request.user
         )
 
@@ -81,13 +191,16 @@ class UserViewSet(viewsets.ModelViewSet):
         permission_classes=(permissions.IsAuthenticated,)
     )
     def me(self, request):
-        user = get_object_or_404(User, username=request.user.username)
         if request.method == 'GET':
+            # Already loaded by the authentication, no need to query it.
             return Response(
-                UserSerializer(user).data,
+                UserSerializer(request.user).data,
                 status=status.HTTP_200_OK
             )
 
+        # The authenticated user may come from the cache, saving it could
+        # write back a role or status changed since.
+        user = User.objects.get(pk=request.user.pk)
         serializer = UserSerializer(
             instance=user,
             data=request.data,
@@ -106,12 +219,22 @@ def token(request):
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
     username = serializer.data['username']
-    user = get_object_or_404(User, username=username)
     confirmation_code = serializer.data['confirmation_code']
 
-    if not default_token_generator.check_token(user, confirmation_code):
+    # Malformed and expired codes are rejected before the user is loaded.
+    retry_after = limiter.retry_after(username)
+    if retry_after is not None:
+        raise Throttled(wait=retry_after)
+    parsed = parse_code(confirmation_code)
+    if parsed is None:
+        limiter.fail(username)
         return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
 
+    user = get_object_or_404(User, username=username)
+    if not check_code(user, parsed):
+        limiter.fail(username)
+        return Response(serializer.errors, status=status.HTTP_400_BAD_REQUEST)
+    limiter.reset(username)
     token = RefreshToken.for_user(user)
     return Response(
         {'token': str(token.access_token)}, status=status.HTTP_200_OK
@@ -123,12 +246,12 @@ class SignupView(APIView):
 
     @staticmethod
     def send_email(data):
-        email = EmailMessage(
+        # Sent by the send_emails worker, not within the request.
+        queue_email(
             subject=data['email_subject'],
             body=data['email_body'],
-            to=[data['to_email']]
+            to=data['to_email']
         )
-        email.send()
 
     def post(self, request):
         serializer = SignUpSerializer(data=request.data)
@@ -136,7 +259,7 @@ class SignupView(APIView):
         email = serializer.validated_data['email']
         username = serializer.validated_data['username']
         user, foo = User.objects.get_or_create(username=username, email=email)
-        confirmation_code = default_token_generator.make_token(user)
+        confirmation_code = make_code(user)
         email_body = (
             f'Здравствуйте, {username}.'
             f'\nКод подтверждения Yamdb: {confirmation_code}'
@@ -150,7 +273,8 @@ class SignupView(APIView):
         return Response(serializer.data, status=status.HTTP_200_OK)
 
 
-class CommonViewSet(viewsets.GenericViewSet,
+class CommonViewSet(CachedResponseMixin,
+                    viewsets.GenericViewSet,
                     mixins.ListModelMixin,
                     mixins.DestroyModelMixin,
                     mixins.CreateModelMixin):
@@ -160,27 +284,198 @@ class CommonViewSet(viewsets.GenericViewSet,
     search_fields = ('name', )
     lookup_field = 'slug'
 
+    @cached_property
+    def with_stats(self):
+        if self.action != 'list':
+            return False
+        params = FacetsSerializer(data=self.request.query_params)
+        params.is_valid(raise_exception=True)
+        return params.validated_data['with_stats']
+
+    def get_queryset(self):
+        if self.with_stats:
+            return super().get_queryset().select_related('stats')
+        return super().get_queryset()
+
+    def get_serializer_class(self):
+        if self.with_stats:
+            return self.stats_serializer_class
+        return super().get_serializer_class()
+
+    def list(self, request, *args, **kwargs):
+        if self.with_stats:
+            # The stats change with every review, they are read from one
+            # row per facet instead of being cached.
+            return super().list(request, *args, **kwargs)
+        return self.cached_response(super().list, request, *args, **kwargs)
+
 
 class CategoryViewSet(CommonViewSet):
     '''CRUD for Category model.'''
     queryset = Category.objects.all()
     serializer_class = CategorySerializer
+    stats_serializer_class = CategoryStatsSerializer
 
 
 class GenreViewSet(CommonViewSet):
     '''CRUD for Genre model.'''
     queryset = Genre.objects.all()
     serializer_class = GenreSerializer
+    stats_serializer_class = GenreStatsSerializer
 
 
-class TitleViewSet(viewsets.ModelViewSet):
+class TitleViewSet(CachedResponseMixin, ConditionalResponseMixin,
+                   SparseFieldsetViewMixin, CompiledReadMixin,
+                   viewsets.ModelViewSet):
     '''CRUD for Title model.'''
-    queryset = Title.objects.annotate(rating=Avg('reviews__score'))
+    queryset = Title.objects.all()
     permission_classes = [IsAdminOrReadOnly]
-    filter_backends = (DjangoFilterBackend,)
+    filter_backends = (DjangoFilterBackend, RankedSearchFilter)
     filterset_class = TitleFilter
+    pagination_class = TitlePagination
+    select_related_fields = ('category',)
+    prefetch_related_fields = ('genre',)
+
+    def get_queryset(self):
+        return self.select_fieldset(super().get_queryset())
 
     def get_serializer_class(self):
         if self.action in ('list', 'retrieve'):
             return TitleSerializerReadOnly
+        if self.action == 'bulk':
+            return TitleBulkSerializer
+        if self.action == 'bulk_genres':
+            return TitleGenresSerializer
+        if self.action == 'stats':
+            return ScoreHistogramSerializer
+        if self.action == 'top':
+            return TitleTopSerializer
         return TitleSerializerWritable
+
+    def get_top(self, request):
+        options = settings.RANKING
+        params = TopTitlesSerializer(data=request.query_params)
+        params.is_valid(raise_exception=True)
+        titles = self.get_queryset().filter(
+            weighted_rating__isnull=False,
+            rating_count__gte=params.validated_data.get(
+                'min_reviews', options['MIN_REVIEWS']
+            )
+        )
+        if 'category' in params.validated_data:
+            titles = titles.filter(
+                category__slug=params.validated_data['category']
+            )
+        if 'genre' in params.validated_data:
+            titles = titles.filter(genre__slug=params.validated_data['genre'])
+        titles = titles.order_by('-weighted_rating', 'id')[
+            :params.validated_data.get('limit', options['DEFAULT_LIMIT'])
+        ]
+        return Response(self.get_serializer(titles, many=True).data)
+
+    @action(detail=False)
+    def top(self, request):
+        '''Titles with the best weighted rating.'''
+        return self.cached_response(self.get_top, request)
+
+    @action(detail=True)
+    def stats(self, request, pk=None):
+        '''Score distribution of the title, read with a single query.'''
+        try:
+            title = Title.objects.select_related('score_histogram').get(
+                pk=pk
+            )
+        except (Title.DoesNotExist, ValueError):
+            raise Http404
+        try:
+            histogram = title.score_histogram
+        except ScoreHistogram.DoesNotExist:
+            histogram = ScoreHistogram(title=title)
+        return Response(self.get_serializer(histogram).data)
+
+    def get_bulk_response(self, serializer, status_code):
+        serializer.is_valid(raise_exception=True)
+        ids = [title.pk for title in serializer.save()]
+        titles = self.get_queryset().in_bulk(ids)
+        return Response(
+            TitleSerializerReadOnly(
+                [titles[pk] for pk in ids], many=True
+            ).data,
+            status=status_code
+        )
+
+    @action(detail=False, methods=['post'])
+    def bulk(self, request):
+        '''Create a list of titles in one transaction.'''
+        return self.get_bulk_response(
+            self.get_serializer(data=request.data, many=True),
+            status.HTTP_201_CREATED
+        )
+
+    @action(detail=False, methods=['post'], url_path='bulk/genres')
+    def bulk_genres(self, request):
+        '''Replace the genres of a list of titles in one transaction.'''
+        return self.get_bulk_response(
+            self.get_serializer(data=request.data, many=True),
+            status.HTTP_200_OK
+        )
+
+    def get_conditional_state(self, request):
+        if self.detail:
+            try:
+                return Title.objects.filter(
+                    pk=self.kwargs[self.lookup_field]
+                ).values_list('version', 'modified').first()
+            except (TypeError, ValueError):
+                return None
+        # Every write that changes a list bumps the version of the cache
+        # namespace, so the list needs no query of its own.
+        return get_version(self.basename), None
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(
+            partial(self.conditional_response, super().list),
+            request, *args, **kwargs
+        )
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(
+            partial(self.conditional_response, super().retrieve),
+            request, *args, **kwargs
+        )
+
+
+class CacheStatsView(APIView):
+    '''Hit and miss counters of the response cache.'''
+    permission_classes = (IsSuperUserOrAdmin,)
+
+    def get(self, request):
+        return Response(get_stats(), status=status.HTTP_200_OK)
+
+
+class ExportView(APIView):
+    '''Streams a whole table as CSV or NDJSON.'''
+    permission_classes = (IsSuperUserOrAdmin,)
+
+    def get(self, request, table):
+        if table not in TABLES_BY_NAME:
+            raise NotFound()
+        serializer = ExportSerializer(data=request.query_params)
+        serializer.is_valid(raise_exception=True)
+        output = serializer.validated_data['output']
+        response = StreamingHttpResponse(
+            export_lines(table, output, serializer.validated_data['after']),
+            content_type=CONTENT_TYPES[output]
+        )
+        response['Content-Disposition'] = (
+            f'attachment; filename="{get_file_name(table, output)}"'
+        )
+        return response
+
+
+class MetricsView(APIView):
+    '''Request metrics of this process in the Prometheus text format.'''
+    permission_classes = (IsSuperUserOrAdmin,)
+
+    def get(self, request):
+        return HttpResponse(registry.render(), content_type=CONTENT_TYPE)
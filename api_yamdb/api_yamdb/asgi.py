@@ -3,14 +3,111 @@ ASGI config for YaMDb project.
 
 It exposes the ASGI callable as a module-level variable named ``application``.
 
-For more information on this file, see
-https://docs.djangoproject.com/en/3.0/howto/deployment/asgi/
+Django 2.2 has no ASGI handler of its own, so requests are passed to the
+WSGI application in bounded thread pools while the event loop of the
+uvicorn worker keeps the connections. GET requests to the catalog get
+their own pool (ASGI_POOLS), so that slow writes never hold them up.
+Every thread keeps at most one database connection.
 """
 
+import asyncio
 import os
+from concurrent.futures import ThreadPoolExecutor
 
-from django.core.asgi import get_asgi_application
+from asgiref.wsgi import WsgiToAsgiInstance
+from django.core.wsgi import get_wsgi_application
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'api_yamdb.settings')
 
+READ_METHODS = ('GET', 'HEAD', 'OPTIONS')
+
+
+class PooledWsgiInstance(WsgiToAsgiInstance):
+    '''Run the WSGI application of one request in the given executor.'''
+
+    def __init__(self, wsgi_application, executor):
+        super().__init__(wsgi_application)
+        self.executor = executor
+
+    async def run_wsgi_app(self, body):
+        await asyncio.get_running_loop().run_in_executor(
+            self.executor, self.respond, body
+        )
+
+    def respond(self, body):
+        environ = self.build_environ(self.scope, body)
+        output = self.wsgi_application(environ, self.start_response)
+        try:
+            for chunk in output:
+                if not self.response_started:
+                    self.response_started = True
+                    self.sync_send(self.response_start)
+                self.sync_send({
+                    'type': 'http.response.body',
+                    'body': chunk,
+                    'more_body': True,
+                })
+        finally:
+            # Fires request_finished, which closes old DB connections.
+            if hasattr(output, 'close'):
+                output.close()
+        if not self.response_started:
+            self.response_started = True
+            self.sync_send(self.response_start)
+        self.sync_send({'type': 'http.response.body'})
+
+
+class ThreadPoolHandler:
+    '''ASGI application that runs Django in read and write thread pools.'''
+
+    def __init__(self, wsgi_application, read_threads, write_threads,
+                 read_paths):
+        self.wsgi_application = wsgi_application
+        self.read_paths = tuple(read_paths)
+        self.read_executor = ThreadPoolExecutor(
+            read_threads, thread_name_prefix='asgi-read'
+        )
+        self.write_executor = ThreadPoolExecutor(
+            write_threads, thread_name_prefix='asgi-write'
+        )
+
+    def get_executor(self, scope):
+        if scope['method'] in READ_METHODS and (
+            scope['path'].startswith(self.read_paths)
+        ):
+            return self.read_executor
+        return self.write_executor
+
+    async def lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                self.read_executor.shutdown()
+                self.write_executor.shutdown()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'lifespan':
+            return await self.lifespan(receive, send)
+        instance = PooledWsgiInstance(
+            self.wsgi_application, self.get_executor(scope)
+        )
+        await instance(scope, receive, send)
+
+
+def get_asgi_application():
+    from django.conf import settings
+
+    wsgi_application = get_wsgi_application()
+    return ThreadPoolHandler(
+        wsgi_application,
+        settings.ASGI_POOLS['READ_THREADS'],
+        settings.ASGI_POOLS['WRITE_THREADS'],
+        settings.ASGI_POOLS['READ_PATHS'],
+    )
+
+
 application = get_asgi_application()
@@ -24,6 +24,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'api.metrics.MetricsMiddleware',
+    'api.compression.CompressionMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
@@ -60,7 +62,12 @@ REST_FRAMEWORK = {
     'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.PageNumberPagination',
     'PAGE_SIZE': 5,
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        'api.authentication.CachedJWTAuthentication',
+    ),
+    'DEFAULT_RENDERER_CLASSES': (
+        'api.renderers.FastJSONRenderer',
+        'api.renderers.MessagePackRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
     ),
     'DEFAULT_FILTER_BACKENDS': [
         'django_filters.rest_framework.DjangoFilterBackend',
@@ -86,6 +93,19 @@ if DEBUG:
         }
     }
 
+# Cached responses, versions and users have to be shared by every
+# process: docker-compose points CACHE_BACKEND at memcached. The local
+# memory default is only coherent with a single process.
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv(
+            'CACHE_BACKEND',
+            default='django.core.cache.backends.locmem.LocMemCache'
+        ),
+        'LOCATION': os.getenv('CACHE_LOCATION', default='yamdb'),
+    }
+}
+
 AUTH_PASSWORD_VALIDATORS = [
     {
         'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
@@ -143,3 +163,106 @@ NAME_MAX_LENGTH = 256
 SLUG_MAX_LENGTH = 50
 CHARFIELD_MAX_LENGTH = 500
 EMAIL_MAX_LENGTH = 254
+# Items accepted by one request to a bulk endpoint.
+BULK_MAX_ITEMS = 1000
+
+# Response cache of read-only endpoints, TTLs in seconds by url name.
+# Entries are invalidated as soon as the data behind them changes.
+API_CACHE_ALIAS = 'default'
+API_CACHE_TTL = {
+    'titles-list': 60,
+    'titles-detail': 60,
+    'genres-list': 300,
+    'categories-list': 300,
+    'titles-top': 60,
+}
+# Seconds an authenticated user is kept in the same cache.
+AUTH_USER_CACHE_TTL = 60
+# Cache users in a process-local cache too; only coherent when a single
+# process serves the API.
+AUTH_USER_CACHE_LOCAL = False
+
+# Confirmation emails are queued in the database and sent by
+# `python manage.py send_emails`. Delays are in seconds, a failed email
+# is retried after RETRY_DELAY, doubled on every further failure.
+EMAIL_OUTBOX = {
+    'BATCH_SIZE': 50,
+    'MAX_ATTEMPTS': 6,
+    'RETRY_DELAY': 30,
+    'MAX_RETRY_DELAY': 3600,
+    'POLL_INTERVAL': 5,
+}
+
+# Signed confirmation codes, TTL and FAILURE_WINDOW in seconds. After
+# MAX_FAILURES wrong codes for a username within FAILURE_WINDOW, further
+# attempts are rejected until the window ends.
+CONFIRMATION_CODE = {
+    'TTL': 24 * 60 * 60,
+    'MAX_FAILURES': 5,
+    'FAILURE_WINDOW': 5 * 60,
+}
+
+# Bayesian ranking of /titles/top/: every title counts as if it had
+# PRIOR_WEIGHT more reviews with the mean score of all reviews. The mean
+# is cached for PRIOR_MEAN_TTL seconds, `python manage.py rank_titles`
+# recalculates it along with the weighted rating of every title.
+RANKING = {
+    'PRIOR_WEIGHT': 10,
+    'DEFAULT_PRIOR_MEAN': 5.5,
+    'PRIOR_MEAN_TTL': 60 * 60,
+    'MIN_REVIEWS': 1,
+    'DEFAULT_LIMIT': 10,
+    'MAX_LIMIT': 100,
+}
+
+# Per-view request metrics, served to admins at /api/v1/metrics/.
+# Requests slower than SLOW_REQUEST seconds are logged by api.metrics
+# with their SLOW_QUERIES slowest SQL statements.
+METRICS = {
+    'ENABLED': True,
+    'SLOW_REQUEST': 1,
+    'SLOW_QUERIES': 5,
+}
+
+# Responses of at least MIN_SIZE bytes are compressed with brotli or
+# gzip, whichever the client accepts, brotli first.
+COMPRESSION = {
+    'MIN_SIZE': 1024,
+    'BROTLI_QUALITY': 4,
+    'GZIP_LEVEL': 6,
+    'STREAM_FLUSH_SIZE': 64 * 1024,
+}
+
+# Database connections the web workers may hold together. PostgreSQL
+# allows 100 by default, the rest is left to the mailer, the ingester
+# and manage.py.
+DB_CONNECTIONS = int(os.getenv('DB_CONNECTIONS', default=90))
+
+# Thread pools of the ASGI mode (api_yamdb.asgi under uvicorn workers,
+# SERVER_MODE=asgi). GET requests under READ_PATHS run in their own pool.
+# Every thread may hold a connection, so by default the pools of all
+# workers share DB_CONNECTIONS, at most 16 + 4 threads a worker.
+ASGI_THREADS = max(
+    2, DB_CONNECTIONS // int(os.getenv('GUNICORN_WORKERS', default=1))
+)
+ASGI_POOLS = {
+    'READ_THREADS': int(os.getenv('ASGI_READ_THREADS', default=min(
+        16, ASGI_THREADS - max(1, ASGI_THREADS // 5)
+    ))),
+    'WRITE_THREADS': int(os.getenv('ASGI_WRITE_THREADS', default=min(
+        4, max(1, ASGI_THREADS // 5)
+    ))),
+    'READ_PATHS': (
+        '/api/v1/titles/', '/api/v1/genres/', '/api/v1/categories/'
+    ),
+}
+
+# Write-behind review ingestion. With WRITE_BEHIND, POST to reviews
+# answers 202 with the id of a queued review that can be polled, and
+# `python manage.py ingest_reviews` writes queued reviews in batches of
+# BATCH_SIZE, waiting POLL_INTERVAL seconds when there are none.
+REVIEW_INGESTION = {
+    'WRITE_BEHIND': os.getenv('REVIEW_WRITE_BEHIND', default='') == '1',
+    'BATCH_SIZE': 500,
+    'POLL_INTERVAL': 1,
+}
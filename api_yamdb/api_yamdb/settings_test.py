@@ -0,0 +1,21 @@
+from .settings import *  # noqa: F401,F403
+
+# Tests run against in-memory SQLite, so they don't need the PostgreSQL
+# container the project is deployed with.
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': ':memory:',
+    }
+}
+
+EMAIL_BACKEND = 'django.core.mail.backends.locmem.EmailBackend'
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+
+# Tests run in a single process, the local cache is coherent there.
+AUTH_USER_CACHE_LOCAL = True
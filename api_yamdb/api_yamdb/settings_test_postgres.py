@@ -0,0 +1,17 @@
+import os
+
+from .settings_test import *  # noqa: F401,F403
+
+# Tests of concurrent writes need row locks, SQLite locks the whole
+# database: CI runs the suite against a PostgreSQL service as well,
+# with pytest --ds=api_yamdb.settings_test_postgres.
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.postgresql',
+        'NAME': os.getenv('DB_NAME', default='postgres'),
+        'USER': os.getenv('POSTGRES_USER', default='postgres'),
+        'PASSWORD': os.getenv('POSTGRES_PASSWORD', default='postgres'),
+        'HOST': os.getenv('DB_HOST', default='localhost'),
+        'PORT': os.getenv('DB_PORT', default=5432),
+    }
+}
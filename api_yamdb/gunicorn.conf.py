@@ -0,0 +1,22 @@
+# Read by gunicorn from the working directory. SERVER_MODE=asgi serves
+# api_yamdb.asgi with uvicorn workers, the default is sync WSGI workers.
+import multiprocessing
+import os
+
+asgi = os.getenv('SERVER_MODE') == 'asgi'
+
+bind = '0:8000'
+# The response and user caches are only coherent between workers when
+# they share CACHE_BACKEND (memcached in docker-compose); with the local
+# memory default a single worker is started. A sync worker holds one
+# database connection, an ASGI one at least two (see ASGI_POOLS), and
+# together they stay within DB_CONNECTIONS.
+shared_cache = 'locmem' not in os.getenv('CACHE_BACKEND', default='locmem')
+workers = int(os.getenv('GUNICORN_WORKERS', default=min(
+    multiprocessing.cpu_count() * 2 + 1 if shared_cache else 1,
+    int(os.getenv('DB_CONNECTIONS', default=90)) // (2 if asgi else 1),
+)))
+# The thread pools of ASGI workers are sized from the number of workers.
+raw_env = [f'GUNICORN_WORKERS={workers}']
+if asgi:
+    worker_class = 'uvicorn.workers.UvicornWorker'
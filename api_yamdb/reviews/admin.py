@@ -1,7 +1,26 @@
 from django.contrib import admin
 from django.contrib.auth.admin import UserAdmin
 
-from .models import Category, Comment, Genre, Review, Title, User
+from .models import (Category, Comment, Genre, OutgoingEmail, PendingReview,
+                     Review, Title, User)
+
+
+class TitleAdmin(admin.ModelAdmin):
+    list_display = (
+        'pk',
+        'name',
+        'year',
+        'category',
+        'rating',
+        'rating_count'
+    )
+    search_fields = ('name',)
+    list_filter = ('year', 'category')
+    readonly_fields = (
+        'rating', 'rating_sum', 'rating_count', 'weighted_rating', 'version',
+        'modified'
+    )
+    empty_value_display = '-пусто-'
 
 
 class ReviewAdmin(admin.ModelAdmin):
@@ -30,9 +49,41 @@ class CommentAdmin(admin.ModelAdmin):
     list_filter = ('pub_date', )
 
 
-admin.site.register(Title)
+class OutgoingEmailAdmin(admin.ModelAdmin):
+    list_display = (
+        'pk',
+        'to',
+        'subject',
+        'status',
+        'attempts',
+        'next_attempt',
+        'sent'
+    )
+    search_fields = ('to',)
+    list_filter = ('status',)
+    readonly_fields = ('created', 'sent', 'last_error')
+    empty_value_display = '-пусто-'
+
+
+class PendingReviewAdmin(admin.ModelAdmin):
+    list_display = (
+        'pk',
+        'title',
+        'author',
+        'score',
+        'status',
+        'created'
+    )
+    list_filter = ('status',)
+    readonly_fields = ('created', 'review', 'error')
+    empty_value_display = '-пусто-'
+
+
+admin.site.register(Title, TitleAdmin)
 admin.site.register(Genre)
 admin.site.register(Category)
 admin.site.register(Review, ReviewAdmin)
 admin.site.register(Comment, CommentAdmin)
 admin.site.register(User, UserAdmin)
+admin.site.register(OutgoingEmail, OutgoingEmailAdmin)
+admin.site.register(PendingReview, PendingReviewAdmin)
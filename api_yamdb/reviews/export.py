@@ -0,0 +1,64 @@
+'''Streaming export of the tables loaded by import_csv.
+
+Rows are read in id order with .iterator(), which uses a server-side
+cursor on PostgreSQL, and formatted one by one, so memory use does not
+grow with the size of a table. An export can be resumed from the last
+id it wrote with `after`. CSV files have the columns import_csv reads.
+'''
+import csv
+from datetime import date
+
+from django.core.serializers.json import DjangoJSONEncoder
+from reviews.management.commands.import_csv import TABLES_BY_NAME
+
+CSV = 'csv'
+NDJSON = 'ndjson'
+FORMATS = (CSV, NDJSON)
+CONTENT_TYPES = {
+    CSV: 'text/csv; charset=utf-8',
+    NDJSON: 'application/x-ndjson; charset=utf-8',
+}
+DEFAULT_CHUNK_SIZE = 2000
+
+
+class Echo:
+    '''File-like object that hands back what is written to it.'''
+
+    def write(self, value):
+        return value
+
+
+def get_file_name(table_name, output):
+    if output == CSV:
+        return TABLES_BY_NAME[table_name].file_name
+    return f'{table_name}.{output}'
+
+
+def read_rows(table_name, after=0, chunk_size=DEFAULT_CHUNK_SIZE):
+    '''Yield tuples of the CSV columns of rows with an id above after.'''
+    table = TABLES_BY_NAME[table_name]
+    rows = table.model.objects.filter(pk__gt=after).order_by('pk')
+    return rows.values_list(*table.columns).iterator(chunk_size=chunk_size)
+
+
+def csv_value(value):
+    if value is None:
+        return ''
+    if isinstance(value, date):
+        return value.isoformat()
+    return value
+
+
+def export_lines(table_name, output, after=0, chunk_size=DEFAULT_CHUNK_SIZE):
+    '''Yield the export of a table line by line, header first for CSV.'''
+    columns = list(TABLES_BY_NAME[table_name].columns.values())
+    rows = read_rows(table_name, after, chunk_size)
+    if output == CSV:
+        writer = csv.writer(Echo())
+        yield writer.writerow(columns)
+        for row in rows:
+            yield writer.writerow([csv_value(value) for value in row])
+        return
+    encoder = DjangoJSONEncoder(ensure_ascii=False)
+    for row in rows:
+        yield encoder.encode(dict(zip(columns, row))) + '\n'
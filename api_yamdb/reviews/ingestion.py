@@ -0,0 +1,133 @@
+'''Write-behind ingestion of reviews, used when the API answers 202.
+
+The API only validates a review and queues it as a PendingReview. The
+ingest_reviews worker claims pending reviews in batches, with SELECT ...
+FOR UPDATE SKIP LOCKED where the database supports it, and writes each
+batch in one transaction: one query for the reviews that already
+exist, one bulk INSERT, then one rating and facet stats update per
+title and one histogram update per title and score. Duplicates are
+rejected with the message the synchronous API returns.
+'''
+from collections import Counter
+
+from django.conf import settings
+from django.db import IntegrityError, connection, transaction
+
+from .models import (IngestionStatus, PendingReview, Review, ScoreHistogram,
+                     Title)
+from .signals import data_imported, shift_facets
+
+UNIQUE_REVIEW_MESSAGE = 'Вы уже оставляли ревью к этому произведению!'
+
+
+def queue_review(title_id, author_id, text, score):
+    return PendingReview.objects.create(
+        title_id=title_id, author_id=author_id, text=text, score=score
+    )
+
+
+def reject(pending, error):
+    pending.status = IngestionStatus.rejected.value
+    pending.error = error
+
+
+def insert_reviews(candidates):
+    '''Insert the reviews of the pending ones in a single statement.
+
+    Should a review have been created by the synchronous API since the
+    existing ones were read, the batch is inserted row by row instead,
+    rejecting the conflicting rows.
+    '''
+    try:
+        with transaction.atomic():
+            Review.objects.bulk_create([
+                review for pending, review in candidates
+            ])
+        return candidates
+    except IntegrityError:
+        pass
+    inserted = []
+    for pending, review in candidates:
+        try:
+            with transaction.atomic():
+                # Without signals, the ratings are updated per batch.
+                Review.objects.bulk_create([review])
+        except IntegrityError:
+            reject(pending, UNIQUE_REVIEW_MESSAGE)
+        else:
+            inserted.append((pending, review))
+    return inserted
+
+
+def update_ratings(reviews):
+    '''Apply the new reviews to the ratings, histograms and facet stats.'''
+    ratings = {}
+    buckets = Counter()
+    for review in reviews:
+        score, count = ratings.get(review.title_id, (0, 0))
+        ratings[review.title_id] = (score + review.score, count + 1)
+        buckets[review.title_id, review.score] += 1
+    for title_id, (score, count) in ratings.items():
+        Title.objects.filter(pk=title_id).shift_rating(score, count)
+        shift_facets(title_id, score, count)
+    for (title_id, score), count in buckets.items():
+        ScoreHistogram.objects.shift(title_id, score, count)
+
+
+def accept(batch):
+    '''Write the reviews of a batch, setting the status of each.'''
+    existing = set(Review.objects.filter(
+        title__in={pending.title_id for pending in batch},
+        author__in={pending.author_id for pending in batch},
+    ).values_list('title_id', 'author_id'))
+    candidates = []
+    for pending in batch:
+        key = (pending.title_id, pending.author_id)
+        if key in existing:
+            reject(pending, UNIQUE_REVIEW_MESSAGE)
+            continue
+        existing.add(key)
+        candidates.append((pending, Review(
+            title_id=pending.title_id, author_id=pending.author_id,
+            text=pending.text, score=pending.score
+        )))
+    inserted = insert_reviews(candidates)
+    if not inserted:
+        return
+    if not connection.features.can_return_ids_from_bulk_insert:
+        # Reviews are unique by title and author.
+        rows = Review.objects.filter(
+            title__in={pending.title_id for pending, _ in inserted},
+            author__in={pending.author_id for pending, _ in inserted},
+        ).values_list('title_id', 'author_id', 'pk')
+        ids = {(title_id, author_id): pk for title_id, author_id, pk in rows}
+        for pending, review in inserted:
+            review.pk = ids[pending.title_id, pending.author_id]
+    for pending, review in inserted:
+        pending.status = IngestionStatus.accepted.value
+        pending.review = review
+    update_ratings([review for _, review in inserted])
+
+
+def ingest_batch(batch_size=None):
+    '''Write one batch of pending reviews.
+
+    Returns a Counter of the statuses the reviews of the batch ended up
+    in, empty when nothing was pending.
+    '''
+    batch_size = batch_size or settings.REVIEW_INGESTION['BATCH_SIZE']
+    pending = PendingReview.objects.filter(
+        status=IngestionStatus.pending.value
+    )
+    if connection.features.has_select_for_update_skip_locked:
+        pending = pending.select_for_update(skip_locked=True)
+    with transaction.atomic():
+        batch = list(pending[:batch_size])
+        if not batch:
+            return Counter()
+        accept(batch)
+        PendingReview.objects.bulk_update(
+            batch, ['status', 'review', 'error']
+        )
+    data_imported.send(sender=PendingReview, models=[Review])
+    return Counter(pending.status for pending in batch)
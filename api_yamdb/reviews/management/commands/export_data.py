@@ -0,0 +1,68 @@
+import os
+
+from django.core.management import BaseCommand, CommandError
+from reviews.export import (CSV, DEFAULT_CHUNK_SIZE, FORMATS, export_lines,
+                            get_file_name)
+from reviews.management.commands.import_csv import TABLE_NAMES
+
+
+class Command(BaseCommand):
+    help = "Exports tables as files that import_csv can load back"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--output-dir', default='.',
+            help='Directory the files are written to'
+        )
+        parser.add_argument(
+            '--format', dest='output', choices=FORMATS, default=FORMATS[0],
+            help='csv files have the format of static/data, ndjson has one '
+                 'JSON object per line'
+        )
+        parser.add_argument(
+            '--only', action='append', choices=TABLE_NAMES,
+            help='Export only this table, can be repeated'
+        )
+        parser.add_argument(
+            '--after', type=int, default=0,
+            help='Only rows with a greater id, to resume the export of '
+                 'the single --only table; the rows are appended to its '
+                 'existing file'
+        )
+        parser.add_argument(
+            '--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE,
+            help='Number of rows fetched from the database at a time'
+        )
+
+    def handle(self, *args, **options):
+        if options['chunk_size'] < 1:
+            raise CommandError('--chunk-size must be a positive number.')
+        # Every table stopped at its own id, one watermark cannot resume
+        # several of them.
+        if options['after'] and len(options['only'] or TABLE_NAMES) != 1:
+            raise CommandError(
+                '--after needs exactly one table given with --only.'
+            )
+        os.makedirs(options['output_dir'], exist_ok=True)
+        for table_name in options['only'] or TABLE_NAMES:
+            path = os.path.join(
+                options['output_dir'],
+                get_file_name(table_name, options['output'])
+            )
+            lines = export_lines(
+                table_name, options['output'], options['after'],
+                options['chunk_size']
+            )
+            resume = options['after'] and os.path.exists(path)
+            with open(
+                path, 'a' if resume else 'w', encoding='utf-8', newline=''
+            ) as output_file:
+                if options['output'] == CSV:
+                    header = next(lines)
+                    if not resume:
+                        output_file.write(header)
+                rows = 0
+                for line in lines:
+                    output_file.write(line)
+                    rows += 1
+            self.stdout.write(f'{table_name}: {rows} rows to {path}')
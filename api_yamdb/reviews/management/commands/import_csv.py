@@ -1,100 +1,346 @@
+import io
+import multiprocessing
 import os
+import time
+from collections import namedtuple
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from contextlib import contextmanager
 from csv import DictReader
+from itertools import islice
 
-from django.core.management import BaseCommand
-from django.shortcuts import get_object_or_404
-from reviews.models import (Category, Comment, Genre, Review, Title,
-                            TitleGenre, User)
+from django.conf import settings
+from django.core.management import BaseCommand, CommandError
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from reviews.management.workers import setup_worker
+from reviews.models import (Category, CategoryStats, Comment, Genre,
+                            GenreStats, Review, Title, TitleGenre, User)
+from reviews.signals import data_imported
 
 from api_yamdb.settings import BASE_DIR
 
+DATA_DIR = os.path.join(BASE_DIR, 'static/data')
+DEFAULT_BATCH_SIZE = 1000
+
 ALREDY_LOADED_ERROR_MESSAGE = """
-If you need to reload the  data from the CSV file,
-first delete the db.sqlite3 file to destroy the database.
-Then, run `python manage.py migrate` for a new empty
-database with tables"""
+If you need to reload the data from the CSV files, run the command
+with --upsert to update the existing rows in place. To start from
+scratch, delete the database and run `python manage.py migrate`
+for a new empty database with tables"""
+
+# columns maps model attnames to CSV columns, references maps attnames
+# of foreign keys to the model they point to.
+CsvTable = namedtuple(
+    'CsvTable', ('name', 'model', 'file_name', 'columns', 'references')
+)
+
+TABLES = (
+    CsvTable(
+        'users', User, 'users.csv',
+        {
+            'id': 'id',
+            'username': 'username',
+            'email': 'email',
+            'role': 'role',
+            'bio': 'bio',
+            'first_name': 'first_name',
+            'last_name': 'last_name',
+        },
+        {}
+    ),
+    CsvTable(
+        'category', Category, 'category.csv',
+        {'id': 'id', 'name': 'name', 'slug': 'slug'},
+        {}
+    ),
+    CsvTable(
+        'genre', Genre, 'genre.csv',
+        {'id': 'id', 'name': 'name', 'slug': 'slug'},
+        {}
+    ),
+    CsvTable(
+        'titles', Title, 'titles.csv',
+        {
+            'id': 'id',
+            'name': 'name',
+            'year': 'year',
+            'description': 'description',
+            'category_id': 'category',
+        },
+        {'category_id': Category}
+    ),
+    CsvTable(
+        'genre_title', TitleGenre, 'genre_title.csv',
+        {'id': 'id', 'title_id_id': 'title_id', 'genre_id_id': 'genre_id'},
+        {'title_id_id': Title, 'genre_id_id': Genre}
+    ),
+    CsvTable(
+        'review', Review, 'review.csv',
+        {
+            'id': 'id',
+            'title_id': 'title_id',
+            'text': 'text',
+            'author_id': 'author',
+            'score': 'score',
+            'pub_date': 'pub_date',
+        },
+        {'title_id': Title, 'author_id': User}
+    ),
+    CsvTable(
+        'comments', Comment, 'comments.csv',
+        {
+            'id': 'id',
+            'review_id': 'review_id',
+            'text': 'text',
+            'author_id': 'author',
+            'pub_date': 'pub_date',
+        },
+        {'review_id': Review, 'author_id': User}
+    ),
+)
+TABLE_NAMES = tuple(table.name for table in TABLES)
+TABLES_BY_NAME = {table.name: table for table in TABLES}
+
+
+def batches(iterable, size):
+    '''Split an iterable into lists of at most size items.'''
+    iterator = iter(iterable)
+    batch = list(islice(iterator, size))
+    while batch:
+        yield batch
+        batch = list(islice(iterator, size))
+
+
+@contextmanager
+def keep_auto_now_add(model):
+    '''Let bulk writes store the pub_date values taken from the CSV.'''
+    fields = [
+        field for field in model._meta.concrete_fields
+        if getattr(field, 'auto_now_add', False)
+    ]
+    for field in fields:
+        field.auto_now_add = False
+    try:
+        yield
+    finally:
+        for field in fields:
+            field.auto_now_add = True
+
+
+def copy_value(value):
+    '''Format a value for COPY ... WITH (FORMAT csv).
+
+    Strings are always quoted, so that only an unquoted empty field
+    is read as NULL.
+    '''
+    if value is None:
+        return ''
+    return '"' + str(value).replace('"', '""') + '"'
+
+
+def copy_rows(model, rows):
+    '''Insert rows with PostgreSQL COPY FROM STDIN.
+
+    Every concrete column is sent: the rows are built as model instances
+    first, so that columns missing from the CSV get their field default
+    or their pre_save() value (auto_now), as they would with INSERT.
+    '''
+    fields = model._meta.concrete_fields
+    buffer = io.StringIO()
+    for values in rows:
+        instance = model(**values)
+        buffer.write(','.join(
+            copy_value(field.get_db_prep_save(
+                field.pre_save(instance, True), connection
+            ))
+            for field in fields
+        ))
+        buffer.write('\n')
+    buffer.seek(0)
+    sql = 'COPY {} ({}) FROM STDIN WITH (FORMAT csv)'.format(
+        connection.ops.quote_name(model._meta.db_table),
+        ', '.join(connection.ops.quote_name(field.column) for field in fields)
+    )
+    with connection.cursor() as cursor:
+        cursor.copy_expert(sql, buffer)
+
+
+def write_batch(table_name, new, existing, update_fields, use_copy):
+    '''Write one batch of rows in a single transaction.
+
+    Rows are dicts of model attnames, so that the batch can be sent to
+    a worker process as is.
+    '''
+    model = TABLES_BY_NAME[table_name].model
+    with keep_auto_now_add(model), transaction.atomic():
+        if new and use_copy:
+            copy_rows(model, new)
+        elif new:
+            model.objects.bulk_create([model(**values) for values in new])
+        if existing:
+            model.objects.bulk_update(
+                [model(**values) for values in existing], update_fields
+            )
+    return len(new) + len(existing)
 
 
 class Command(BaseCommand):
     # Show this when the user types help
     help = "Loads data from /api_yamdb/static/data"
 
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int, default=DEFAULT_BATCH_SIZE,
+            help='Number of rows written per INSERT and transaction'
+        )
+        parser.add_argument(
+            '--only', action='append', choices=TABLE_NAMES,
+            help='Load only this table, can be repeated'
+        )
+        parser.add_argument(
+            '--upsert', action='store_true',
+            help='Update rows that already exist instead of exiting'
+        )
+        parser.add_argument(
+            '--data-dir', default=DATA_DIR,
+            help='Directory with the CSV files'
+        )
+        parser.add_argument(
+            '--workers', type=int, default=1,
+            help='Number of processes writing batches in parallel'
+        )
+        parser.add_argument(
+            '--copy', action='store_true',
+            help='Insert new rows with COPY FROM STDIN (PostgreSQL only)'
+        )
+
     def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be a positive number.')
+        if options['workers'] < 1:
+            raise CommandError('--workers must be a positive number.')
+        if options['copy'] and connection.vendor != 'postgresql':
+            raise CommandError('--copy is only supported on PostgreSQL.')
+        tables = [
+            table for table in TABLES
+            if not options['only'] or table.name in options['only']
+        ]
         # Show this if the data already exist in the database
-        if (
-            Category.objects.exists()
-            or Comment.objects.exists()
-            or Genre.objects.exists()
-            or Review.objects.exists()
-            or Title.objects.exists()
-            or TitleGenre.objects.exists()
-            or User.objects.exists()
+        if not options['upsert'] and any(
+            table.model.objects.exists() for table in tables
         ):
-            print('Data already loaded...exiting.')
-            print(ALREDY_LOADED_ERROR_MESSAGE)
+            self.stdout.write('Data already loaded...exiting.')
+            self.stdout.write(ALREDY_LOADED_ERROR_MESSAGE)
             return
 
-        # Show this before loading the data into the database
-        print("Loading data")
-
-        # Code to load the data into database
-        for row in DictReader(open(
-            os.path.join(BASE_DIR, 'static/data/users.csv'),
-            'r', encoding='utf-8'
-        )):
-            User.objects.create(**row)
-
-        for row in DictReader(open(
-            os.path.join(BASE_DIR, 'static/data/category.csv'),
-            'r', encoding='utf-8'
-        )):
-            Category.objects.create(**row)
-
-        for row in DictReader(open(
-            os.path.join(BASE_DIR, 'static/data/genre.csv'),
-            'r', encoding='utf-8'
-        )):
-            Genre.objects.create(**row)
-
-        for row in DictReader(open(
-            os.path.join(BASE_DIR, 'static/data/titles.csv'),
-            'r', encoding='utf-8'
-        )):
-            Title.objects.create(
-                name=row['name'],
-                year=row['year'],
-                category=get_object_or_404(Category, id=row['category'])
+        self.stdout.write('Loading data')
+        self.known_ids = {}
+        self.executor = None
+        if options['workers'] > 1:
+            # Workers are spawned rather than forked, so that they never
+            # share a database connection with this process.
+            self.executor = ProcessPoolExecutor(
+                max_workers=options['workers'],
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=setup_worker,
+                initargs=(settings.DATABASES,)
             )
+        try:
+            # Tables are loaded one after another in dependency order,
+            # only the batches of a table are written in parallel.
+            for table in tables:
+                self.load_table(table, options)
+        finally:
+            if self.executor is not None:
+                self.executor.shutdown()
 
-        for row in DictReader(open(
-            os.path.join(BASE_DIR, 'static/data/genre_title.csv'),
-            'r', encoding='utf-8'
-        )):
-            TitleGenre.objects.create(
-                title_id=get_object_or_404(Title, id=row['title_id']),
-                genre_id=get_object_or_404(Genre, id=row['genre_id']),
-            )
+        models = [table.model for table in tables]
+        self.reset_sequences(models)
+        if Review in models:
+            # bulk_create bypasses the signals that keep ratings in sync.
+            Title.objects.recalculate_rating()
+            Title.objects.refresh_prior_mean()
+            Title.objects.rank()
+        if {Category, Genre, Title, TitleGenre, Review} & set(models):
+            GenreStats.objects.rebuild()
+            CategoryStats.objects.rebuild()
+        data_imported.send(sender=self.__class__, models=models)
+        self.stdout.write('Data upload finished.')
 
-        for row in DictReader(open(
-            os.path.join(BASE_DIR, 'static/data/review.csv'),
-            'r', encoding='utf-8'
-        )):
-            Review.objects.create(
-                title_id=row['title_id'],
-                text=row['text'],
-                author=get_object_or_404(User, id=row['author']),
-                score=row['score'],
-                pub_date=row['pub_date']
+    def get_known_ids(self, model):
+        '''Ids of the model in the database, used to resolve references.'''
+        if model not in self.known_ids:
+            self.known_ids[model] = set(
+                model.objects.values_list('pk', flat=True)
             )
+        return self.known_ids[model]
 
-        for row in DictReader(open(
-            os.path.join(BASE_DIR, 'static/data/comments.csv'),
-            'r', encoding='utf-8'
-        )):
-            Comment.objects.create(
-                review_id=row['review_id'],
-                text=row['text'],
-                author=get_object_or_404(User, id=row['author']),
-                pub_date=row['pub_date']
+    def build(self, table, row, line):
+        values = {}
+        for attname, column in table.columns.items():
+            if column not in row:
+                continue
+            value = row[column]
+            if attname == 'id' or attname in table.references:
+                value = int(value) if value else None
+            if attname in table.references and value is not None:
+                if value not in self.get_known_ids(table.references[attname]):
+                    raise CommandError(
+                        f'{table.file_name}, line {line}: '
+                        f'{column}={value} does not exist.'
+                    )
+            values[attname] = value
+        return values
+
+    def load_table(self, table, options):
+        path = os.path.join(options['data_dir'], table.file_name)
+        batch_size = options['batch_size']
+        known_ids = self.get_known_ids(table.model)
+        pending = set()
+        rows = 0
+        started = time.monotonic()
+        with open(path, 'r', encoding='utf-8', newline='') as csv_file:
+            reader = DictReader(csv_file)
+            update_fields = [
+                attname for attname, column in table.columns.items()
+                if attname != 'id' and column in reader.fieldnames
+            ]
+            values = (
+                self.build(table, row, line)
+                for line, row in enumerate(reader, start=2)
             )
-        print("Data upload finished.")
+            for batch in batches(values, batch_size):
+                new = [row for row in batch if row.get('id') not in known_ids]
+                existing = []
+                if options['upsert']:
+                    existing = [
+                        row for row in batch if row.get('id') in known_ids
+                    ]
+                args = (
+                    table.name, new, existing, update_fields, options['copy']
+                )
+                if self.executor is None:
+                    rows += write_batch(*args)
+                else:
+                    # Keep a bounded number of batches in flight, so that
+                    # memory does not grow with the size of the file.
+                    if len(pending) >= 2 * options['workers']:
+                        done, pending = wait(
+                            pending, return_when=FIRST_COMPLETED
+                        )
+                        rows += sum(future.result() for future in done)
+                    pending.add(self.executor.submit(write_batch, *args))
+                known_ids.update(row.get('id') for row in new)
+        rows += sum(future.result() for future in wait(pending).done)
+        elapsed = time.monotonic() - started
+        self.stdout.write(
+            f'{table.name}: {rows} rows in {elapsed:.2f}s '
+            f'({rows / elapsed if elapsed else rows:.0f} rows/s)'
+        )
+
+    def reset_sequences(self, models):
+        '''Move id sequences past the ids that came from the CSV files.'''
+        statements = connection.ops.sequence_reset_sql(no_style(), models)
+        with connection.cursor() as cursor:
+            for sql in statements:
+                cursor.execute(sql)
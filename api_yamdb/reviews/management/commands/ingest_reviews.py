@@ -0,0 +1,52 @@
+import time
+
+from django.conf import settings
+from django.core.cache import caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.core.management import BaseCommand, CommandError
+from reviews.ingestion import ingest_batch
+
+
+class Command(BaseCommand):
+    help = "Writes the reviews queued by the API in batches"
+
+    # The API caches ratings, only a cache shared with the web workers
+    # lets this process invalidate them.
+    LOCAL_CACHE_WARNING = (
+        'The cache is local to this process: cached titles of the web '
+        'workers stay stale until they expire. Set CACHE_BACKEND to the '
+        'shared cache of the web service.'
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int,
+            default=settings.REVIEW_INGESTION['BATCH_SIZE'],
+            help='Number of reviews written in one transaction'
+        )
+        parser.add_argument(
+            '--interval', type=float,
+            default=settings.REVIEW_INGESTION['POLL_INTERVAL'],
+            help='Seconds to wait when no review is pending'
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Write the pending reviews and exit'
+        )
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be a positive number.')
+        if isinstance(caches[settings.API_CACHE_ALIAS], LocMemCache):
+            self.stderr.write(self.LOCAL_CACHE_WARNING)
+        while True:
+            statuses = ingest_batch(options['batch_size'])
+            if statuses:
+                self.stdout.write(', '.join(
+                    f'{status}: {count}'
+                    for status, count in sorted(statuses.items())
+                ))
+            if sum(statuses.values()) < options['batch_size']:
+                if options['once']:
+                    return
+                time.sleep(options['interval'])
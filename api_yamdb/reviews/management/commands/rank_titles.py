@@ -0,0 +1,16 @@
+from django.core.management import BaseCommand
+from reviews.models import Title
+from reviews.signals import data_imported
+
+
+class Command(BaseCommand):
+    help = "Recalculates the weighted rating of titles for /titles/top/"
+
+    def handle(self, *args, **options):
+        prior = Title.objects.refresh_prior_mean()
+        updated = Title.objects.rank()
+        data_imported.send(sender=self.__class__, models=[Title])
+        self.stdout.write(
+            f'Weighted ratings recalculated for {updated} titles, '
+            f'mean score {prior:.2f}.'
+        )
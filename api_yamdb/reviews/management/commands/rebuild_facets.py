@@ -0,0 +1,13 @@
+from django.core.management import BaseCommand
+from reviews.models import CategoryStats, GenreStats
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the per-genre and per-category stats of titles"
+
+    def handle(self, *args, **options):
+        genres = GenreStats.objects.rebuild()
+        categories = CategoryStats.objects.rebuild()
+        self.stdout.write(
+            f'Stats rebuilt for {genres} genres and {categories} categories.'
+        )
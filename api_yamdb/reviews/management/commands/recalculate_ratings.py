@@ -0,0 +1,24 @@
+from django.core.management import BaseCommand
+from reviews.models import CategoryStats, GenreStats, Title
+from reviews.signals import data_imported
+
+
+class Command(BaseCommand):
+    help = "Rebuilds the stored rating of titles from their reviews"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'title_ids', nargs='*', type=int,
+            help='Only recalculate these titles (all titles by default)'
+        )
+
+    def handle(self, *args, **options):
+        titles = Title.objects.all()
+        if options['title_ids']:
+            titles = titles.filter(pk__in=options['title_ids'])
+        updated = titles.recalculate_rating()
+        GenreStats.objects.rebuild(titles.values('genre'))
+        CategoryStats.objects.rebuild(titles.values('category'))
+        # Bulk updates send no model signals, cached titles are stale.
+        data_imported.send(sender=self.__class__, models=[Title])
+        self.stdout.write(f'Ratings recalculated for {updated} titles.')
@@ -0,0 +1,40 @@
+import time
+
+from django.conf import settings
+from django.core.management import BaseCommand, CommandError
+from reviews.outbox import send_batch
+
+
+class Command(BaseCommand):
+    help = "Sends the emails queued in the outbox"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--batch-size', type=int,
+            default=settings.EMAIL_OUTBOX['BATCH_SIZE'],
+            help='Number of emails sent over one connection'
+        )
+        parser.add_argument(
+            '--interval', type=float,
+            default=settings.EMAIL_OUTBOX['POLL_INTERVAL'],
+            help='Seconds to wait when no email is due'
+        )
+        parser.add_argument(
+            '--once', action='store_true',
+            help='Send the emails that are due and exit'
+        )
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1:
+            raise CommandError('--batch-size must be a positive number.')
+        while True:
+            statuses = send_batch(options['batch_size'])
+            if statuses:
+                self.stdout.write(', '.join(
+                    f'{status}: {count}'
+                    for status, count in sorted(statuses.items())
+                ))
+            if sum(statuses.values()) < options['batch_size']:
+                if options['once']:
+                    return
+                time.sleep(options['interval'])
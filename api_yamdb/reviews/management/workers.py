@@ -0,0 +1,12 @@
+import django
+from django.conf import settings
+
+
+def setup_worker(databases):
+    '''Prepare a spawned worker process to write to the same database.
+
+    Lives outside of the commands, because a spawned process unpickles
+    the initializer before the app registry is ready.
+    '''
+    settings.DATABASES = databases
+    django.setup()
@@ -1,14 +1,21 @@
 from enum import Enum
 
+from django.conf import settings
 from django.contrib.auth.models import AbstractUser
+from django.core.cache import cache
 from django.core.validators import MaxValueValidator, MinValueValidator
-from django.db import models
+from django.db import IntegrityError, models, transaction
+from django.db.models import Case, F, FloatField, OuterRef, Subquery, When
+from django.db.models.functions import Cast, Coalesce
+from django.utils import timezone
 
 from api_yamdb.settings import (CHARFIELD_MAX_LENGTH, EMAIL_MAX_LENGTH,
                                 NAME_MAX_LENGTH)
 
 from .validators import validate_username, validate_year
 
+PRIOR_MEAN_KEY = 'reviews:prior-mean'
+
 
 class Roles(Enum):
     user = 'user'
@@ -20,6 +27,26 @@ class Roles(Enum):
         return tuple((attribute.name, attribute.value) for attribute in cls)
 
 
+class EmailStatus(Enum):
+    pending = 'pending'
+    sent = 'sent'
+    dead = 'dead'
+
+    @classmethod
+    def get_statuses(cls):
+        return tuple((attribute.name, attribute.value) for attribute in cls)
+
+
+class IngestionStatus(Enum):
+    pending = 'pending'
+    accepted = 'accepted'
+    rejected = 'rejected'
+
+    @classmethod
+    def get_statuses(cls):
+        return tuple((attribute.name, attribute.value) for attribute in cls)
+
+
 class User(AbstractUser):
     username = models.CharField(
         verbose_name='Имя пользователя',
@@ -61,6 +88,14 @@ class User(AbstractUser):
         verbose_name_plural = 'Пользователи'
         ordering = ('username',)
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Reviews and comments show the username, a rename changes them.
+        if 'username' in field_names:
+            instance._loaded_username = instance.username
+        return instance
+
     @property
     def is_admin(self):
         return self.role == Roles.admin.value
@@ -103,6 +138,110 @@ class Category(SimpleSlugModel):
         verbose_name_plural = 'Категории'
 
 
+class TitleQuerySet(models.QuerySet):
+    '''Queryset with helpers for the stored rating aggregate.'''
+
+    def touch(self, **fields):
+        '''Mark titles as changed, along with any other field updates.
+
+        The version and modification time are what HTTP validators of
+        titles and of their reviews and comments are built from.
+        '''
+        return self.update(
+            version=F('version') + 1, modified=timezone.now(), **fields
+        )
+
+    def shift_rating(self, score_delta, count_delta):
+        '''Atomically add deltas to the rating sum and count.
+
+        The average is recalculated in the same UPDATE statement, so
+        concurrent review writes never see a torn aggregate.
+        '''
+        new_sum = Cast(F('rating_sum') + score_delta, FloatField())
+        new_count = Cast(F('rating_count') + count_delta, FloatField())
+        return self.touch(
+            rating_sum=F('rating_sum') + score_delta,
+            rating_count=F('rating_count') + count_delta,
+            rating=Case(
+                When(rating_count=-count_delta, then=None),
+                default=new_sum / new_count,
+                output_field=FloatField(),
+            ),
+            weighted_rating=Case(
+                When(rating_count=-count_delta, then=None),
+                default=self.weighted_rating(new_sum, new_count),
+                output_field=FloatField(),
+            ),
+        )
+
+    def recalculate_rating(self):
+        '''Rebuild the rating aggregate and score histograms from reviews.
+
+        The aggregate is rebuilt in one statement.
+        '''
+        scores = Review.objects.filter(
+            title=OuterRef('pk'), score__isnull=False
+        ).order_by().values('title')
+        ScoreHistogram.objects.rebuild(self)
+        updated = self.touch(
+            rating_sum=Coalesce(
+                Subquery(scores.annotate(total=models.Sum('score'))
+                         .values('total')),
+                0
+            ),
+            rating_count=Coalesce(
+                Subquery(scores.annotate(total=models.Count('score'))
+                         .values('total')),
+                0
+            ),
+            rating=Subquery(
+                scores.annotate(total=models.Avg('score')).values('total'),
+                output_field=FloatField()
+            ),
+        )
+        self.rank()
+        return updated
+
+    def prior_mean(self):
+        '''Mean score of all reviews, cached for PRIOR_MEAN_TTL.'''
+        prior = cache.get(PRIOR_MEAN_KEY)
+        if prior is None:
+            prior = self.refresh_prior_mean()
+        return prior
+
+    def refresh_prior_mean(self):
+        totals = Title.objects.aggregate(
+            total=models.Sum('rating_sum'), count=models.Sum('rating_count')
+        )
+        if totals['count']:
+            prior = totals['total'] / totals['count']
+        else:
+            prior = settings.RANKING['DEFAULT_PRIOR_MEAN']
+        cache.set(PRIOR_MEAN_KEY, prior, settings.RANKING['PRIOR_MEAN_TTL'])
+        return prior
+
+    def weighted_rating(self, total, count):
+        '''Bayesian average of the scores.
+
+        The mean score is pulled towards the mean of all scores as if
+        every title had PRIOR_WEIGHT more reviews with that score, so a
+        few enthusiastic reviews do not outrank many good ones.
+        '''
+        weight = settings.RANKING['PRIOR_WEIGHT']
+        return (total + weight * self.prior_mean()) / (count + weight)
+
+    def rank(self):
+        '''Recalculate the weighted rating from the stored aggregate.'''
+        return self.update(weighted_rating=Case(
+            When(rating_count=0, then=None),
+            default=self.weighted_rating(
+                Cast(F('rating_sum'), FloatField()),
+                Cast(F('rating_count'), FloatField())
+            ),
+            output_field=FloatField(),
+        ))
+
+
 class Title(models.Model):
     '''Model for Titles.'''
     id = models.AutoField(primary_key=True)
@@ -117,11 +256,63 @@ class Title(models.Model):
         blank=True,
         null=True
     )
+    rating = models.FloatField(
+        verbose_name='Рейтинг',
+        blank=True,
+        null=True
+    )
+    rating_sum = models.PositiveIntegerField(
+        verbose_name='Сумма оценок',
+        default=0
+    )
+    rating_count = models.PositiveIntegerField(
+        verbose_name='Количество оценок',
+        default=0
+    )
+    weighted_rating = models.FloatField(
+        verbose_name='Взвешенный рейтинг',
+        blank=True,
+        null=True
+    )
+    version = models.PositiveIntegerField(
+        verbose_name='Версия',
+        default=0
+    )
+    modified = models.DateTimeField(
+        verbose_name='Дата изменения',
+        auto_now=True,
+        db_index=True
+    )
+
+    objects = TitleQuerySet.as_manager()
 
     class Meta:
         ordering = ('year', 'name')
         verbose_name = 'Произведение'
         verbose_name_plural = 'Произведения'
+        indexes = [
+            # Default ordering, the id serves keyset pagination.
+            models.Index(
+                fields=['year', 'name', 'id'], name='title_year_name_idx'
+            ),
+            # Top titles, overall and by category.
+            models.Index(
+                fields=['-weighted_rating', 'id'],
+                name='title_weighted_rating_idx'
+            ),
+            models.Index(
+                fields=['category', '-weighted_rating', 'id'],
+                name='title_category_rating_idx'
+            ),
+        ]
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember the category, so that a move updates the stats of both.
+        if 'category_id' in field_names:
+            instance._loaded_category = instance.category_id
+        return instance
 
     def __str__(self):
         return self.name
@@ -143,6 +334,14 @@ class TitleGenre(models.Model):
         null=True
     )
 
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                name='title_genre_unique',
+                fields=['title_id', 'genre_id'],
+            ),
+        ]
+
     def __str__(self):
         return (f'Произведение номер {self.title_id},'
                 f'жанр номер {self.genre_id}')
@@ -188,9 +387,16 @@ class Review(BaseReviewCommentModel):
         null=True
     )
 
-    class Meta:
+    class Meta(BaseReviewCommentModel.Meta):
         verbose_name = 'Обзор'
         verbose_name_plural = 'Обзоры'
+        indexes = [
+            # Reviews are always read by title, newest first.
+            models.Index(
+                fields=['title', '-pub_date', '-id'],
+                name='review_title_pub_date_idx'
+            ),
+        ]
         constraints = [
             models.UniqueConstraint(
                 name="reviews_only_one_review_per_title",
@@ -198,6 +404,19 @@ class Review(BaseReviewCommentModel):
             ),
         ]
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Remember what the stored rating of the title was built from,
+        # so that an update only has to apply the difference.
+        if 'title_id' in field_names and 'score' in field_names:
+            instance._loaded_rating = (instance.title_id, instance.score)
+        return instance
+
+    def save(self, *args, **kwargs):
+        with transaction.atomic():
+            super().save(*args, **kwargs)
+
 
 class Comment(BaseReviewCommentModel):
     '''Model for Comments to Reviews by Users.'''
@@ -208,6 +427,341 @@ class Comment(BaseReviewCommentModel):
         verbose_name='Обзор'
     )
 
-    class Meta:
+    class Meta(BaseReviewCommentModel.Meta):
         verbose_name = 'Комментарий'
         verbose_name_plural = 'Комментарии'
+        indexes = [
+            # Comments are always read by review, newest first.
+            models.Index(
+                fields=['review', '-pub_date', '-id'],
+                name='comment_review_pub_date_idx'
+            ),
+        ]
+
+
+class OutgoingEmail(models.Model):
+    '''Email waiting in the outbox for the send_emails worker.'''
+    subject = models.CharField(
+        verbose_name='Тема',
+        max_length=CHARFIELD_MAX_LENGTH
+    )
+    body = models.TextField(verbose_name='Текст')
+    to = models.EmailField(
+        verbose_name='Адрес получателя',
+        max_length=EMAIL_MAX_LENGTH
+    )
+    status = models.CharField(
+        verbose_name='Статус',
+        max_length=CHARFIELD_MAX_LENGTH,
+        choices=EmailStatus.get_statuses(),
+        default=EmailStatus.pending.value
+    )
+    attempts = models.PositiveIntegerField(
+        verbose_name='Попытки отправки',
+        default=0
+    )
+    next_attempt = models.DateTimeField(
+        verbose_name='Следующая попытка',
+        default=timezone.now
+    )
+    last_error = models.TextField(
+        verbose_name='Последняя ошибка',
+        blank=True
+    )
+    created = models.DateTimeField(
+        verbose_name='Дата создания',
+        auto_now_add=True
+    )
+    sent = models.DateTimeField(
+        verbose_name='Дата отправки',
+        blank=True,
+        null=True
+    )
+
+    class Meta:
+        ordering = ('next_attempt', 'id')
+        verbose_name = 'Письмо'
+        verbose_name_plural = 'Исходящие письма'
+        indexes = [
+            # The worker only ever asks for pending emails that are due.
+            models.Index(
+                fields=['status', 'next_attempt'], name='email_due_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.to}: {self.subject}'
+
+
+class PendingReview(models.Model):
+    '''Review accepted by the API and waiting for the ingest_reviews worker.'''
+    title = models.ForeignKey(
+        Title,
+        on_delete=models.CASCADE,
+        related_name='pending_reviews',
+        verbose_name='Произведение'
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name='pending_reviews',
+        verbose_name='Автор'
+    )
+    text = models.TextField(verbose_name='Текст')
+    score = models.IntegerField(
+        validators=[MinValueValidator(1), MaxValueValidator(10)],
+        verbose_name='Оценка'
+    )
+    status = models.CharField(
+        verbose_name='Статус',
+        max_length=CHARFIELD_MAX_LENGTH,
+        choices=IngestionStatus.get_statuses(),
+        default=IngestionStatus.pending.value
+    )
+    review = models.ForeignKey(
+        Review,
+        on_delete=models.SET_NULL,
+        related_name='+',
+        blank=True,
+        null=True,
+        verbose_name='Обзор'
+    )
+    error = models.TextField(verbose_name='Ошибка', blank=True)
+    created = models.DateTimeField(
+        verbose_name='Дата создания',
+        auto_now_add=True
+    )
+
+    class Meta:
+        ordering = ('id',)
+        verbose_name = 'Обзор в очереди'
+        verbose_name_plural = 'Обзоры в очереди'
+        indexes = [
+            # The worker takes pending reviews in id order.
+            models.Index(
+                fields=['status', 'id'], name='pending_review_status_idx'
+            ),
+        ]
+
+    def __str__(self):
+        return f'{self.author_id} -> {self.title_id}: {self.status}'
+
+
+class ScoreHistogramQuerySet(models.QuerySet):
+
+    def shift(self, title_id, score, delta):
+        '''Atomically add delta to the bucket of the score.'''
+        field = f'score_{score}'
+        bucket = {field: F(field) + delta}
+        if self.filter(title_id=title_id).update(**bucket):
+            return
+        try:
+            with transaction.atomic():
+                self.create(title_id=title_id, **{field: max(delta, 0)})
+        except IntegrityError:
+            # Created by a concurrent review in the meantime.
+            self.filter(title_id=title_id).update(**bucket)
+
+    def rebuild(self, titles):
+        '''Rebuild the histograms of the titles from their reviews.'''
+        counts = Review.objects.filter(
+            title__in=titles, score__isnull=False
+        ).order_by().values('title', 'score').annotate(
+            total=models.Count('pk')
+        )
+        buckets = {}
+        for row in counts:
+            buckets.setdefault(row['title'], {})[
+                f'score_{row["score"]}'
+            ] = row['total']
+        with transaction.atomic():
+            self.filter(title__in=titles).delete()
+            self.bulk_create([
+                ScoreHistogram(title_id=title_id, **title_buckets)
+                for title_id, title_buckets in buckets.items()
+            ])
+
+
+class ScoreHistogram(models.Model):
+    '''Number of reviews of a title with each score, kept by signals.'''
+    title = models.OneToOneField(
+        Title,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='score_histogram',
+        verbose_name='Произведение'
+    )
+    score_1 = models.PositiveIntegerField(default=0)
+    score_2 = models.PositiveIntegerField(default=0)
+    score_3 = models.PositiveIntegerField(default=0)
+    score_4 = models.PositiveIntegerField(default=0)
+    score_5 = models.PositiveIntegerField(default=0)
+    score_6 = models.PositiveIntegerField(default=0)
+    score_7 = models.PositiveIntegerField(default=0)
+    score_8 = models.PositiveIntegerField(default=0)
+    score_9 = models.PositiveIntegerField(default=0)
+    score_10 = models.PositiveIntegerField(default=0)
+
+    objects = ScoreHistogramQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = 'Распределение оценок'
+        verbose_name_plural = 'Распределения оценок'
+
+    @property
+    def histogram(self):
+        return {
+            score: getattr(self, f'score_{score}')
+            for score in range(1, 11)
+        }
+
+    @property
+    def count(self):
+        return sum(self.histogram.values())
+
+    @property
+    def mean(self):
+        count = self.count
+        if not count:
+            return None
+        return sum(
+            score * number for score, number in self.histogram.items()
+        ) / count
+
+    @property
+    def median(self):
+        '''Median score, the mean of both middle scores for even counts.'''
+        count = self.count
+        if not count:
+            return None
+        middle = ((count - 1) // 2, count // 2)
+        values = []
+        seen = 0
+        for score, number in self.histogram.items():
+            values.extend(
+                score for position in middle
+                if seen <= position < seen + number
+            )
+            seen += number
+        return sum(values) / 2
+
+    def __str__(self):
+        return f'Оценки произведения номер {self.title_id}'
+
+
+class FacetStatsQuerySet(models.QuerySet):
+    '''Queryset with helpers for the stored stats of genres or categories.'''
+
+    def shift(self, facets, titles=0, score=0, count=0):
+        '''Atomically add deltas to the stats of the facets.'''
+        return self.filter(**{f'{self.model.FACET}__in': facets}).update(
+            title_count=F('title_count') + titles,
+            rating_sum=F('rating_sum') + score,
+            rating_count=F('rating_count') + count,
+        )
+
+    def rebuild(self, facets=None):
+        '''Rebuild the stats of the facets, all of them by default.
+
+        Returns the number of facets rebuilt.
+        '''
+        field = self.model.FACET
+        ids = self.model._meta.get_field(
+            field
+        ).related_model.objects.order_by()
+        if facets is not None:
+            ids = ids.filter(pk__in=facets)
+        ids = list(ids.values_list('pk', flat=True))
+        totals = {
+            row[field]: row
+            for row in Title.objects.filter(**{f'{field}__in': ids})
+            .order_by().values(field).annotate(
+                titles=models.Count('pk'),
+                total=models.Sum('rating_sum'),
+                reviews=models.Sum('rating_count'),
+            )
+        }
+        with transaction.atomic():
+            self.filter(**{f'{field}__in': ids}).delete()
+            self.bulk_create([
+                self.model(**{
+                    f'{field}_id': pk,
+                    'title_count': totals[pk]['titles'],
+                    'rating_sum': totals[pk]['total'],
+                    'rating_count': totals[pk]['reviews'],
+                })
+                if pk in totals else self.model(**{f'{field}_id': pk})
+                for pk in ids
+            ])
+        return len(ids)
+
+
+class BaseFacetStats(models.Model):
+    '''Number of titles of a facet and the scores of their reviews.
+
+    Kept by signals, so that facet counts are read from one row per
+    genre or category instead of being counted over all titles.
+    '''
+    title_count = models.PositiveIntegerField(
+        verbose_name='Количество произведений',
+        default=0
+    )
+    rating_sum = models.PositiveIntegerField(
+        verbose_name='Сумма оценок',
+        default=0
+    )
+    rating_count = models.PositiveIntegerField(
+        verbose_name='Количество оценок',
+        default=0
+    )
+
+    objects = FacetStatsQuerySet.as_manager()
+
+    class Meta:
+        abstract = True
+
+    @property
+    def rating(self):
+        '''Mean score of all reviews of the titles.'''
+        if not self.rating_count:
+            return None
+        return self.rating_sum / self.rating_count
+
+
+class GenreStats(BaseFacetStats):
+    # The field of the facet, both here and on Title.
+    FACET = 'genre'
+
+    genre = models.OneToOneField(
+        Genre,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats',
+        verbose_name='Жанр'
+    )
+
+    class Meta:
+        verbose_name = 'Статистика жанра'
+        verbose_name_plural = 'Статистика жанров'
+
+    def __str__(self):
+        return f'Статистика жанра номер {self.genre_id}'
+
+
+class CategoryStats(BaseFacetStats):
+    FACET = 'category'
+
+    category = models.OneToOneField(
+        Category,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name='stats',
+        verbose_name='Категория'
+    )
+
+    class Meta:
+        verbose_name = 'Статистика категории'
+        verbose_name_plural = 'Статистика категорий'
+
+    def __str__(self):
+        return f'Статистика категории номер {self.category_id}'
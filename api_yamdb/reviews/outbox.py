@@ -0,0 +1,105 @@
+'''Outbox of emails, sent by the send_emails worker instead of the view.
+
+Emails are claimed in batches with SELECT ... FOR UPDATE SKIP LOCKED
+where the database supports it, so that several workers can run side by
+side. A claim counts the attempt and moves the next one forward in a
+short transaction; the emails are sent after it commits, so a slow mail
+server holds no row locks, and an email whose worker died is retried
+like a failed one. A failed email is retried with exponential backoff
+and ends up in the dead state after EMAIL_OUTBOX['MAX_ATTEMPTS']
+attempts.
+'''
+from collections import Counter
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.mail import EmailMessage, get_connection
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import EmailStatus, OutgoingEmail
+
+
+def queue_email(subject, body, to):
+    return OutgoingEmail.objects.create(subject=subject, body=body, to=to)
+
+
+def get_retry_delay(attempts):
+    options = settings.EMAIL_OUTBOX
+    return timedelta(seconds=min(
+        options['RETRY_DELAY'] * 2 ** (attempts - 1),
+        options['MAX_RETRY_DELAY']
+    ))
+
+
+def mark_failed(email, error):
+    # The next attempt was scheduled when the email was claimed.
+    email.last_error = repr(error)
+    if email.attempts >= settings.EMAIL_OUTBOX['MAX_ATTEMPTS']:
+        email.status = EmailStatus.dead.value
+
+
+def deliver(emails):
+    '''Send the emails over a single connection and record the outcome.
+
+    Any error fails only its email: besides the mail server, a message
+    may be refused by the backend itself, e.g. for a bad header.
+    '''
+    backend = get_connection(fail_silently=False)
+    try:
+        backend.open()
+    except Exception as error:
+        for email in emails:
+            mark_failed(email, error)
+        return
+    try:
+        for email in emails:
+            message = EmailMessage(
+                subject=email.subject, body=email.body,
+                to=[email.to], connection=backend
+            )
+            try:
+                message.send()
+            except Exception as error:
+                mark_failed(email, error)
+            else:
+                email.status = EmailStatus.sent.value
+                email.sent = timezone.now()
+    finally:
+        backend.close()
+
+
+def claim_batch(batch_size, now):
+    '''Count an attempt of the due emails and postpone their next one.'''
+    due = OutgoingEmail.objects.filter(
+        status=EmailStatus.pending.value, next_attempt__lte=now
+    )
+    if connection.features.has_select_for_update_skip_locked:
+        due = due.select_for_update(skip_locked=True)
+    with transaction.atomic():
+        emails = list(due[:batch_size])
+        for email in emails:
+            email.attempts += 1
+            email.next_attempt = now + get_retry_delay(email.attempts)
+        OutgoingEmail.objects.bulk_update(
+            emails, ['attempts', 'next_attempt']
+        )
+    return emails
+
+
+def send_batch(batch_size=None):
+    '''Send one batch of due emails.
+
+    Returns a Counter of the statuses the emails of the batch ended up
+    in, empty when nothing was due.
+    '''
+    batch_size = batch_size or settings.EMAIL_OUTBOX['BATCH_SIZE']
+    now = timezone.now()
+    emails = claim_batch(batch_size, now)
+    if not emails:
+        return Counter()
+    deliver(emails)
+    OutgoingEmail.objects.bulk_update(
+        emails, ['status', 'last_error', 'sent']
+    )
+    return Counter(email.status for email in emails)
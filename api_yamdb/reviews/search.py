@@ -0,0 +1,177 @@
+'''Ranked search over title names and review texts.
+
+PostgreSQL matches title names with pg_trgm, so that parts of words and
+typos are found too, and review texts with the russian text search
+configuration, so that other forms of a word are found. Both are served
+by GIN indexes.
+
+SQLite, used with DEBUG, keeps FTS5 tables in sync with triggers: a
+trigram one for title names and a unicode61 one for review texts, where
+every word of the query is matched as a prefix. Both fold the case of
+Cyrillic letters, which LIKE does not do; ё is stored and searched as е.
+Title queries shorter than three characters fall back to LIKE.
+'''
+import re
+from collections import namedtuple
+
+from django.db import DEFAULT_DB_ALIAS, connections
+from django.db.models.expressions import RawSQL
+
+from .models import Review, Title
+
+TRIGRAM = 'trigram'
+FULL_TEXT = 'full_text'
+# Shorter queries are not split into trigrams.
+MIN_TRIGRAM_LENGTH = 3
+
+SearchIndex = namedtuple('SearchIndex', ('model', 'field', 'kind'))
+
+SEARCH_INDEXES = {
+    Title: SearchIndex(Title, 'name', TRIGRAM),
+    Review: SearchIndex(Review, 'text', FULL_TEXT),
+}
+
+
+def fold_yo(sql):
+    return f"replace(replace({sql}, 'ё', 'е'), 'Ё', 'Е')"
+
+
+def get_names(index, connection):
+    '''Quoted table, column and search table names of the index.'''
+    quote = connection.ops.quote_name
+    table = index.model._meta.db_table
+    column = index.model._meta.get_field(index.field).column
+    return quote(table), quote(column), quote(f'{table}_search')
+
+
+def postgresql_statements(index, connection):
+    table, column, _ = get_names(index, connection)
+    name = connection.ops.quote_name(
+        f'{index.model._meta.db_table}_{index.field}_search_idx'
+    )
+    if index.kind == TRIGRAM:
+        return [
+            'CREATE EXTENSION IF NOT EXISTS pg_trgm',
+            f'CREATE INDEX IF NOT EXISTS {name} ON {table} '
+            f'USING gin ({column} gin_trgm_ops)',
+        ]
+    return [
+        f'CREATE INDEX IF NOT EXISTS {name} ON {table} '
+        f"USING gin (to_tsvector('russian'::regconfig, {column}))",
+    ]
+
+
+def sqlite_statements(index, connection):
+    table, column, search_table = get_names(index, connection)
+    tokenizer = 'trigram' if index.kind == TRIGRAM else 'unicode61'
+    insert = (
+        f'INSERT INTO {search_table} (rowid, {column}) '
+        f'VALUES (new.id, {fold_yo(f"new.{column}")});'
+    )
+    delete = f'DELETE FROM {search_table} WHERE rowid = old.id;'
+    trigger = index.model._meta.db_table + '_search_{}'
+    return [
+        f'CREATE VIRTUAL TABLE IF NOT EXISTS {search_table} '
+        f"USING fts5({column}, tokenize='{tokenizer}')",
+        f'CREATE TRIGGER IF NOT EXISTS {trigger.format("insert")} '
+        f'AFTER INSERT ON {table} BEGIN {insert} END',
+        f'CREATE TRIGGER IF NOT EXISTS {trigger.format("update")} '
+        f'AFTER UPDATE OF {column} ON {table} BEGIN {delete} {insert} END',
+        f'CREATE TRIGGER IF NOT EXISTS {trigger.format("delete")} '
+        f'AFTER DELETE ON {table} BEGIN {delete} END',
+        # Rows written before the triggers existed.
+        f'DELETE FROM {search_table}',
+        f'INSERT INTO {search_table} (rowid, {column}) '
+        f'SELECT id, {fold_yo(column)} FROM {table}',
+    ]
+
+
+STATEMENTS = {
+    'postgresql': postgresql_statements,
+    'sqlite': sqlite_statements,
+}
+
+
+def create_search_indexes(using=DEFAULT_DB_ALIAS, **kwargs):
+    '''Create the search indexes, connected to post_migrate.
+
+    The statements are idempotent, so that they can run after every
+    migrate and flush.
+    '''
+    connection = connections[using]
+    statements = STATEMENTS.get(connection.vendor)
+    if statements is None:
+        return
+    with connection.cursor() as cursor:
+        for index in SEARCH_INDEXES.values():
+            for sql in statements(index, connection):
+                cursor.execute(sql)
+
+
+def fts_match(index, query):
+    '''FTS5 query string, every term quoted to escape the syntax.'''
+    query = query.replace('ё', 'е').replace('Ё', 'Е')
+    if index.kind == TRIGRAM:
+        return '"{}"'.format(query.replace('"', '""'))
+    return ' '.join(f'"{word}"*' for word in re.findall(r'\w+', query))
+
+
+def search_postgresql(index, query, connection):
+    table, column, _ = get_names(index, connection)
+    if index.kind == TRIGRAM:
+        # Both operators are served by the gin_trgm_ops index.
+        pattern = '%{}%'.format(connection.ops.prep_for_like_query(query))
+        return (
+            f'({table}.{column} ILIKE %s OR {table}.{column} %% %s)',
+            [pattern, query],
+            RawSQL(f'similarity({table}.{column}, %s)', [query]).desc(),
+        )
+    vector = f"to_tsvector('russian'::regconfig, {table}.{column})"
+    tsquery = "plainto_tsquery('russian'::regconfig, %s)"
+    return (
+        f'{vector} @@ {tsquery}', [query],
+        RawSQL(f'ts_rank({vector}, {tsquery})', [query]).desc(),
+    )
+
+
+def search_sqlite(index, query, connection):
+    table, column, search_table = get_names(index, connection)
+    matches = f'{table}.id IN (SELECT rowid FROM {search_table} WHERE {{}})'
+    if index.kind == TRIGRAM and len(query) < MIN_TRIGRAM_LENGTH:
+        # Too short for trigrams, LIKE folds the case of ASCII only.
+        pattern = '%{}%'.format(query.replace('ё', 'е').replace('Ё', 'Е'))
+        return matches.format(f'{column} LIKE %s'), [pattern], None
+    match = fts_match(index, query)
+    condition = f'{search_table} MATCH %s'
+    # bm25() is lower for better matches.
+    return matches.format(condition), [match], RawSQL(
+        f'SELECT bm25({search_table}) FROM {search_table} '
+        f'WHERE {condition} AND rowid = {table}.id', [match]
+    ).asc()
+
+
+SEARCHES = {
+    'postgresql': search_postgresql,
+    'sqlite': search_sqlite,
+}
+
+
+def search(queryset, query):
+    '''Filter the queryset by the query, best matches first.
+
+    Databases without a search backend fall back to an unranked
+    icontains. The rank is only used for ordering, so that counting the
+    matches stays a plain COUNT(*).
+    '''
+    index = SEARCH_INDEXES[queryset.model]
+    connection = connections[queryset.db]
+    backend = SEARCHES.get(connection.vendor)
+    if backend is None:
+        return queryset.filter(**{f'{index.field}__icontains': query})
+    condition, params, rank = backend(index, query, connection)
+    if not any(params):
+        return queryset.none()
+    queryset = queryset.extra(where=[condition], params=params)
+    if rank is None:
+        return queryset
+    return queryset.order_by(rank, *queryset.model._meta.ordering)
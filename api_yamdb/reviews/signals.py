@@ -0,0 +1,232 @@
+from django.db.models import Q
+from django.db.models.signals import (m2m_changed, post_delete, post_save,
+                                      pre_delete)
+from django.dispatch import Signal, receiver
+
+from .models import (Category, CategoryStats, Comment, Genre, GenreStats,
+                     Review, ScoreHistogram, Title, TitleGenre, User)
+
+# Sent after rows were written in bulk, bypassing model signals.
+data_imported = Signal(providing_args=['models'])
+
+
+def rating_contribution(score):
+    '''Return (score, count) a review adds to the rating of its title.'''
+    if score is None:
+        return 0, 0
+    return score, 1
+
+
+def shift_or_touch(title_id, score, count):
+    titles = Title.objects.filter(pk=title_id)
+    if score or count:
+        titles.shift_rating(score, count)
+        shift_facets(title_id, score, count)
+    else:
+        titles.touch()
+
+
+def shift_facets(title_id, score, count):
+    '''Add a change of the rating of a title to its genres and category.'''
+    titles = Title.objects.filter(pk=title_id)
+    GenreStats.objects.shift(titles.values('genre'), score=score, count=count)
+    CategoryStats.objects.shift(
+        titles.values('category'), score=score, count=count
+    )
+
+
+def link_title(title_id, genres, sign):
+    '''Add a title along with its rating to genres, or remove it with -1.'''
+    rating = Title.objects.filter(pk=title_id).values(
+        'rating_sum', 'rating_count'
+    ).first()
+    if rating is not None:
+        GenreStats.objects.shift(
+            genres, titles=sign, score=sign * rating['rating_sum'],
+            count=sign * rating['rating_count']
+        )
+
+
+def move_score(title_id, old_score, new_score):
+    '''Move a review from one histogram bucket of its title to another.'''
+    if old_score == new_score:
+        return
+    if old_score is not None:
+        ScoreHistogram.objects.shift(title_id, old_score, -1)
+    if new_score is not None:
+        ScoreHistogram.objects.shift(title_id, new_score, 1)
+
+
+@receiver(post_save, sender=Review)
+def add_review_to_rating(sender, instance, created, raw, **kwargs):
+    # Fixtures already carry the stored rating of their titles.
+    if raw:
+        return
+    previous = getattr(instance, '_loaded_rating', None)
+    instance._loaded_rating = (instance.title_id, instance.score)
+    score, count = rating_contribution(instance.score)
+    if created:
+        shift_or_touch(instance.title_id, score, count)
+        move_score(instance.title_id, None, instance.score)
+        return
+    if previous is None:
+        # Nothing is known about the old score, rebuild from scratch.
+        titles = Title.objects.filter(pk=instance.title_id)
+        titles.recalculate_rating()
+        GenreStats.objects.rebuild(titles.values('genre'))
+        CategoryStats.objects.rebuild(titles.values('category'))
+        return
+    title_id, previous_score = previous
+    old_score, old_count = rating_contribution(previous_score)
+    if title_id == instance.title_id:
+        shift_or_touch(title_id, score - old_score, count - old_count)
+        move_score(title_id, previous_score, instance.score)
+        return
+    shift_or_touch(title_id, -old_score, -old_count)
+    shift_or_touch(instance.title_id, score, count)
+    move_score(title_id, previous_score, None)
+    move_score(instance.title_id, None, instance.score)
+
+
+@receiver(post_delete, sender=Review)
+def remove_review_from_rating(sender, instance, **kwargs):
+    title_id, previous_score = getattr(
+        instance, '_loaded_rating', (instance.title_id, instance.score)
+    )
+    score, count = rating_contribution(previous_score)
+    shift_or_touch(title_id, -score, -count)
+    move_score(title_id, previous_score, None)
+
+
+@receiver(post_save, sender=Comment)
+@receiver(post_delete, sender=Comment)
+def touch_title_of_comment(sender, instance, raw=False, **kwargs):
+    if not raw:
+        Title.objects.filter(reviews=instance.review_id).touch()
+
+
+@receiver(post_save, sender=TitleGenre)
+@receiver(post_delete, sender=TitleGenre)
+def touch_title_of_genre_link(sender, instance, raw=False, **kwargs):
+    if not raw and instance.title_id_id is not None:
+        Title.objects.filter(pk=instance.title_id_id).touch()
+
+
+@receiver(m2m_changed, sender=TitleGenre)
+def touch_titles_of_genre_change(sender, instance, action, reverse, pk_set,
+                                 **kwargs):
+    if not action.startswith('post_'):
+        return
+    if reverse:
+        Title.objects.filter(pk__in=pk_set or ()).touch()
+    else:
+        Title.objects.filter(pk=instance.pk).touch()
+
+
+@receiver(post_save, sender=User)
+def touch_titles_of_author(sender, instance, created, raw, **kwargs):
+    if raw:
+        return
+    if not created and getattr(
+        instance, '_loaded_username', None
+    ) != instance.username:
+        Title.objects.filter(
+            Q(reviews__author=instance)
+            | Q(reviews__comments__author=instance)
+        ).touch()
+    instance._loaded_username = instance.username
+
+
+@receiver(post_save, sender=Genre)
+@receiver(pre_delete, sender=Genre)
+def touch_titles_of_genre(sender, instance, created=False, raw=False,
+                          **kwargs):
+    if not created and not raw:
+        Title.objects.filter(genre=instance).touch()
+
+
+@receiver(post_save, sender=Category)
+@receiver(pre_delete, sender=Category)
+def touch_titles_of_category(sender, instance, created=False, raw=False,
+                             **kwargs):
+    if not created and not raw:
+        Title.objects.filter(category=instance).touch()
+
+
+@receiver(post_save, sender=Genre)
+@receiver(post_save, sender=Category)
+def create_facet_stats(sender, instance, created, raw, **kwargs):
+    if created and not raw:
+        stats = GenreStats if sender is Genre else CategoryStats
+        stats.objects.create(**{stats.FACET: instance})
+
+
+@receiver(post_save, sender=Title)
+def touch_saved_title(sender, instance, created, raw, **kwargs):
+    # save() sets modified but not the version the ETags are built from.
+    if not created and not raw:
+        Title.objects.filter(pk=instance.pk).touch()
+
+
+@receiver(post_save, sender=Title)
+def update_category_stats(sender, instance, created, raw, **kwargs):
+    if raw:
+        return
+    if created:
+        CategoryStats.objects.shift(
+            [instance.category_id], titles=1, score=instance.rating_sum,
+            count=instance.rating_count
+        )
+    elif not hasattr(instance, '_loaded_category'):
+        # Nothing is known about the old category.
+        CategoryStats.objects.rebuild()
+    elif instance._loaded_category != instance.category_id:
+        CategoryStats.objects.rebuild(
+            [instance._loaded_category, instance.category_id]
+        )
+    instance._loaded_category = instance.category_id
+
+
+@receiver(pre_delete, sender=Title)
+def remember_genres_of_title(sender, instance, **kwargs):
+    # The genre links are unset before the title is gone.
+    instance._loaded_genres = list(TitleGenre.objects.filter(
+        title_id=instance.pk
+    ).values_list('genre_id', flat=True))
+
+
+@receiver(post_delete, sender=Title)
+def remove_title_from_stats(sender, instance, **kwargs):
+    # Reviews deleted with the title have already been subtracted from
+    # the category, rebuilding is simpler than undoing that.
+    GenreStats.objects.rebuild(getattr(instance, '_loaded_genres', None))
+    CategoryStats.objects.rebuild([instance.category_id])
+
+
+@receiver(post_save, sender=TitleGenre)
+def add_genre_link_to_stats(sender, instance, created, raw, **kwargs):
+    if raw or instance.title_id_id is None:
+        return
+    if not created:
+        # Nothing is known about the old genre of the link.
+        GenreStats.objects.rebuild()
+        return
+    link_title(instance.title_id_id, [instance.genre_id_id], 1)
+
+
+@receiver(post_delete, sender=TitleGenre)
+def remove_genre_link_from_stats(sender, instance, **kwargs):
+    if instance.title_id_id is not None:
+        link_title(instance.title_id_id, [instance.genre_id_id], -1)
+
+
+@receiver(m2m_changed, sender=TitleGenre)
+def add_genres_to_stats(sender, instance, action, reverse, pk_set, **kwargs):
+    # Links are added in bulk, but removed with regular deletes that
+    # send post_delete for every link.
+    if action != 'post_add':
+        return
+    if reverse:
+        GenreStats.objects.rebuild([instance.pk])
+    else:
+        link_title(instance.pk, pk_set, 1)
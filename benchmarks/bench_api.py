@@ -0,0 +1,221 @@
+'''Latency, throughput and queries per request of the main endpoints.
+
+Usage: python -m benchmarks.bench_api --reviews 1000 100000 \\
+           [--requests 500] [--cold] [--output results.json] \\
+           [--compare previous.json]
+
+Every dataset is generated with generate_csv and loaded through the ORM
+by import_csv into a throwaway test database, e.g. DB_HOST=localhost for
+PostgreSQL. Requests go through the Django test client, so the numbers
+cover the whole request cycle except the network and the WSGI server.
+With --cold the response cache is cleared before every request. The
+results are saved as JSON with the commit they were measured on, and
+--compare prints the change against an earlier file.
+'''
+import argparse
+import io
+import json
+import platform
+import statistics
+import subprocess
+import tempfile
+import time
+from collections import namedtuple
+from datetime import datetime, timezone
+from itertools import count
+
+from .common import benchmark_database, root_dir, setup_django
+from .generate_csv import generate
+
+WARMUP = 10
+
+# send(number) makes the request number of the run and returns the
+# response, status is the status code it must have.
+Scenario = namedtuple('Scenario', ('name', 'send', 'status'))
+
+
+def seed(directory, reviews):
+    '''Load a synthetic dataset and return the size of every table.'''
+    from django.core.management import call_command
+
+    sizes = generate(directory, reviews)
+    call_command(
+        'import_csv', data_dir=directory, batch_size=5000,
+        stdout=io.StringIO()
+    )
+    return sizes
+
+
+def get_scenarios():
+    '''Requests to the main endpoints, spread over the seeded data.'''
+    from api.confirmation import make_code
+    from django.db.models import Count
+    from rest_framework.test import APIClient
+    from rest_framework_simplejwt.tokens import RefreshToken
+    from reviews.models import Review, Title, User
+
+    title = Title.objects.order_by('-rating_count', 'id').first()
+    review = Review.objects.annotate(
+        comments_count=Count('comments')
+    ).order_by('-comments_count', 'id').first()
+    users = list(User.objects.order_by('id')[:100])
+    title_filters = (
+        {},
+        {'genre': 'drama'},
+        {'category': 'movie', 'year': 2000},
+        {'name': 'фильм'},
+    )
+    signups = count()
+    anonymous = APIClient()
+    authenticated = APIClient()
+    token = RefreshToken.for_user(users[0])
+    authenticated.credentials(
+        HTTP_AUTHORIZATION=f'Bearer {token.access_token}'
+    )
+
+    def signup(number):
+        # Every signup creates a new user.
+        username = f'benchmark{next(signups)}'
+        return anonymous.post('/api/v1/auth/signup/', {
+            'username': username, 'email': f'{username}@yamdb.fake'
+        })
+
+    def get_token(number):
+        user = users[number % len(users)]
+        return anonymous.post('/api/v1/auth/token/', {
+            'username': user.username, 'confirmation_code': make_code(user)
+        })
+
+    return (
+        Scenario('titles', lambda number: anonymous.get(
+            '/api/v1/titles/', title_filters[number % len(title_filters)]
+        ), 200),
+        Scenario('reviews', lambda number: anonymous.get(
+            f'/api/v1/titles/{title.id}/reviews/'
+        ), 200),
+        Scenario('comments', lambda number: anonymous.get(
+            f'/api/v1/titles/{review.title_id}/reviews/{review.id}/comments/'
+        ), 200),
+        Scenario('signup', signup, 200),
+        Scenario('token', get_token, 200),
+        Scenario('me', lambda number: authenticated.get(
+            '/api/v1/users/me/'
+        ), 200),
+    )
+
+
+def measure(scenario, requests, cold=False):
+    '''Latency percentiles in ms, requests/s and queries per request.'''
+    from django.core.cache import cache
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    for number in range(WARMUP):
+        scenario.send(number)
+    timings = []
+    with CaptureQueriesContext(connection) as queries:
+        for number in range(requests):
+            if cold:
+                cache.clear()
+            started = time.perf_counter()
+            response = scenario.send(number)
+            timings.append(time.perf_counter() - started)
+            assert response.status_code == scenario.status, (
+                scenario.name, response.status_code
+            )
+    percentiles = statistics.quantiles(timings, n=100, method='inclusive')
+    return {
+        'requests': requests,
+        'requests_per_second': requests / sum(timings),
+        'p50_ms': percentiles[49] * 1000,
+        'p95_ms': percentiles[94] * 1000,
+        'p99_ms': percentiles[98] * 1000,
+        'queries_per_request': len(queries) / requests,
+    }
+
+
+def run(scenarios, requests, cold=False):
+    return {
+        scenario.name: measure(scenario, requests, cold)
+        for scenario in scenarios
+    }
+
+
+def get_environment():
+    import django
+    from django.db import connection
+
+    try:
+        commit = subprocess.run(
+            ['git', 'rev-parse', 'HEAD'], cwd=root_dir, check=True,
+            capture_output=True, text=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'commit': commit,
+        'created': datetime.now(timezone.utc).isoformat(),
+        'python': platform.python_version(),
+        'django': django.get_version(),
+        'database': connection.vendor,
+    }
+
+
+def print_results(reviews, results, previous=None):
+    print(f'\n{reviews} reviews')
+    print(f'{"endpoint":<10} {"requests/s":>11} {"p50, ms":>8} '
+          f'{"p95, ms":>8} {"p99, ms":>8} {"queries":>8}')
+    for name, result in results.items():
+        line = (
+            f'{name:<10} {result["requests_per_second"]:>11.0f} '
+            f'{result["p50_ms"]:>8.2f} {result["p95_ms"]:>8.2f} '
+            f'{result["p99_ms"]:>8.2f} {result["queries_per_request"]:>8.2f}'
+        )
+        if previous and name in previous:
+            change = (
+                result['p50_ms'] / previous[name]['p50_ms'] - 1
+            ) * 100
+            line += f'   p50 {change:+.0f}%'
+        print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        '--reviews', type=int, nargs='+', default=[10 ** 3],
+        help='Dataset sizes, 10^3 to 10^6 reviews'
+    )
+    parser.add_argument('--requests', type=int, default=500)
+    parser.add_argument('--cold', action='store_true')
+    parser.add_argument('--output', help='File to save the results to')
+    parser.add_argument('--compare', help='Results of an earlier run')
+    args = parser.parse_args()
+    setup_django()
+
+    previous = {}
+    if args.compare:
+        with open(args.compare, encoding='utf-8') as compare_file:
+            previous = {
+                dataset['reviews']: dataset['results']
+                for dataset in json.load(compare_file)['datasets']
+            }
+    report = dict(
+        get_environment(), requests=args.requests, cold=args.cold,
+        datasets=[]
+    )
+    for reviews in args.reviews:
+        with tempfile.TemporaryDirectory() as directory, \
+                benchmark_database():
+            sizes = seed(directory, reviews)
+            results = run(get_scenarios(), args.requests, args.cold)
+        report['datasets'].append(
+            {'reviews': reviews, 'sizes': sizes, 'results': results}
+        )
+        print_results(reviews, results, previous.get(reviews))
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as output_file:
+            json.dump(report, output_file, indent=2)
+
+
+if __name__ == '__main__':
+    main()
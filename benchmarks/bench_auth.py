@@ -0,0 +1,67 @@
+'''Requests per second on /api/v1/users/me/ with plain and cached JWT
+authentication.
+
+Usage: python -m benchmarks.bench_auth [--requests 2000]
+
+Requests go through the Django test client, so the numbers cover the
+whole request cycle except the network and the WSGI server.
+'''
+import argparse
+import time
+
+from .common import benchmark_database, setup_django
+
+URL = '/api/v1/users/me/'
+
+
+def run(client, requests):
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    client.get(URL)
+    with CaptureQueriesContext(connection) as queries:
+        started = time.perf_counter()
+        for _ in range(requests):
+            response = client.get(URL)
+            assert response.status_code == 200, response.status_code
+        elapsed = time.perf_counter() - started
+    return requests / elapsed, len(queries) / requests
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--requests', type=int, default=2000)
+    args = parser.parse_args()
+    setup_django()
+    from api.authentication import CachedJWTAuthentication
+    from api.views import UserViewSet
+    from django.conf import settings
+    from rest_framework.test import APIClient
+    from rest_framework_simplejwt.authentication import JWTAuthentication
+    from rest_framework_simplejwt.tokens import RefreshToken
+    from reviews.models import User
+
+    variants = (
+        ('JWTAuthentication', JWTAuthentication),
+        ('CachedJWTAuthentication', CachedJWTAuthentication),
+    )
+    # A single process, the local memory cache is coherent here.
+    settings.AUTH_USER_CACHE_LOCAL = True
+    with benchmark_database():
+        user = User.objects.create_user(
+            username='benchmark', email='benchmark@yamdb.fake'
+        )
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=(
+            f'Bearer {RefreshToken.for_user(user).access_token}'
+        ))
+        print(f'{"authentication":<24} {"requests/s":>11} '
+              f'{"queries/request":>16}')
+        for name, authentication in variants:
+            UserViewSet.authentication_classes = (authentication,)
+            rate, queries = run(client, args.requests)
+            print(f'{name:<24} {rate:>11.0f} {queries:>16.2f}')
+
+
+if __name__ == '__main__':
+    main()
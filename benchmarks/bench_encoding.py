@@ -0,0 +1,88 @@
+'''Bytes on the wire and CPU time per response for each encoding.
+
+Usage: python -m benchmarks.bench_encoding [--reviews 10000] \\
+           [--page-size 10 50 100] [--repeat 20]
+
+Pages of titles and reviews are rendered to JSON and MessagePack and
+compressed with gzip and brotli as CompressionMiddleware does; CPU time
+covers rendering and compression, not reading the page from the base.
+'''
+import argparse
+import io
+import tempfile
+import time
+
+from .bench_serializers import get_instances
+from .common import benchmark_database, setup_django
+from .generate_csv import generate
+
+
+def get_renderers():
+    from api.renderers import FastJSONRenderer, MessagePackRenderer
+
+    return {'json': FastJSONRenderer(), 'msgpack': MessagePackRenderer()}
+
+
+def get_encodings():
+    from api import compression
+
+    encodings = [None, compression.GZIP]
+    if compression.brotli is not None:
+        encodings.append(compression.BROTLI)
+    return encodings
+
+
+def encode(renderer, encoding, data):
+    from api.compression import compress
+
+    content = renderer.render(data)
+    return content if encoding is None else compress(content, encoding)
+
+
+def measure(renderer, encoding, data, repeat):
+    '''Size of the body and CPU seconds per response.'''
+    started = time.process_time()
+    for _ in range(repeat):
+        content = encode(renderer, encoding, data)
+    return len(content), (time.process_time() - started) / repeat
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--reviews', type=int, default=10 ** 4)
+    parser.add_argument(
+        '--page-size', type=int, nargs='+', default=[10, 50, 100]
+    )
+    parser.add_argument('--repeat', type=int, default=20)
+    args = parser.parse_args()
+    setup_django()
+    from api.representation import compile_serializer
+    from django.core.management import call_command
+
+    with tempfile.TemporaryDirectory() as directory, benchmark_database():
+        generate(directory, args.reviews)
+        call_command(
+            'import_csv', data_dir=directory, batch_size=5000,
+            stdout=io.StringIO()
+        )
+        instances = get_instances(max(args.page_size))
+        print(f'{"page":<8} {"size":>5} {"format":<8} {"encoding":<9} '
+              f'{"bytes":>8} {"ratio":>6} {"CPU, ms":>8}')
+        for name in ('titles', 'reviews'):
+            serializer_class, objects = instances[name]
+            represent = compile_serializer(serializer_class)
+            for page_size in args.page_size:
+                data = [represent(obj) for obj in objects[:page_size]]
+                for format, renderer in get_renderers().items():
+                    plain = len(renderer.render(data))
+                    for encoding in get_encodings():
+                        size, cpu = measure(
+                            renderer, encoding, data, args.repeat
+                        )
+                        print(f'{name:<8} {page_size:>5} {format:<8} '
+                              f'{encoding or "identity":<9} {size:>8} '
+                              f'{size / plain:>6.2f} {cpu * 1000:>8.3f}')
+
+
+if __name__ == '__main__':
+    main()
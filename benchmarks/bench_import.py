@@ -0,0 +1,56 @@
+'''Time import_csv on synthetic dumps of growing size.
+
+Usage: python -m benchmarks.bench_import --reviews 100000 1000000 \\
+           --workers 1 4 [--copy]
+
+Every run loads a fresh dump into a throwaway test database created
+from the configured DATABASES, e.g. DB_HOST=localhost for PostgreSQL.
+'''
+import argparse
+import io
+import tempfile
+import time
+
+from .common import benchmark_database, setup_django
+from .generate_csv import generate
+
+
+def run(reviews, workers, batch_size, copy):
+    from django.core.management import call_command
+
+    with tempfile.TemporaryDirectory() as directory:
+        sizes = generate(directory, reviews)
+        with benchmark_database():
+            started = time.monotonic()
+            call_command(
+                'import_csv', data_dir=directory, workers=workers,
+                batch_size=batch_size, copy=copy, stdout=io.StringIO()
+            )
+            elapsed = time.monotonic() - started
+    rows = sum(sizes.values())
+    return rows, elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument(
+        '--reviews', type=int, nargs='+', default=[10 ** 5],
+        help='Dataset sizes, 10^5 to 10^7 reviews'
+    )
+    parser.add_argument('--workers', type=int, nargs='+', default=[1])
+    parser.add_argument('--batch-size', type=int, default=5000)
+    parser.add_argument('--copy', action='store_true')
+    args = parser.parse_args()
+    setup_django()
+
+    print(f'{"reviews":>10} {"workers":>8} {"rows":>10} '
+          f'{"seconds":>9} {"rows/s":>9}')
+    for reviews in args.reviews:
+        for workers in args.workers:
+            rows, elapsed = run(reviews, workers, args.batch_size, args.copy)
+            print(f'{reviews:>10} {workers:>8} {rows:>10} '
+                  f'{elapsed:>9.2f} {rows / elapsed:>9.0f}')
+
+
+if __name__ == '__main__':
+    main()
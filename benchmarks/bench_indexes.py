@@ -0,0 +1,115 @@
+'''Compare query plans and latency of the API reads without and with
+the composite indexes declared in reviews.models.
+
+Usage: python -m benchmarks.bench_indexes --reviews 100000 [--repeat 50]
+
+The dataset is generated and loaded with import_csv into a throwaway
+test database, e.g. DB_HOST=localhost for PostgreSQL. The indexes are
+dropped for the first pass and created again for the second one.
+'''
+import argparse
+import io
+import statistics
+import tempfile
+import time
+
+from .common import benchmark_database, setup_django
+from .generate_csv import generate
+
+PAGE_SIZE = 10
+
+
+def get_queries():
+    '''Querysets issued by the list endpoints, deep pages included.'''
+    from api.pagination import (CommentPagination, ReviewPagination,
+                                TitlePagination)
+    from reviews.models import Comment, Review, Title
+
+    title = Title.objects.order_by('-rating_count').first()
+    review = Review.objects.filter(title=title).order_by('pub_date').first()
+    reviews = Review.objects.filter(title=title)
+    last_review = reviews.order_by(*ReviewPagination.ordering)[
+        reviews.count() // 2
+    ]
+    last_title = Title.objects.order_by(*TitlePagination.ordering)[
+        Title.objects.count() // 2
+    ]
+    return {
+        'titles, first page': Title.objects.order_by(
+            *TitlePagination.ordering
+        ),
+        'titles, keyset page': Title.objects.order_by(
+            *TitlePagination.ordering
+        ).filter(TitlePagination().after(
+            [last_title.year, last_title.name, last_title.id], False
+        )),
+        'reviews, first page': Review.objects.filter(
+            title=title
+        ).order_by(*ReviewPagination.ordering),
+        'reviews, keyset page': Review.objects.filter(
+            title=title
+        ).order_by(*ReviewPagination.ordering).filter(
+            ReviewPagination().after(
+                [last_review.pub_date, last_review.id], False
+            )
+        ),
+        'comments, first page': Comment.objects.filter(
+            review=review
+        ).order_by(*CommentPagination.ordering),
+    }
+
+
+def measure(queryset, repeat):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        list(queryset[:PAGE_SIZE])
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings) * 1000
+
+
+def set_indexes(connection, enabled):
+    from reviews.models import Comment, Review, Title
+
+    with connection.schema_editor() as schema_editor:
+        for model in (Title, Review, Comment):
+            for index in model._meta.indexes:
+                if enabled:
+                    schema_editor.add_index(model, index)
+                else:
+                    schema_editor.remove_index(model, index)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--reviews', type=int, default=10 ** 5)
+    parser.add_argument('--repeat', type=int, default=50)
+    args = parser.parse_args()
+    setup_django()
+    from django.core.management import call_command
+
+    with tempfile.TemporaryDirectory() as directory, \
+            benchmark_database() as connection:
+        generate(directory, args.reviews)
+        call_command(
+            'import_csv', data_dir=directory, batch_size=5000,
+            stdout=io.StringIO()
+        )
+        queries = get_queries()
+        latency = {}
+        for enabled in (False, True):
+            set_indexes(connection, enabled)
+            label = 'with indexes' if enabled else 'without indexes'
+            for name, queryset in queries.items():
+                print(f'--- {name}, {label}')
+                print(queryset[:PAGE_SIZE].explain())
+                latency[name, enabled] = measure(queryset, args.repeat)
+
+    print(f'\n{"query":<24} {"without, ms":>12} {"with, ms":>10}')
+    for name in queries:
+        print(f'{name:<24} {latency[name, False]:>12.2f} '
+              f'{latency[name, True]:>10.2f}')
+
+
+if __name__ == '__main__':
+    main()
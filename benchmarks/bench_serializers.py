@@ -0,0 +1,94 @@
+'''Objects per second of the DRF serializers and their compiled versions.
+
+Usage: python -m benchmarks.bench_serializers [--reviews 10000] \\
+           [--objects 1000] [--repeat 5]
+
+Instances are loaded once from a synthetic dataset, so only building
+the representation and rendering it to JSON is timed.
+'''
+import argparse
+import io
+import tempfile
+import time
+
+from .common import benchmark_database, setup_django
+from .generate_csv import generate
+
+
+def get_instances(count):
+    from api.serializers import (CommentSerializer, ReviewSerializer,
+                                 TitleSerializerReadOnly)
+    from reviews.models import Comment, Review, Title
+
+    return {
+        'titles': (TitleSerializerReadOnly, list(
+            Title.objects.select_related('category').prefetch_related(
+                'genre'
+            ).order_by('id')[:count]
+        )),
+        'reviews': (ReviewSerializer, list(
+            Review.objects.select_related('author').order_by('id')[:count]
+        )),
+        'comments': (CommentSerializer, list(
+            Comment.objects.select_related('author').order_by('id')[:count]
+        )),
+    }
+
+
+def drf(serializer_class, instances):
+    from rest_framework.renderers import JSONRenderer
+
+    return JSONRenderer().render(serializer_class(instances, many=True).data)
+
+
+def compiled(serializer_class, instances):
+    from api.renderers import FastJSONRenderer
+    from api.representation import compile_serializer
+
+    represent = compile_serializer(serializer_class)
+    return FastJSONRenderer().render(
+        [represent(instance) for instance in instances]
+    )
+
+
+def measure(function, serializer_class, instances, repeat):
+    best = None
+    for _ in range(repeat):
+        started = time.perf_counter()
+        function(serializer_class, instances)
+        elapsed = time.perf_counter() - started
+        best = elapsed if best is None else min(best, elapsed)
+    return len(instances) / best
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--reviews', type=int, default=10 ** 4)
+    parser.add_argument('--objects', type=int, default=1000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+    setup_django()
+    from django.core.management import call_command
+
+    with tempfile.TemporaryDirectory() as directory, benchmark_database():
+        generate(directory, args.reviews)
+        call_command(
+            'import_csv', data_dir=directory, batch_size=5000,
+            stdout=io.StringIO()
+        )
+        print(f'{"serializer":<10} {"objects":>8} {"DRF, obj/s":>11} '
+              f'{"compiled, obj/s":>16} {"speedup":>8}')
+        for name, (serializer_class, instances) in get_instances(
+            args.objects
+        ).items():
+            assert drf(serializer_class, instances) == compiled(
+                serializer_class, instances
+            ), name
+            slow = measure(drf, serializer_class, instances, args.repeat)
+            fast = measure(compiled, serializer_class, instances, args.repeat)
+            print(f'{name:<10} {len(instances):>8} {slow:>11.0f} '
+                  f'{fast:>16.0f} {fast / slow:>7.1f}x')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,139 @@
+'''Throughput and latency of gunicorn with sync WSGI and uvicorn workers.
+
+Usage: python -m benchmarks.bench_servers [--reviews 10000] \\
+           [--concurrency 1 8 32 64] [--requests 400] [--workers 2]
+
+A synthetic dataset is loaded into a throwaway test database, then
+gunicorn is started on it for every mode with gunicorn.conf.py, the
+command of the Dockerfile. Every concurrency level sends that many
+parallel clients at the read endpoints and reports requests/s,
+p50/p95 latency and failed requests. uvicorn must be installed.
+'''
+import argparse
+import io
+import os
+import statistics
+import subprocess
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+from .common import benchmark_database, project_dir, setup_django
+from .generate_csv import generate
+
+MODES = ('wsgi', 'asgi')
+PORT = 8765
+URLS = (
+    '/api/v1/titles/',
+    '/api/v1/titles/?genre=drama',
+    '/api/v1/titles/1/',
+    '/api/v1/titles/1/reviews/',
+    # Review 1 is a review of title 2 in generate_csv datasets.
+    '/api/v1/titles/2/reviews/1/comments/',
+    '/api/v1/genres/',
+    '/api/v1/categories/',
+)
+
+
+def start_server(mode, workers, database):
+    env = dict(
+        os.environ, DJANGO_SETTINGS_MODULE='api_yamdb.settings',
+        SERVER_MODE=mode, GUNICORN_WORKERS=str(workers),
+        DB_ENGINE=database['ENGINE'], DB_NAME=database['NAME']
+    )
+    server = subprocess.Popen(
+        [
+            'gunicorn', f'api_yamdb.{mode}:application',
+            '--config', 'gunicorn.conf.py', '--bind', f'127.0.0.1:{PORT}',
+        ],
+        cwd=project_dir, env=env, stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL
+    )
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            requests.get(f'http://127.0.0.1:{PORT}/api/v1/genres/')
+            return server
+        except requests.ConnectionError:
+            time.sleep(0.2)
+    server.terminate()
+    raise RuntimeError(f'gunicorn did not start in {mode} mode')
+
+
+def load(concurrency, total):
+    '''Send total requests from concurrency clients.'''
+    sessions = [requests.Session() for _ in range(concurrency)]
+
+    def client(index):
+        timings, failures = [], 0
+        session = sessions[index]
+        for number in range(index, total, concurrency):
+            started = time.perf_counter()
+            try:
+                ok = session.get(
+                    f'http://127.0.0.1:{PORT}{URLS[number % len(URLS)]}',
+                    timeout=30
+                ).status_code == 200
+            except requests.RequestException:
+                ok = False
+            timings.append(time.perf_counter() - started)
+            failures += not ok
+        return timings, failures
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(concurrency) as executor:
+        results = list(executor.map(client, range(concurrency)))
+    elapsed = time.perf_counter() - started
+    timings = [timing for result in results for timing in result[0]]
+    percentiles = statistics.quantiles(timings, n=100, method='inclusive')
+    return {
+        'requests_per_second': len(timings) / elapsed,
+        'p50_ms': percentiles[49] * 1000,
+        'p95_ms': percentiles[94] * 1000,
+        'failures': sum(result[1] for result in results),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--reviews', type=int, default=10 ** 4)
+    parser.add_argument(
+        '--concurrency', type=int, nargs='+', default=[1, 8, 32, 64]
+    )
+    parser.add_argument('--requests', type=int, default=400)
+    parser.add_argument('--workers', type=int, default=2)
+    args = parser.parse_args()
+    setup_django()
+    from django.core.management import call_command
+
+    with tempfile.TemporaryDirectory() as directory, \
+            benchmark_database() as connection:
+        generate(directory, args.reviews)
+        call_command(
+            'import_csv', data_dir=directory, batch_size=5000,
+            stdout=io.StringIO()
+        )
+        connection.close()
+        print(f'{"mode":<5} {"clients":>8} {"requests/s":>11} '
+              f'{"p50, ms":>8} {"p95, ms":>8} {"failed":>7}')
+        for mode in MODES:
+            server = start_server(
+                mode, args.workers, connection.settings_dict
+            )
+            try:
+                for concurrency in args.concurrency:
+                    result = load(concurrency, args.requests)
+                    print(f'{mode:<5} {concurrency:>8} '
+                          f'{result["requests_per_second"]:>11.0f} '
+                          f'{result["p50_ms"]:>8.2f} '
+                          f'{result["p95_ms"]:>8.2f} '
+                          f'{result["failures"]:>7}')
+            finally:
+                server.terminate()
+                server.wait()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,43 @@
+import os
+import sys
+import tempfile
+from contextlib import contextmanager
+from os.path import abspath, dirname, join
+
+root_dir = dirname(dirname(abspath(__file__)))
+project_dir = join(root_dir, 'api_yamdb')
+sys.path.append(project_dir)
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'api_yamdb.settings')
+
+
+def setup_django():
+    import django
+    django.setup()
+
+
+@contextmanager
+def benchmark_database():
+    '''Create a throwaway test database and drop it afterwards.
+
+    SQLite gets a temporary file instead of the in-memory default, so
+    that worker processes can open the same database.
+    '''
+    from django.db import connection
+    from django.test.utils import (setup_test_environment,
+                                   teardown_test_environment)
+
+    setup_test_environment()
+    temp_dir = None
+    if connection.vendor == 'sqlite':
+        temp_dir = tempfile.TemporaryDirectory()
+        connection.settings_dict.setdefault('TEST', {})['NAME'] = join(
+            temp_dir.name, 'benchmark.sqlite3'
+        )
+    old_name = connection.creation.create_test_db(verbosity=0)
+    try:
+        yield connection
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0)
+        teardown_test_environment()
+        if temp_dir is not None:
+            temp_dir.cleanup()
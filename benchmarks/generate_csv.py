@@ -0,0 +1,137 @@
+'''Generate synthetic CSV files in the format of api/static/data.
+
+Usage: python -m benchmarks.generate_csv <directory> --reviews 100000
+'''
+import argparse
+import csv
+import os
+import random
+from datetime import datetime, timedelta
+
+WORDS = (
+    'фильм', 'книга', 'сюжет', 'герой', 'финал', 'автор', 'музыка',
+    'сцена', 'отличный', 'скучный', 'неожиданный', 'смешной', 'грустный',
+    'классика', 'рекомендую', 'перечитал', 'пересмотрел', 'великолепно',
+)
+GENRES = (
+    ('Драма', 'drama'), ('Комедия', 'comedy'), ('Вестерн', 'western'),
+    ('Фэнтези', 'fantasy'), ('Фантастика', 'sci-fi'),
+    ('Детектив', 'detective'), ('Триллер', 'thriller'),
+    ('Сказка', 'tale'), ('Гонзо', 'gonzo'), ('Роман', 'roman'),
+    ('Баллада', 'ballad'), ('Рок-н-ролл', 'rock-n-roll'),
+    ('Классика', 'classical'), ('Рок', 'rock'), ('Шансон', 'chanson'),
+)
+CATEGORIES = (('Фильм', 'movie'), ('Книга', 'book'), ('Музыка', 'music'))
+START_DATE = datetime(2019, 1, 1)
+
+
+def dataset_sizes(reviews):
+    '''Sizes of all tables for a dataset with the given number of reviews.
+
+    Every review gets its own (author, title) pair, so there are always
+    enough users for the unique review constraint.
+    '''
+    titles = max(reviews // 50, 1)
+    return {
+        'users': max(reviews // 100, reviews // titles + 1),
+        'titles': titles,
+        'review': reviews,
+        'comments': reviews,
+    }
+
+
+def text(rng, words):
+    sentence = ' '.join(rng.choice(WORDS) for _ in range(words))
+    if rng.random() < 0.1:
+        # Keep a few multiline texts, the real dump has them as well.
+        sentence += '\n' + rng.choice(WORDS)
+    return sentence.capitalize()
+
+
+def pub_date(rng):
+    date = START_DATE + timedelta(seconds=rng.randrange(3 * 365 * 86400))
+    return date.strftime('%Y-%m-%dT%H:%M:%S.') + '%03dZ' % rng.randrange(1000)
+
+
+def write_csv(directory, file_name, header, rows):
+    path = os.path.join(directory, file_name)
+    with open(path, 'w', encoding='utf-8', newline='') as csv_file:
+        writer = csv.writer(csv_file)
+        writer.writerow(header)
+        writer.writerows(rows)
+    return path
+
+
+def generate(directory, reviews, seed=0):
+    '''Write all CSV files for a dataset and return the table sizes.'''
+    rng = random.Random(seed)
+    sizes = dataset_sizes(reviews)
+    users, titles = sizes['users'], sizes['titles']
+    os.makedirs(directory, exist_ok=True)
+    write_csv(
+        directory, 'users.csv',
+        ('id', 'username', 'email', 'role', 'bio', 'first_name', 'last_name'),
+        (
+            (pk, f'user{pk}', f'user{pk}@yamdb.fake', 'user', '', '', '')
+            for pk in range(1, users + 1)
+        )
+    )
+    write_csv(
+        directory, 'category.csv', ('id', 'name', 'slug'),
+        ((pk, *category) for pk, category in enumerate(CATEGORIES, 1))
+    )
+    write_csv(
+        directory, 'genre.csv', ('id', 'name', 'slug'),
+        ((pk, *genre) for pk, genre in enumerate(GENRES, 1))
+    )
+    write_csv(
+        directory, 'titles.csv', ('id', 'name', 'year', 'category'),
+        (
+            (pk, text(rng, 3).replace('\n', ' '), rng.randint(1900, 2022),
+             rng.randint(1, len(CATEGORIES)))
+            for pk in range(1, titles + 1)
+        )
+    )
+    write_csv(
+        directory, 'genre_title.csv', ('id', 'title_id', 'genre_id'),
+        (
+            (2 * title + offset + 1, title + 1, genre)
+            for title in range(titles)
+            for offset, genre in enumerate(
+                rng.sample(range(1, len(GENRES) + 1), 2)
+            )
+        )
+    )
+    write_csv(
+        directory, 'review.csv',
+        ('id', 'title_id', 'text', 'author', 'score', 'pub_date'),
+        (
+            (pk, pk % titles + 1, text(rng, 12), (pk - 1) // titles + 1,
+             rng.randint(1, 10), pub_date(rng))
+            for pk in range(1, reviews + 1)
+        )
+    )
+    write_csv(
+        directory, 'comments.csv',
+        ('id', 'review_id', 'text', 'author', 'pub_date'),
+        (
+            (pk, rng.randint(1, reviews), text(rng, 8),
+             rng.randint(1, users), pub_date(rng))
+            for pk in range(1, sizes['comments'] + 1)
+        )
+    )
+    return sizes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('directory')
+    parser.add_argument('--reviews', type=int, default=10 ** 5)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+    sizes = generate(args.directory, args.reviews, args.seed)
+    print(', '.join(f'{table}: {size}' for table, size in sizes.items()))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,82 @@
+import pytest
+
+
+@pytest.fixture
+def category():
+    from reviews.models import Category
+    return Category.objects.create(name='Фильм', slug='movie')
+
+
+@pytest.fixture
+def genres():
+    from reviews.models import Genre
+    return [
+        Genre.objects.create(name='Драма', slug='drama'),
+        Genre.objects.create(name='Комедия', slug='comedy'),
+    ]
+
+
+@pytest.fixture
+def create_titles(category, genres):
+    from reviews.models import Title
+
+    def create(count):
+        titles = []
+        for number in range(count):
+            title = Title.objects.create(
+                name=f'Произведение {number}', year=2000 + number,
+                description='Описание', category=category
+            )
+            title.genre.set(genres)
+            titles.append(title)
+        return titles
+    return create
+
+
+@pytest.fixture
+def title(create_titles):
+    return create_titles(1)[0]
+
+
+@pytest.fixture
+def create_reviews(django_user_model):
+    from reviews.models import Review
+
+    def create(title, count):
+        return [
+            Review.objects.create(
+                title=title,
+                author=django_user_model.objects.create_user(
+                    username=f'reviewer{title.pk}_{number}',
+                    email=f'reviewer{title.pk}_{number}@yamdb.fake'
+                ),
+                text=f'Отзыв {number}',
+                score=number % 10 + 1
+            )
+            for number in range(count)
+        ]
+    return create
+
+
+@pytest.fixture
+def review(title, create_reviews):
+    return create_reviews(title, 1)[0]
+
+
+@pytest.fixture
+def create_comments(django_user_model):
+    from reviews.models import Comment
+
+    def create(review, count):
+        return [
+            Comment.objects.create(
+                review=review,
+                author=django_user_model.objects.create_user(
+                    username=f'commenter{review.pk}_{number}',
+                    email=f'commenter{review.pk}_{number}@yamdb.fake'
+                ),
+                text=f'Комментарий {number}'
+            )
+            for number in range(count)
+        ]
+    return create
@@ -0,0 +1,118 @@
+import asyncio
+import json
+
+import pytest
+
+
+def call(application, method, path, body=b'', headers=()):
+    '''Run one request through the ASGI application.'''
+    messages = []
+    request = {'type': 'http.request', 'body': body, 'more_body': False}
+
+    async def receive():
+        return request
+
+    async def send(message):
+        messages.append(message)
+
+    scope = {
+        'type': 'http',
+        'http_version': '1.1',
+        'method': method,
+        'path': path,
+        'query_string': b'',
+        'headers': [
+            (b'host', b'testserver'),
+            (b'content-length', str(len(body)).encode()),
+            *headers
+        ],
+    }
+    asyncio.run(application(scope, receive, send))
+    start, *chunks = messages
+    return start['status'], b''.join(
+        chunk.get('body', b'') for chunk in chunks
+    )
+
+
+@pytest.fixture
+def application():
+    from api_yamdb.asgi import get_asgi_application
+    application = get_asgi_application()
+    yield application
+    application.read_executor.shutdown()
+    application.write_executor.shutdown()
+
+
+@pytest.mark.django_db(transaction=True)
+class TestAsgi:
+
+    def test_read_endpoint(self, application, genres):
+        status, body = call(application, 'GET', '/api/v1/genres/')
+        assert status == 200
+        assert sorted(
+            genre['slug'] for genre in json.loads(body)['results']
+        ) == ['comedy', 'drama']
+
+    def test_write_endpoint(self, application):
+        from reviews.models import User
+
+        status, _ = call(
+            application, 'POST', '/api/v1/auth/signup/',
+            body=json.dumps({
+                'username': 'asgiuser', 'email': 'asgiuser@yamdb.fake'
+            }).encode(),
+            headers=[(b'content-type', b'application/json')]
+        )
+        assert status == 200
+        assert User.objects.filter(username='asgiuser').exists()
+
+    def test_pools(self, application):
+        def executor(method, path):
+            return application.get_executor({'method': method, 'path': path})
+
+        assert executor('GET', '/api/v1/titles/1/reviews/') is (
+            application.read_executor
+        )
+        assert executor('GET', '/api/v1/categories/') is (
+            application.read_executor
+        )
+        assert executor('POST', '/api/v1/titles/') is (
+            application.write_executor
+        ), 'Проверьте, что запись выполняется в отдельном пуле потоков'
+        assert executor('GET', '/api/v1/users/me/') is (
+            application.write_executor
+        )
+
+    def test_request_finished(self, application):
+        from django.core.signals import request_finished
+
+        finished = []
+
+        def receiver(**kwargs):
+            finished.append(True)
+
+        request_finished.connect(receiver)
+        try:
+            call(application, 'GET', '/api/v1/categories/')
+        finally:
+            request_finished.disconnect(receiver)
+        assert finished, (
+            'Проверьте, что после ответа закрываются соединения с базой'
+        )
+
+    def test_lifespan(self, application):
+        messages = iter([
+            {'type': 'lifespan.startup'}, {'type': 'lifespan.shutdown'}
+        ])
+        sent = []
+
+        async def receive():
+            return next(messages)
+
+        async def send(message):
+            sent.append(message['type'])
+
+        asyncio.run(application({'type': 'lifespan'}, receive, send))
+        assert sent == [
+            'lifespan.startup.complete', 'lifespan.shutdown.complete'
+        ]
@@ -0,0 +1,78 @@
+import pytest
+
+ME_URL = '/api/v1/users/me/'
+
+
+@pytest.mark.django_db
+class TestCachedAuthentication:
+
+    def test_me_without_queries_once_cached(self, user_client,
+                                            django_assert_num_queries):
+        with django_assert_num_queries(1):
+            response = user_client.get(ME_URL)
+        assert response.status_code == 200
+        assert response.json()['username'] == 'TestUser'
+        with django_assert_num_queries(0):
+            response = user_client.get(ME_URL)
+        assert response.status_code == 200, (
+            'Проверьте, что пользователь берётся из кэша без запросов к базе'
+        )
+
+    def test_me_update_is_seen_by_next_request(self, user_client):
+        user_client.get(ME_URL)
+        response = user_client.patch(
+            ME_URL, data={'bio': 'Новая биография', 'role': 'admin'}
+        )
+        assert response.status_code == 200
+        data = user_client.get(ME_URL).json()
+        assert data['bio'] == 'Новая биография'
+        assert data['role'] == 'user', (
+            'Проверьте, что пользователь не может поменять себе роль'
+        )
+
+    def test_role_change_invalidates_cached_user(self, user, user_client,
+                                                 admin_client):
+        assert user_client.get('/api/v1/users/').status_code == 403
+        response = admin_client.patch(
+            f'/api/v1/users/{user.username}/', data={'role': 'admin'}
+        )
+        assert response.status_code == 200
+        assert user_client.get('/api/v1/users/').status_code == 200, (
+            'Проверьте, что смена роли сразу учитывается в правах доступа'
+        )
+
+    def test_deactivated_user_is_rejected(self, user, user_client):
+        assert user_client.get(ME_URL).status_code == 200
+        user.is_active = False
+        user.save()
+        assert user_client.get(ME_URL).status_code == 401
+
+    def test_deleted_user_is_rejected(self, user, user_client):
+        assert user_client.get(ME_URL).status_code == 200
+        user.delete()
+        assert user_client.get(ME_URL).status_code == 401
+
+    def test_not_cached_in_local_memory(self, user_client, settings,
+                                        django_assert_num_queries):
+        settings.AUTH_USER_CACHE_LOCAL = False
+        user_client.get(ME_URL)
+        with django_assert_num_queries(1):
+            response = user_client.get(ME_URL)
+        assert response.status_code == 200, (
+            'Проверьте, что пользователь не кэшируется в памяти процесса, '
+            'если кэш не общий для всех процессов'
+        )
+
+    def test_me_update_keeps_role_of_database(self, user, user_client):
+        from reviews.models import User
+
+        user_client.get(ME_URL)
+        # As if the role was changed by another process.
+        User.objects.filter(pk=user.pk).update(role='moderator')
+        response = user_client.patch(ME_URL, data={'bio': 'Биография'})
+        assert response.status_code == 200
+        user.refresh_from_db()
+        assert user.role == 'moderator', (
+            'Проверьте, что изменение профиля не возвращает старую роль'
+        )
+        assert user.bio == 'Биография'
@@ -0,0 +1,186 @@
+import pytest
+from rest_framework.test import APIClient
+
+BULK_URL = '/api/v1/titles/bulk/'
+BULK_GENRES_URL = '/api/v1/titles/bulk/genres/'
+
+
+def title_data(number, genre=('drama', 'comedy'), category='movie'):
+    return {
+        'name': f'Новое произведение {number}',
+        'year': 1990 + number,
+        'description': 'Описание',
+        'genre': list(genre),
+        'category': category,
+    }
+
+
+@pytest.mark.django_db
+class TestBulkTitles:
+
+    def test_create(self, admin_client, category, genres,
+                    django_assert_max_num_queries):
+        from reviews.models import Title, TitleGenre
+
+        data = [title_data(number) for number in range(5)]
+        data[1]['genre'] = ['drama', 'drama']
+        # Token, slugs, titles with the stats of their category (one per
+        # row without RETURNING), genres with their stats, the response.
+        with django_assert_max_num_queries(20):
+            response = admin_client.post(BULK_URL, data=data, format='json')
+        assert response.status_code == 201
+        result = response.json()
+        assert [item['name'] for item in result] == [
+            item['name'] for item in data
+        ]
+        assert result[0]['genre'] == [
+            {'name': 'Драма', 'slug': 'drama'},
+            {'name': 'Комедия', 'slug': 'comedy'},
+        ]
+        assert result[0]['category'] == {'name': 'Фильм', 'slug': 'movie'}
+        assert Title.objects.count() == 5
+        assert TitleGenre.objects.count() == 9
+
+    def test_create_large_batch(self, admin_client, category, genres):
+        from django.db import connection
+        from django.test.utils import CaptureQueriesContext
+        from reviews.models import CategoryStats, GenreStats, Title
+
+        counts = []
+        for size, start in ((5, 0), (50, 5)):
+            with CaptureQueriesContext(connection) as context:
+                response = admin_client.post(BULK_URL, data=[
+                    dict(title_data(number), year=1900 + number)
+                    for number in range(start, start + size)
+                ], format='json')
+            assert response.status_code == 201
+            assert len(response.json()) == size
+            counts.append(len(context.captured_queries))
+        # Without RETURNING every title is saved with its category stats.
+        per_title = (
+            0 if connection.features.can_return_ids_from_bulk_insert else 2
+        )
+        assert counts[1] - counts[0] <= 45 * per_title, (
+            'Проверьте число запросов при создании большого списка'
+        )
+        assert Title.objects.count() == 55
+        assert CategoryStats.objects.get(
+            category=category
+        ).title_count == 55
+        assert set(GenreStats.objects.values_list(
+            'title_count', flat=True
+        )) == {55}
+
+    def test_errors_per_item(self, admin_client, category, genres):
+        from reviews.models import Title
+
+        data = [
+            title_data(0),
+            title_data(1, genre=['drama', 'western']),
+            title_data(2, category='book'),
+            dict(title_data(3), year=3000),
+            dict(title_data(4, genre=['western']), year=3000),
+        ]
+        response = admin_client.post(BULK_URL, data=data, format='json')
+        assert response.status_code == 400
+        errors = response.json()
+        assert len(errors) == 5, (
+            'Проверьте, что ошибки возвращаются для каждого элемента'
+        )
+        assert errors[0] == {}
+        assert list(errors[1]) == ['genre']
+        assert 'western' in errors[1]['genre'][0]
+        assert list(errors[2]) == ['category']
+        assert list(errors[3]) == ['year']
+        assert sorted(errors[4]) == ['genre', 'year'], (
+            'Проверьте, что элемент получает все свои ошибки сразу'
+        )
+        assert not Title.objects.exists(), (
+            'Проверьте, что при ошибке ничего не создаётся'
+        )
+
+    def test_only_admin(self, user_client, category, genres):
+        data = [title_data(0)]
+        assert APIClient().post(
+            BULK_URL, data=data, format='json'
+        ).status_code == 401
+        assert user_client.post(
+            BULK_URL, data=data, format='json'
+        ).status_code == 403
+
+    def test_empty_and_too_long(self, admin_client):
+        from api import serializers
+
+        assert admin_client.post(
+            BULK_URL, data=[], format='json'
+        ).status_code == 400
+        data = [title_data(0)] * (serializers.BULK_MAX_ITEMS + 1)
+        assert admin_client.post(
+            BULK_URL, data=data, format='json'
+        ).status_code == 400
+
+    @pytest.mark.django_db(transaction=True)
+    def test_reassign_genres(self, admin_client, client, create_titles,
+                             genres):
+        from reviews.models import Genre
+
+        titles = create_titles(3)
+        Genre.objects.create(name='Вестерн', slug='western')
+        for title in titles:
+            title.refresh_from_db()
+        versions = {title.pk: title.version for title in titles}
+        client.get('/api/v1/titles/')
+        response = admin_client.post(BULK_GENRES_URL, data=[
+            {'title': titles[0].pk, 'genre': ['western']},
+            {'title': titles[1].pk, 'genre': []},
+        ], format='json')
+        assert response.status_code == 200
+        assert [item['genre'] for item in response.json()] == [
+            [{'name': 'Вестерн', 'slug': 'western'}], []
+        ]
+        for title in titles:
+            title.refresh_from_db()
+        assert titles[0].version > versions[titles[0].pk]
+        assert titles[2].version == versions[titles[2].pk]
+        assert [
+            item['genre'] for item in client.get('/api/v1/titles/').json()[
+                'results'
+            ]
+        ][:2] == [[{'name': 'Вестерн', 'slug': 'western'}], []], (
+            'Проверьте, что кэш списка произведений сбрасывается'
+        )
+        assert titles[2].genre.count() == 2
+
+    def test_reassign_genres_queries(self, admin_client, create_titles,
+                                     django_assert_max_num_queries):
+        from reviews.models import GenreStats
+
+        titles = create_titles(30)
+        for count in (5, 30):
+            # User, titles, genres, old genres, delete, insert, rebuild of
+            # the stats of the genres, touch, the response.
+            with django_assert_max_num_queries(18):
+                response = admin_client.post(BULK_GENRES_URL, data=[
+                    {'title': title.pk, 'genre': ['drama']}
+                    for title in titles[:count]
+                ], format='json')
+            assert response.status_code == 200
+        assert dict(GenreStats.objects.values_list(
+            'genre__slug', 'title_count'
+        )) == {'drama': 30, 'comedy': 0}
+
+    def test_reassign_genres_errors(self, admin_client, create_titles):
+        titles = create_titles(1)
+        response = admin_client.post(BULK_GENRES_URL, data=[
+            {'title': titles[0].pk, 'genre': ['drama']},
+            {'title': titles[0].pk, 'genre': ['comedy']},
+            {'title': 999, 'genre': ['western']},
+            {'title': 'abc', 'genre': ['western']},
+        ], format='json')
+        assert response.status_code == 400
+        errors = response.json()
+        assert errors[0] == {}
+        assert list(errors[1]) == ['title']
+        assert sorted(errors[2]) == ['genre', 'title']
+        assert sorted(errors[3]) == ['genre', 'title']
+        assert titles[0].genre.count() == 2
@@ -0,0 +1,103 @@
+import pytest
+
+
+@pytest.mark.django_db
+class TestResponseCache:
+
+    def test_title_list_served_from_cache(self, client, create_titles,
+                                          django_assert_num_queries):
+        create_titles(2)
+        first = client.get('/api/v1/titles/')
+        assert first['X-Cache'] == 'MISS'
+        with django_assert_num_queries(0):
+            second = client.get('/api/v1/titles/')
+        assert second['X-Cache'] == 'HIT', (
+            'Проверьте, что повторный запрос `/api/v1/titles/` '
+            'отдаётся из кэша'
+        )
+        assert second.json() == first.json()
+
+    def test_query_string_is_part_of_key(self, client, create_titles):
+        create_titles(2)
+        client.get('/api/v1/titles/?year=2000&name=0')
+        assert client.get('/api/v1/titles/?name=0&year=2000')['X-Cache'] == (
+            'HIT'
+        )
+        response = client.get('/api/v1/titles/?year=2001')
+        assert response['X-Cache'] == 'MISS'
+        assert response.json()['count'] == 1
+
+    # Versions are bumped when the transaction commits, so the tests
+    # of invalidation commit for real.
+    @pytest.mark.django_db(transaction=True)
+    def test_title_change_invalidates(self, client, title):
+        client.get(f'/api/v1/titles/{title.id}/')
+        title.name = 'Новое название'
+        title.save()
+        response = client.get(f'/api/v1/titles/{title.id}/')
+        assert response['X-Cache'] == 'MISS'
+        assert response.json()['name'] == 'Новое название'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_invalidated_on_commit(self, client, title):
+        from django.db import transaction
+
+        url = f'/api/v1/titles/{title.id}/'
+        client.get(url)
+        with transaction.atomic():
+            title.name = 'Новое название'
+            title.save()
+            assert client.get(url)['X-Cache'] == 'HIT', (
+                'Проверьте, что версия кэша меняется после коммита, '
+                'а не внутри транзакции'
+            )
+        response = client.get(url)
+        assert response['X-Cache'] == 'MISS'
+        assert response.json()['name'] == 'Новое название'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_review_invalidates_rating(self, client, title, create_reviews):
+        assert client.get(f'/api/v1/titles/{title.id}/').json()['rating'] is (
+            None
+        )
+        create_reviews(title, 1)
+        response = client.get(f'/api/v1/titles/{title.id}/')
+        assert response['X-Cache'] == 'MISS'
+        assert response.json()['rating'] == 1
+
+    @pytest.mark.django_db(transaction=True)
+    def test_genre_assignment_invalidates(self, client, title, genres):
+        client.get('/api/v1/titles/')
+        title.genre.remove(genres[0])
+        response = client.get('/api/v1/titles/')
+        assert response['X-Cache'] == 'MISS'
+        assert len(response.json()['results'][0]['genre']) == 1
+
+    @pytest.mark.django_db(transaction=True)
+    def test_genre_change_invalidates(self, client, title, genres):
+        client.get('/api/v1/genres/')
+        client.get('/api/v1/titles/')
+        genres[0].name = 'Трагедия'
+        genres[0].save()
+        assert client.get('/api/v1/genres/')['X-Cache'] == 'MISS'
+        assert client.get('/api/v1/titles/')['X-Cache'] == 'MISS'
+
+    @pytest.mark.django_db(transaction=True)
+    def test_write_through_api_invalidates(self, client, admin_client,
+                                           category):
+        client.get('/api/v1/categories/')
+        response = admin_client.post(
+            '/api/v1/categories/', data={'name': 'Музыка', 'slug': 'music'}
+        )
+        assert response.status_code == 201
+        response = client.get('/api/v1/categories/')
+        assert response['X-Cache'] == 'MISS'
+        assert response.json()['count'] == 2
+
+    def test_stats(self, client, admin_client, user_client, title):
+        client.get('/api/v1/titles/')
+        client.get('/api/v1/titles/')
+        assert user_client.get('/api/v1/cache/stats/').status_code == 403
+        response = admin_client.get('/api/v1/cache/stats/')
+        assert response.status_code == 200
+        assert response.json()['titles'] == {'hits': 1, 'misses': 1}
@@ -0,0 +1,120 @@
+import gzip
+import zlib
+
+import pytest
+
+EXPORT_URL = '/api/v1/export/titles/'
+TITLES_URL = '/api/v1/titles/'
+
+
+@pytest.mark.django_db
+class TestCompression:
+
+    def test_gzip(self, client, create_titles):
+        create_titles(20)
+        plain = client.get(TITLES_URL)
+        response = client.get(TITLES_URL, HTTP_ACCEPT_ENCODING='gzip')
+        assert response['Content-Encoding'] == 'gzip'
+        assert 'Accept-Encoding' in response['Vary']
+        assert int(response['Content-Length']) < len(plain.content), (
+            'Проверьте, что сжатый ответ меньше исходного'
+        )
+        assert gzip.decompress(response.content) == plain.content
+
+    def test_brotli(self, client, create_titles):
+        brotli = pytest.importorskip('brotli')
+        create_titles(20)
+        plain = client.get(TITLES_URL)
+        response = client.get(
+            TITLES_URL, HTTP_ACCEPT_ENCODING='gzip, deflate, br'
+        )
+        assert response['Content-Encoding'] == 'br'
+        assert brotli.decompress(response.content) == plain.content
+        response = client.get(
+            TITLES_URL, HTTP_ACCEPT_ENCODING='br;q=0, gzip'
+        )
+        assert response['Content-Encoding'] == 'gzip'
+
+    def test_threshold(self, client, title):
+        response = client.get(
+            f'{TITLES_URL}{title.id}/', HTTP_ACCEPT_ENCODING='gzip'
+        )
+        assert not response.has_header('Content-Encoding'), (
+            'Проверьте, что короткие ответы не сжимаются'
+        )
+
+    def test_identity(self, client, create_titles):
+        create_titles(20)
+        for header in ('', 'identity', 'gzip;q=0'):
+            response = client.get(TITLES_URL, HTTP_ACCEPT_ENCODING=header)
+            assert not response.has_header('Content-Encoding'), header
+            assert 'Accept-Encoding' in response['Vary']
+
+    def test_etag(self, client, create_titles):
+        create_titles(20)
+        response = client.get(TITLES_URL, HTTP_ACCEPT_ENCODING='gzip')
+        assert response['ETag'].startswith('W/"'), (
+            'Проверьте, что ETag сжатого ответа слабый'
+        )
+        assert client.get(
+            TITLES_URL, HTTP_ACCEPT_ENCODING='gzip',
+            HTTP_IF_NONE_MATCH=response['ETag']
+        ).status_code == 304
+
+    def test_streaming(self, admin_client, create_titles):
+        create_titles(20)
+        plain = b''.join(admin_client.get(EXPORT_URL).streaming_content)
+        response = admin_client.get(EXPORT_URL, HTTP_ACCEPT_ENCODING='gzip')
+        assert response.streaming
+        assert response['Content-Encoding'] == 'gzip'
+        assert not response.has_header('Content-Length')
+        assert gzip.decompress(
+            b''.join(response.streaming_content)
+        ) == plain
+
+    def test_streaming_size(self, admin_client, create_titles):
+        create_titles(200)
+        plain = b''.join(admin_client.get(EXPORT_URL).streaming_content)
+        response = admin_client.get(EXPORT_URL, HTTP_ACCEPT_ENCODING='gzip')
+        streamed = b''.join(response.streaming_content)
+        assert gzip.decompress(streamed) == plain
+        assert len(streamed) <= len(gzip.compress(plain)) * 1.05, (
+            'Проверьте, что потоковое сжатие не сбрасывается после '
+            'каждой строки'
+        )
+
+    def test_streaming_flush(self, admin_client, create_titles, settings):
+        settings.COMPRESSION = dict(
+            settings.COMPRESSION, STREAM_FLUSH_SIZE=256
+        )
+        create_titles(20)
+        response = admin_client.get(EXPORT_URL, HTTP_ACCEPT_ENCODING='gzip')
+        pieces = list(response.streaming_content)
+        assert len(pieces) > 2, (
+            'Проверьте, что длинный поток сбрасывается частями'
+        )
+        decompressor = zlib.decompressobj(16 + zlib.MAX_WBITS)
+        assert decompressor.decompress(b''.join(pieces[:2])), (
+            'Проверьте, что начало потока распаковывается до его конца'
+        )
+
+
+@pytest.mark.django_db
+class TestMessagePack:
+
+    def test_titles(self, client, title):
+        msgpack = pytest.importorskip('msgpack')
+        url = f'{TITLES_URL}{title.id}/'
+        response = client.get(url, HTTP_ACCEPT='application/msgpack')
+        assert response.status_code == 200
+        assert response['Content-Type'] == 'application/msgpack'
+        assert msgpack.unpackb(response.content) == client.get(url).json(), (
+            'Проверьте, что MessagePack отдаёт те же данные, что и JSON'
+        )
+
+    def test_reviews(self, client, title, create_reviews):
+        msgpack = pytest.importorskip('msgpack')
+        create_reviews(title, 3)
+        url = f'{TITLES_URL}{title.id}/reviews/'
+        response = client.get(url, HTTP_ACCEPT='application/msgpack')
+        assert msgpack.unpackb(response.content) == client.get(url).json()
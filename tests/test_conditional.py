@@ -0,0 +1,135 @@
+import pytest
+from django.core.cache import cache
+
+
+@pytest.mark.django_db
+class TestConditionalRequests:
+
+    def test_reviews_not_modified(self, client, title, create_reviews,
+                                  django_assert_num_queries):
+        create_reviews(title, 3)
+        url = f'/api/v1/titles/{title.id}/reviews/'
+        response = client.get(url)
+        assert response.status_code == 200
+        assert response.has_header('ETag') and response.has_header(
+            'Last-Modified'
+        ), f'Проверьте, что `{url}` отдаёт ETag и Last-Modified'
+        with django_assert_num_queries(1):
+            cached = client.get(url, HTTP_IF_NONE_MATCH=response['ETag'])
+        assert cached.status_code == 304
+        assert not cached.content
+
+    def test_reviews_modified_since(self, client, title, create_reviews):
+        create_reviews(title, 1)
+        url = f'/api/v1/titles/{title.id}/reviews/'
+        response = client.get(url)
+        cached = client.get(
+            url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified']
+        )
+        assert cached.status_code == 304
+
+    def test_new_review_changes_etag(self, client, title, create_reviews):
+        url = f'/api/v1/titles/{title.id}/reviews/'
+        etag = client.get(url)['ETag']
+        create_reviews(title, 1)
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200
+        assert response['ETag'] != etag
+
+    def test_edited_review_changes_etag(self, client, title, review):
+        url = f'/api/v1/titles/{title.id}/reviews/{review.id}/'
+        etag = client.get(url)['ETag']
+        review.text = 'Исправленный отзыв'
+        review.save()
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200
+        assert response.json()['text'] == 'Исправленный отзыв'
+
+    def test_pages_have_own_etags(self, client, title, create_reviews):
+        create_reviews(title, 3)
+        url = f'/api/v1/titles/{title.id}/reviews/'
+        first = client.get(f'{url}?limit=1')['ETag']
+        second = client.get(f'{url}?limit=1&offset=1')['ETag']
+        assert first != second
+
+    def test_comments(self, client, title, review, create_comments,
+                      django_assert_num_queries):
+        url = f'/api/v1/titles/{title.id}/reviews/{review.id}/comments/'
+        etag = client.get(url)['ETag']
+        with django_assert_num_queries(1):
+            assert client.get(
+                url, HTTP_IF_NONE_MATCH=etag
+            ).status_code == 304
+        create_comments(review, 1)
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200
+        assert len(response.json()['results']) == 1
+
+    # Commits, so that the version of the cache namespace is bumped.
+    @pytest.mark.django_db(transaction=True)
+    def test_titles(self, client, title, genres, settings,
+                    django_assert_num_queries):
+        # Without cached responses, only the validators are left.
+        settings.API_CACHE_TTL = {}
+        etag = client.get('/api/v1/titles/')['ETag']
+        with django_assert_num_queries(0):
+            assert client.get(
+                '/api/v1/titles/', HTTP_IF_NONE_MATCH=etag
+            ).status_code == 304, (
+                'Проверьте, что список произведений проверяется по версии '
+                'в кэше, без запросов к базе'
+            )
+        genres[0].name = 'Трагедия'
+        genres[0].save()
+        response = client.get('/api/v1/titles/', HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200
+        # A lost version starts anew, old validators no longer match.
+        cache.clear()
+        assert client.get(
+            '/api/v1/titles/', HTTP_IF_NONE_MATCH=response['ETag']
+        ).status_code == 200
+
+    def test_title_detail(self, client, title):
+        url = f'/api/v1/titles/{title.id}/'
+        etag = client.get(url)['ETag']
+        assert client.get(url, HTTP_IF_NONE_MATCH=etag).status_code == 304
+        assert client.get('/api/v1/titles/abc/').status_code == 404
+
+    # Commits, so that the cached responses are invalidated too.
+    @pytest.mark.django_db(transaction=True)
+    def test_title_edit_changes_etag(self, client, admin_client, title):
+        url = f'/api/v1/titles/{title.id}/'
+        etag = client.get(url)['ETag']
+        list_etag = client.get('/api/v1/titles/')['ETag']
+        assert admin_client.patch(
+            url, data={'name': 'Новое название'}
+        ).status_code == 200
+        response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+        assert response.status_code == 200, (
+            'Проверьте, что изменение произведения меняет его ETag'
+        )
+        assert response.json()['name'] == 'Новое название'
+        assert client.get(
+            '/api/v1/titles/', HTTP_IF_NONE_MATCH=list_etag
+        ).status_code == 200
+
+    def test_author_rename_changes_etag(self, client, title, review,
+                                        create_comments):
+        create_comments(review, 1)
+        urls = (
+            f'/api/v1/titles/{title.id}/reviews/',
+            f'/api/v1/titles/{title.id}/reviews/{review.id}/comments/',
+        )
+        etags = [client.get(url)['ETag'] for url in urls]
+        author = review.author.__class__.objects.get(pk=review.author_id)
+        author.username = 'renamed'
+        author.save()
+        for url, etag in zip(urls, etags):
+            response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+            assert response.status_code == 200, (
+                'Проверьте, что смена имени автора меняет ETag отзывов '
+                'и комментариев'
+            )
+        assert client.get(urls[0]).json()['results'][0]['author'] == (
+            'renamed'
+        )
@@ -0,0 +1,117 @@
+import time
+
+import pytest
+
+TOKEN_URL = '/api/v1/auth/token/'
+
+
+@pytest.fixture(autouse=True)
+def reset_limiter():
+    from api.confirmation import limiter
+    limiter.failures.clear()
+
+
+@pytest.mark.django_db
+class TestConfirmationCode:
+
+    def test_code_from_signup_email(self, client):
+        from reviews.models import OutgoingEmail
+
+        client.post('/api/v1/auth/signup/', data={
+            'username': 'newuser', 'email': 'newuser@yamdb.fake'
+        })
+        code = OutgoingEmail.objects.get().body.rsplit(' ', 1)[-1]
+        response = client.post(TOKEN_URL, data={
+            'username': 'newuser', 'confirmation_code': code
+        })
+        assert response.status_code == 200
+        assert 'token' in response.json()
+
+    @pytest.mark.parametrize('code', ['', '-', 'abc', 'zzzzzz-0123', '1-2-3'])
+    def test_bad_code_rejected_without_queries(self, client, user, code,
+                                               django_assert_num_queries):
+        with django_assert_num_queries(0):
+            response = client.post(TOKEN_URL, data={
+                'username': user.username, 'confirmation_code': code
+            })
+        assert response.status_code == 400, (
+            'Проверьте, что неверный код отклоняется без запросов к базе'
+        )
+
+    def test_code_of_other_user_and_expired_code(self, client, user,
+                                                 moderator):
+        from api.confirmation import make_code
+
+        for code in (
+            make_code(moderator),
+            make_code(user, now=time.time() - 2 * 24 * 60 * 60),
+        ):
+            response = client.post(TOKEN_URL, data={
+                'username': user.username, 'confirmation_code': code
+            })
+            assert response.status_code == 400
+
+    def test_failures_are_rate_limited(self, client, user, settings,
+                                       django_assert_num_queries):
+        from api.confirmation import make_code
+
+        for _ in range(settings.CONFIRMATION_CODE['MAX_FAILURES']):
+            response = client.post(TOKEN_URL, data={
+                'username': user.username, 'confirmation_code': 'wrong'
+            })
+            assert response.status_code == 400
+        with django_assert_num_queries(0):
+            response = client.post(TOKEN_URL, data={
+                'username': user.username,
+                'confirmation_code': make_code(user)
+            })
+        assert response.status_code == 429, (
+            'Проверьте, что после нескольких неверных кодов запросы '
+            'отклоняются'
+        )
+        assert 'Retry-After' in response
+        response = client.post(TOKEN_URL, data={
+            'username': 'OtherUser', 'confirmation_code': 'wrong'
+        })
+        assert response.status_code == 400
+
+    def test_limiter_window_expires(self):
+        from api.confirmation import FailureLimiter
+
+        limiter = FailureLimiter(max_failures=2, window=10)
+        limiter.fail('user', now=0)
+        assert limiter.retry_after('user', now=1) is None
+        limiter.fail('user', now=1)
+        assert limiter.retry_after('user', now=5) == 5
+        assert limiter.retry_after('user', now=10) is None
+
+    def test_code_bound_to_account(self, client, user, django_user_model):
+        from api.confirmation import make_code
+
+        code = make_code(user)
+        user.delete()
+        django_user_model.objects.create_user(
+            username=user.username, email=user.email
+        )
+        response = client.post(TOKEN_URL, data={
+            'username': user.username, 'confirmation_code': code
+        })
+        assert response.status_code == 400, (
+            'Проверьте, что код пользователя не подходит к новой учётной '
+            'записи с тем же именем'
+        )
+
+    def test_limiter_keeps_max_keys(self):
+        from api.confirmation import FailureLimiter
+
+        limiter = FailureLimiter(max_failures=2, window=10, max_keys=2)
+        limiter.fail('first', now=0)
+        limiter.fail('first', now=0)
+        for key in ('second', 'third', 'fourth'):
+            limiter.fail(key, now=1)
+        assert len(limiter.failures) == 2
+        assert list(limiter.failures) == ['third', 'fourth']
+        limiter.fail('third', now=2)
+        limiter.fail('fifth', now=2)
+        assert list(limiter.failures) == ['third', 'fifth']
+        assert limiter.retry_after('third', now=3) == 8
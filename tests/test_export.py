@@ -0,0 +1,168 @@
+import io
+import json
+
+import pytest
+from django.core.management import CommandError, call_command
+from django.db import connection
+
+EXPORT_URL = '/api/v1/export/{}/'
+
+
+def streamed(response):
+    assert response.status_code == 200
+    assert response.streaming, 'Проверьте, что выгрузка отдаётся потоком'
+    return b''.join(response.streaming_content).decode()
+
+
+def snapshot():
+    from reviews.management.commands.import_csv import TABLES
+
+    return {
+        table.name: list(
+            table.model.objects.order_by('pk').values_list(*table.columns)
+        )
+        for table in TABLES
+    }
+
+
+@pytest.mark.django_db
+class TestExport:
+
+    def test_round_trip(self, tmp_path, create_titles, create_reviews,
+                        create_comments):
+        from reviews.management.commands.import_csv import TABLES
+        from reviews.models import Title
+
+        titles = create_titles(2)
+        reviews = create_reviews(titles[0], 3) + create_reviews(titles[1], 2)
+        create_comments(reviews[0], 2)
+        expected = snapshot()
+        ratings = {
+            title.pk: (title.rating_sum, title.rating_count)
+            for title in Title.objects.all()
+        }
+        call_command(
+            'export_data', output_dir=str(tmp_path), chunk_size=2,
+            stdout=io.StringIO()
+        )
+        for table in reversed(TABLES):
+            table.model.objects.all().delete()
+        call_command(
+            'import_csv', data_dir=str(tmp_path), stdout=io.StringIO()
+        )
+        assert snapshot() == expected, (
+            'Проверьте, что выгрузка загружается обратно командой import_csv'
+        )
+        assert {
+            title.pk: (title.rating_sum, title.rating_count)
+            for title in Title.objects.all()
+        } == ratings
+
+    def test_resume(self, tmp_path, create_titles):
+        titles = create_titles(3)
+        call_command(
+            'export_data', output_dir=str(tmp_path), only=['titles'],
+            stdout=io.StringIO()
+        )
+        full = (tmp_path / 'titles.csv').read_text(encoding='utf-8')
+        (tmp_path / 'titles.csv').write_text(
+            ''.join(full.splitlines(keepends=True)[:2]), encoding='utf-8'
+        )
+        call_command(
+            'export_data', output_dir=str(tmp_path), only=['titles'],
+            after=titles[0].pk, stdout=io.StringIO()
+        )
+        assert (tmp_path / 'titles.csv').read_text(encoding='utf-8') == full
+
+    def test_resume_two_tables(self, tmp_path, create_titles):
+        titles = create_titles(3)
+        only = ['titles', 'genre_title']
+        call_command(
+            'export_data', output_dir=str(tmp_path), only=only,
+            stdout=io.StringIO()
+        )
+        full = {}
+        for name in ('titles.csv', 'genre_title.csv'):
+            full[name] = (tmp_path / name).read_text(encoding='utf-8')
+        # Interrupted after the first title and the first genre link.
+        watermarks = {}
+        for table_name, name in zip(only, full):
+            lines = full[name].splitlines(keepends=True)[:2]
+            (tmp_path / name).write_text(''.join(lines), encoding='utf-8')
+            watermarks[table_name] = int(lines[1].split(',')[0])
+        assert watermarks['titles'] == titles[0].pk
+        with pytest.raises(CommandError):
+            call_command(
+                'export_data', output_dir=str(tmp_path), only=only,
+                after=watermarks['titles'], stdout=io.StringIO()
+            )
+        for table_name in only:
+            call_command(
+                'export_data', output_dir=str(tmp_path), only=[table_name],
+                after=watermarks[table_name], stdout=io.StringIO()
+            )
+        for name, text in full.items():
+            assert (tmp_path / name).read_text(encoding='utf-8') == text, (
+                'Проверьте, что каждая таблица продолжается со своего id'
+            )
+
+    def test_endpoint(self, admin_client, create_titles):
+        titles = create_titles(3)
+        lines = streamed(admin_client.get(
+            EXPORT_URL.format('titles'), {'after': titles[0].pk}
+        )).splitlines()
+        assert lines[0] == 'id,name,year,description,category'
+        assert [line.split(',')[0] for line in lines[1:]] == [
+            str(title.pk) for title in titles[1:]
+        ]
+        response = admin_client.get(
+            EXPORT_URL.format('genre'), {'output': 'ndjson'}
+        )
+        assert response['Content-Type'].startswith('application/x-ndjson')
+        assert 'genre.ndjson' in response['Content-Disposition']
+        assert [
+            json.loads(line) for line in streamed(response).splitlines()
+        ] == [
+            {'id': genre.pk, 'name': genre.name, 'slug': genre.slug}
+            for genre in titles[0].genre.order_by('pk')
+        ]
+
+    def test_errors(self, admin_client, user_client):
+        assert user_client.get(
+            EXPORT_URL.format('titles')
+        ).status_code == 403
+        assert admin_client.get(
+            EXPORT_URL.format('unknown')
+        ).status_code == 404
+        assert admin_client.get(
+            EXPORT_URL.format('titles'), {'output': 'xml'}
+        ).status_code == 400
+
+
+@pytest.mark.skipif(
+    connection.vendor != 'postgresql',
+    reason='COPY is PostgreSQL only, run with '
+    '--ds=api_yamdb.settings_test_postgres'
+)
+@pytest.mark.django_db
+def test_import_copy(tmp_path, create_titles, create_reviews):
+    from reviews.management.commands.import_csv import TABLES
+    from reviews.models import Title, User
+
+    create_reviews(create_titles(2)[0], 3)
+    expected = snapshot()
+    call_command(
+        'export_data', output_dir=str(tmp_path), stdout=io.StringIO()
+    )
+    for table in reversed(TABLES):
+        table.model.objects.all().delete()
+    call_command(
+        'import_csv', data_dir=str(tmp_path), copy=True,
+        stdout=io.StringIO()
+    )
+    assert snapshot() == expected, (
+        'Проверьте, что import_csv --copy заполняет столбцы, '
+        'которых нет в CSV'
+    )
+    assert User.objects.filter(is_active=True).count() == User.objects.count()
+    assert Title.objects.filter(modified__isnull=False).count() == 2
@@ -0,0 +1,170 @@
+import io
+
+import pytest
+from django.core.management import call_command
+
+# Count of genres or categories, then the page with their stats.
+FACET_QUERIES = 2
+
+
+def stored_stats():
+    from reviews.models import CategoryStats, GenreStats
+
+    return [
+        sorted(model.objects.values_list(
+            model.FACET, 'title_count', 'rating_sum', 'rating_count'
+        ))
+        for model in (GenreStats, CategoryStats)
+    ]
+
+
+def assert_consistent():
+    '''Check the stats kept by signals against a rebuild from scratch.'''
+    kept = stored_stats()
+    call_command('rebuild_facets', stdout=io.StringIO())
+    assert kept == stored_stats(), (
+        'Проверьте, что статистика жанров и категорий обновляется '
+        'при изменении произведений и отзывов'
+    )
+
+
+@pytest.mark.django_db
+class TestFacets:
+
+    def test_genre_stats(self, client, title, create_titles,
+                         create_reviews):
+        from reviews.models import Genre
+
+        Genre.objects.create(name='Вестерн', slug='western')
+        other = create_titles(2)[1]
+        other.genre.remove(other.genre.get(slug='comedy'))
+        create_reviews(title, 3)  # scores 1, 2, 3
+        response = client.get('/api/v1/genres/?with_stats=1')
+        assert response.status_code == 200
+        assert {
+            genre['slug']: genre for genre in response.json()['results']
+        } == {
+            'comedy': {
+                'name': 'Комедия', 'slug': 'comedy', 'title_count': 2,
+                'review_count': 3, 'rating': 2.0,
+            },
+            'drama': {
+                'name': 'Драма', 'slug': 'drama', 'title_count': 3,
+                'review_count': 3, 'rating': 2.0,
+            },
+            'western': {
+                'name': 'Вестерн', 'slug': 'western', 'title_count': 0,
+                'review_count': 0, 'rating': None,
+            },
+        }
+        assert_consistent()
+
+    def test_category_stats(self, client, title, create_reviews):
+        create_reviews(title, 2)
+        response = client.get('/api/v1/categories/?with_stats=1')
+        assert response.json()['results'] == [{
+            'name': 'Фильм', 'slug': 'movie', 'title_count': 1,
+            'review_count': 2, 'rating': 1.5,
+        }]
+
+    def test_without_stats(self, client, title):
+        response = client.get('/api/v1/genres/?with_stats=0')
+        assert set(response.json()['results'][0]) == {'name', 'slug'}
+        assert client.get(
+            '/api/v1/genres/?with_stats=maybe'
+        ).status_code == 400
+
+    @pytest.mark.parametrize('count', [1, 10])
+    def test_queries(self, client, create_titles, django_assert_num_queries,
+                     count):
+        create_titles(count)
+        for url in ('/api/v1/genres/', '/api/v1/categories/'):
+            with django_assert_num_queries(FACET_QUERIES):
+                response = client.get(f'{url}?with_stats=1')
+            assert response.json()['results'][0]['title_count'] == count, (
+                'Проверьте, что статистика не пересчитывается по '
+                'произведениям при каждом запросе'
+            )
+
+    def test_not_cached(self, client, title, create_reviews):
+        client.get('/api/v1/genres/?with_stats=1')
+        create_reviews(title, 1)
+        response = client.get('/api/v1/genres/?with_stats=1')
+        assert response.json()['results'][0]['review_count'] == 1
+
+
+@pytest.mark.django_db
+class TestFacetUpdates:
+
+    def test_reviews(self, title, create_reviews, user_client,
+                     moderator_client):
+        reviews = create_reviews(title, 4)
+        review = reviews[0]
+        review.score = 10
+        review.save()
+        reviews[1].delete()
+        url = f'/api/v1/titles/{title.id}/reviews/'
+        user_client.post(url, data={'text': 'Отзыв', 'score': 7})
+        moderator_client.delete(f'{url}{reviews[2].id}/')
+        assert_consistent()
+
+    def test_titles_through_api(self, admin_client, category, genres,
+                                user):
+        from reviews.models import Category, Review
+
+        Category.objects.create(name='Книга', slug='book')
+        response = admin_client.post('/api/v1/titles/', data={
+            'name': 'Произведение', 'year': 2000, 'category': 'movie',
+            'genre': ['drama', 'comedy'],
+        })
+        title_id = response.json()['id']
+        Review.objects.create(
+            title_id=title_id, author=user, text='Отзыв', score=8
+        )
+        assert_consistent()
+        assert admin_client.patch(f'/api/v1/titles/{title_id}/', data={
+            'category': 'book', 'genre': ['comedy'],
+        }).status_code == 200
+        assert_consistent()
+        assert admin_client.delete(
+            f'/api/v1/titles/{title_id}/'
+        ).status_code == 204
+        assert_consistent()
+
+    def test_bulk(self, admin_client, title, category, genres,
+                  create_reviews):
+        create_reviews(title, 2)
+        assert admin_client.post('/api/v1/titles/bulk/', data=[{
+            'name': 'Ещё одно', 'year': 2001, 'category': 'movie',
+            'genre': ['drama'],
+        }], format='json').status_code == 201
+        assert_consistent()
+        assert admin_client.post('/api/v1/titles/bulk/genres/', data=[{
+            'title': title.id, 'genre': ['comedy'],
+        }], format='json').status_code == 200
+        assert_consistent()
+
+    def test_genre_links(self, title, genres):
+        from reviews.models import TitleGenre
+
+        genres[0].title_set.remove(title)
+        assert_consistent()
+        genres[0].title_set.add(title)
+        assert_consistent()
+        title.genre.clear()
+        assert_consistent()
+        TitleGenre.objects.create(title_id=title, genre_id=genres[1])
+        assert_consistent()
+
+    def test_rebuild_command(self, title, create_reviews):
+        from reviews.models import GenreStats
+
+        create_reviews(title, 2)
+        GenreStats.objects.all().delete()
+        out = io.StringIO()
+        call_command('rebuild_facets', stdout=out)
+        assert 'Stats rebuilt for 2 genres and 1 categories.' in (
+            out.getvalue()
+        )
+        stats = GenreStats.objects.get(genre=title.genre.first())
+        assert stats.rating == 1.5
@@ -0,0 +1,97 @@
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+
+def get(client, url):
+    with CaptureQueriesContext(connection) as context:
+        response = client.get(url)
+    assert response.status_code == 200
+    return response.json(), ' '.join(
+        query['sql'] for query in context.captured_queries
+    )
+
+
+@pytest.mark.django_db
+class TestFieldsets:
+
+    def test_title_fields(self, client, create_titles):
+        create_titles(3)
+        data, sql = get(client, '/api/v1/titles/?fields=id,name,rating')
+        assert [set(title) for title in data['results']] == [
+            {'id', 'name', 'rating'}
+        ] * 3
+        assert 'reviews_category' not in sql, (
+            'Проверьте, что категория не загружается, если она не запрошена'
+        )
+        assert 'reviews_titlegenre' not in sql, (
+            'Проверьте, что жанры не загружаются, если они не запрошены'
+        )
+        assert '"description"' not in sql
+
+    def test_title_default(self, client, title):
+        data, _ = get(client, f'/api/v1/titles/{title.id}/')
+        assert data['category'] == {'name': 'Фильм', 'slug': 'movie'}
+        assert len(data['genre']) == 2
+        assert 'description' in data
+
+    def test_expand(self, client, title):
+        data, _ = get(
+            client, f'/api/v1/titles/{title.id}/?fields=id,genre,category'
+            '&expand=genre'
+        )
+        assert data == {
+            'id': title.id,
+            'genre': [
+                {'name': 'Драма', 'slug': 'drama'},
+                {'name': 'Комедия', 'slug': 'comedy'},
+            ],
+            'category': 'movie',
+        }
+        data, _ = get(client, f'/api/v1/titles/{title.id}/?expand=')
+        assert data['genre'] == ['drama', 'comedy']
+        assert data['category'] == 'movie'
+
+    def test_compiled_matches_serializer(self, title):
+        from api.representation import compile_serializer
+        from api.serializers import TitleSerializerReadOnly
+
+        options = {'fields': ('category', 'genre', 'id'), 'expand': ()}
+        assert compile_serializer(TitleSerializerReadOnly, **options)(
+            title
+        ) == TitleSerializerReadOnly(title, **options).data
+
+    def test_unknown(self, client, title):
+        response = client.get('/api/v1/titles/?fields=id,password')
+        assert response.status_code == 400
+        assert 'fields' in response.json()
+        response = client.get('/api/v1/titles/?expand=year')
+        assert response.status_code == 400
+        assert 'expand' in response.json()
+
+    def test_keyset_page(self, client, create_titles):
+        create_titles(3)
+        data, sql = get(
+            client, '/api/v1/titles/?cursor=&page_size=2&fields=id'
+        )
+        # Only the page: neither the validators nor the cursor need a query.
+        assert sql.count('SELECT') == 1
+        next_data, _ = get(client, data['next'])
+        assert [title['id'] for title in data['results']] + [
+            title['id'] for title in next_data['results']
+        ] == [1, 2, 3]
+
+    def test_reviews_and_comments(self, client, title, review,
+                                  create_comments):
+        create_comments(review, 2)
+        url = f'/api/v1/titles/{title.id}/reviews/'
+        data, sql = get(client, f'{url}?fields=id,score')
+        assert data['results'] == [{'id': review.id, 'score': review.score}]
+        assert 'reviews_user' not in sql
+        data, _ = get(client, f'{url}{review.id}/?fields=author')
+        assert data == {'author': review.author.username}
+        data, sql = get(client, f'{url}{review.id}/comments/?fields=text')
+        assert {comment['text'] for comment in data['results']} == {
+            'Комментарий 0', 'Комментарий 1'
+        }
+        assert 'reviews_user' not in sql
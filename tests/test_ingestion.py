@@ -0,0 +1,189 @@
+import io
+
+import pytest
+from django.core.management import call_command
+
+from .fixtures.fixture_user import get_client
+
+
+@pytest.fixture
+def write_behind(settings):
+    settings.REVIEW_INGESTION = dict(
+        settings.REVIEW_INGESTION, WRITE_BEHIND=True
+    )
+
+
+def reviews_url(title):
+    return f'/api/v1/titles/{title.id}/reviews/'
+
+
+def make_clients(django_user_model, count):
+    return [
+        get_client(django_user_model.objects.create_user(
+            username=f'spike{number}', email=f'spike{number}@yamdb.fake'
+        ))
+        for number in range(count)
+    ]
+
+
+@pytest.mark.django_db
+@pytest.mark.usefixtures('write_behind')
+class TestReviewIngestion:
+
+    def test_queued_and_polled(self, title, user_client,
+                               django_assert_max_num_queries):
+        from reviews.models import Review
+
+        with django_assert_max_num_queries(3):
+            # Title and the queued review, the user comes from the cache.
+            response = user_client.post(
+                reviews_url(title), data={'text': 'Отзыв', 'score': 8}
+            )
+        assert response.status_code == 202
+        data = response.json()
+        assert data['status'] == 'pending'
+        assert not Review.objects.exists(), (
+            'Проверьте, что отзыв пишется в базу воркером, а не запросом'
+        )
+        poll_url = response['Location']
+        assert poll_url.endswith(
+            f'{reviews_url(title)}pending/{data["id"]}/'
+        )
+
+        call_command('ingest_reviews', once=True, stdout=io.StringIO())
+        data = user_client.get(poll_url).json()
+        assert data['status'] == 'accepted'
+        review = Review.objects.get()
+        assert data['review'] == review.id
+        assert (review.text, review.score) == ('Отзыв', 8)
+
+    @pytest.mark.django_db(transaction=True)
+    def test_batch_updates_rating(self, title, create_titles, client,
+                                  django_user_model):
+        from reviews.ingestion import ingest_batch
+
+        other_title = create_titles(2)[1]
+        clients = make_clients(django_user_model, 6)
+        for number, api_client in enumerate(clients):
+            api_client.post(
+                reviews_url(title if number % 2 else other_title),
+                data={'text': f'Отзыв {number}', 'score': number + 1}
+            )
+        client.get('/api/v1/titles/')
+        assert ingest_batch() == {'accepted': 6}
+        title.refresh_from_db()
+        assert (title.rating_sum, title.rating_count) == (2 + 4 + 6, 3)
+        assert client.get(
+            f'/api/v1/titles/{title.id}/stats/'
+        ).json()['histogram']['4'] == 1
+        titles = {
+            item['id']: item['rating']
+            for item in client.get('/api/v1/titles/').json()['results']
+        }
+        assert titles[title.id] == 4, (
+            'Проверьте, что кэш списка произведений сбрасывается'
+        )
+
+    def test_duplicates_rejected(self, title, user, user_client):
+        from reviews.ingestion import UNIQUE_REVIEW_MESSAGE, ingest_batch
+        from reviews.models import Review
+
+        Review.objects.create(
+            title=title, author=user, text='Раньше', score=5
+        )
+        ids = [
+            user_client.post(
+                reviews_url(title), data={'text': 'Снова', 'score': 9}
+            ).json()['id']
+            for _ in range(2)
+        ]
+        assert ingest_batch() == {'rejected': 2}
+        for pending_id in ids:
+            data = user_client.get(
+                f'{reviews_url(title)}pending/{pending_id}/'
+            ).json()
+            assert data['status'] == 'rejected'
+            assert data['error'] == UNIQUE_REVIEW_MESSAGE
+        title.refresh_from_db()
+        assert title.rating_count == 1
+
+    def test_duplicates_within_batch(self, title, user_client):
+        from reviews.ingestion import ingest_batch
+
+        for score in (3, 7):
+            user_client.post(
+                reviews_url(title), data={'text': 'Отзыв', 'score': score}
+            )
+        assert ingest_batch() == {'accepted': 1, 'rejected': 1}
+        title.refresh_from_db()
+        assert title.rating_sum == 3
+
+    def test_conflict_with_concurrent_insert(self, title, user,
+                                             django_user_model,
+                                             monkeypatch):
+        from reviews import ingestion
+        from reviews.models import PendingReview, Review
+
+        other = django_user_model.objects.create_user(
+            username='other', email='other@yamdb.fake'
+        )
+        ingestion.queue_review(title.id, user.id, 'Отзыв', 6)
+        ingestion.queue_review(title.id, other.id, 'Отзыв', 8)
+        insert_reviews = ingestion.insert_reviews
+
+        def insert_after_concurrent_review(candidates):
+            # The synchronous API wins the race for the first review.
+            Review.objects.create(
+                title=title, author=user, text='Быстрее', score=2
+            )
+            return insert_reviews(candidates)
+
+        monkeypatch.setattr(
+            ingestion, 'insert_reviews', insert_after_concurrent_review
+        )
+        assert ingestion.ingest_batch() == {'accepted': 1, 'rejected': 1}
+        assert list(PendingReview.objects.values_list(
+            'status', flat=True
+        )) == ['rejected', 'accepted']
+        title.refresh_from_db()
+        assert (title.rating_sum, title.rating_count) == (2 + 8, 2)
+
+    def test_validated_up_front(self, title, user_client, client):
+        from reviews.models import PendingReview
+
+        assert user_client.post(
+            reviews_url(title), data={'text': 'Отзыв', 'score': 11}
+        ).status_code == 400
+        assert user_client.post(
+            '/api/v1/titles/999/reviews/', data={'text': 'Отзыв', 'score': 5}
+        ).status_code == 404
+        assert client.post(
+            reviews_url(title), data={'text': 'Отзыв', 'score': 5}
+        ).status_code == 401
+        assert not PendingReview.objects.exists()
+
+    def test_local_cache_warning(self):
+        stderr = io.StringIO()
+        call_command(
+            'ingest_reviews', once=True, stdout=io.StringIO(), stderr=stderr
+        )
+        assert 'CACHE_BACKEND' in stderr.getvalue(), (
+            'Проверьте, что ingest_reviews предупреждает о кэше, '
+            'который не виден воркерам web'
+        )
+
+    def test_poll_only_own(self, title, user_client, moderator_client):
+        pending_id = user_client.post(
+            reviews_url(title), data={'text': 'Отзыв', 'score': 5}
+        ).json()['id']
+        assert moderator_client.get(
+            f'{reviews_url(title)}pending/{pending_id}/'
+        ).status_code == 404
+
+
+@pytest.mark.django_db
+def test_synchronous_by_default(title, user_client):
+    response = user_client.post(
+        reviews_url(title), data={'text': 'Отзыв', 'score': 5}
+    )
+    assert response.status_code == 201
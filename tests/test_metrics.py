@@ -0,0 +1,112 @@
+import logging
+import time
+
+import pytest
+
+METRICS_URL = '/api/v1/metrics/'
+
+
+@pytest.fixture(autouse=True)
+def clear_registry():
+    from api.metrics import registry
+    registry.clear()
+
+
+def sample(text, line_start):
+    for line in text.splitlines():
+        if line.startswith(line_start):
+            return float(line.rsplit(' ', 1)[1])
+    raise AssertionError(f'Нет метрики {line_start}')
+
+
+@pytest.mark.django_db
+class TestMetrics:
+
+    def test_per_view_metrics(self, client, admin_client, create_titles):
+        create_titles(3)
+        client.get('/api/v1/titles/')
+        client.get('/api/v1/titles/')
+        client.get('/api/v1/titles/999/')
+        response = admin_client.get(METRICS_URL)
+        assert response.status_code == 200
+        assert response['Content-Type'].startswith('text/plain')
+        text = response.content.decode()
+        view = 'view="TitleViewSet.list"'
+        assert sample(
+            text, f'yamdb_request_duration_seconds_count{{{view}}}'
+        ) == 2
+        assert sample(
+            text, f'yamdb_db_queries_bucket{{{view},le="0"}}'
+        ) == 1, 'Проверьте, что повторный запрос из кэша не считает запросы'
+        assert sample(text, f'yamdb_db_queries_sum{{{view}}}') > 0
+        assert sample(
+            text, f'yamdb_serialization_duration_seconds_count{{{view}}}'
+        ) == 2
+        assert sample(
+            text, f'yamdb_response_size_bytes_sum{{{view}}}'
+        ) == 2 * len(client.get('/api/v1/titles/').content)
+        assert sample(
+            text, f'yamdb_responses_total{{{view},status="200"}}'
+        ) == 2
+        assert sample(
+            text,
+            'yamdb_responses_total{view="TitleViewSet.retrieve",status="404"}'
+        ) == 1
+
+    def test_serialization_includes_compiled_path(self, client, admin_client,
+                                                  create_titles, monkeypatch):
+        from api import representation
+
+        compile_serializer = representation.compile_serializer
+
+        def slow_compile_serializer(*args, **kwargs):
+            represent = compile_serializer(*args, **kwargs)
+
+            def slow_represent(instance):
+                time.sleep(0.05)
+                return represent(instance)
+
+            return slow_represent
+
+        monkeypatch.setattr(
+            representation, 'compile_serializer', slow_compile_serializer
+        )
+        create_titles(3)
+        assert client.get('/api/v1/titles/').status_code == 200
+        text = admin_client.get(METRICS_URL).content.decode()
+        assert sample(
+            text,
+            'yamdb_serialization_duration_seconds_sum'
+            '{view="TitleViewSet.list"}'
+        ) >= 0.15, (
+            'Проверьте, что в сериализацию входит построение данных ответа'
+        )
+
+    def test_view_names(self, client, admin_client):
+        client.post('/api/v1/auth/token/', data={})
+        client.get('/api/v1/unknown/')
+        text = admin_client.get(METRICS_URL).content.decode()
+        assert 'view="token.post"' in text
+        assert 'view="unresolved"' in text
+
+    def test_only_admin(self, client, user_client):
+        assert client.get(METRICS_URL).status_code == 401
+        assert user_client.get(METRICS_URL).status_code == 403
+
+    def test_slow_request_log(self, client, title, settings, caplog):
+        settings.METRICS = dict(settings.METRICS, SLOW_REQUEST=0)
+        with caplog.at_level(logging.WARNING, logger='api.metrics'):
+            client.get(f'/api/v1/titles/{title.id}/')
+        assert len(caplog.records) == 1
+        message = caplog.records[0].getMessage()
+        assert 'TitleViewSet.retrieve' in message
+        assert 'SELECT' in message, (
+            'Проверьте, что в лог медленных запросов попадает SQL'
+        )
+
+    def test_disabled(self, client, admin_client, settings):
+        from api.metrics import registry
+
+        settings.METRICS = dict(settings.METRICS, ENABLED=False)
+        client.get('/api/v1/titles/')
+        assert registry.responses == {}
@@ -0,0 +1,149 @@
+import smtplib
+from datetime import timedelta
+
+import pytest
+from django.core import mail
+from django.core.mail.backends.locmem import EmailBackend
+from django.core.management import call_command
+from django.utils import timezone
+
+
+class FailingBackend(EmailBackend):
+
+    def send_messages(self, messages):
+        raise smtplib.SMTPServerDisconnected('Соединение разорвано')
+
+
+class BrokenBackend(EmailBackend):
+    '''Refuses messages with an error that is not the mail server's.'''
+
+    def send_messages(self, messages):
+        raise ValueError('Недопустимый заголовок')
+
+
+class CheckingBackend(EmailBackend):
+    '''Records whether messages are sent inside a transaction.'''
+    in_atomic_block = []
+
+    def send_messages(self, messages):
+        from django.db import connection
+
+        self.in_atomic_block.append(connection.in_atomic_block)
+        return super().send_messages(messages)
+
+
+@pytest.mark.django_db
+class TestEmailOutbox:
+
+    def test_signup_only_queues_email(self, client):
+        from reviews.models import EmailStatus, OutgoingEmail
+
+        response = client.post(
+            '/api/v1/auth/signup/',
+            data={'username': 'newuser', 'email': 'newuser@yamdb.fake'}
+        )
+        assert response.status_code == 200
+        assert len(mail.outbox) == 0, (
+            'Проверьте, что письмо не отправляется во время запроса'
+        )
+        email = OutgoingEmail.objects.get()
+        assert email.to == 'newuser@yamdb.fake'
+        assert email.status == EmailStatus.pending.value
+
+    def test_worker_sends_queued_emails(self, client):
+        from reviews.models import EmailStatus, OutgoingEmail
+
+        for number in range(3):
+            client.post('/api/v1/auth/signup/', data={
+                'username': f'newuser{number}',
+                'email': f'newuser{number}@yamdb.fake'
+            })
+        call_command('send_emails', once=True, batch_size=2)
+        assert sorted(message.to[0] for message in mail.outbox) == [
+            f'newuser{number}@yamdb.fake' for number in range(3)
+        ]
+        assert 'Код подтверждения Yamdb' in mail.outbox[0].body
+        assert not OutgoingEmail.objects.exclude(
+            status=EmailStatus.sent.value
+        ).exists()
+
+        call_command('send_emails', once=True)
+        assert len(mail.outbox) == 3, (
+            'Проверьте, что отправленные письма не отправляются повторно'
+        )
+
+    def test_failed_email_is_retried_with_backoff(self, settings):
+        from reviews.models import EmailStatus, OutgoingEmail
+        from reviews.outbox import queue_email, send_batch
+
+        settings.EMAIL_BACKEND = 'tests.test_outbox.FailingBackend'
+        email = queue_email('Тема', 'Текст', 'user@yamdb.fake')
+        delays = []
+        for attempt in range(1, 4):
+            started = timezone.now()
+            assert send_batch() == {EmailStatus.pending.value: 1}
+            email.refresh_from_db()
+            assert email.attempts == attempt
+            assert 'SMTPServerDisconnected' in email.last_error
+            delays.append(email.next_attempt - started)
+            assert send_batch() == {}, (
+                'Проверьте, что письмо не отправляется до следующей попытки'
+            )
+            OutgoingEmail.objects.update(next_attempt=timezone.now())
+        retry_delay = timedelta(
+            seconds=settings.EMAIL_OUTBOX['RETRY_DELAY']
+        )
+        assert [round(delay / retry_delay) for delay in delays] == [1, 2, 4]
+
+        settings.EMAIL_BACKEND = (
+            'django.core.mail.backends.locmem.EmailBackend'
+        )
+        assert send_batch() == {EmailStatus.sent.value: 1}
+        assert len(mail.outbox) == 1
+
+    def test_email_is_dead_after_max_attempts(self, settings):
+        from reviews.models import EmailStatus, OutgoingEmail
+        from reviews.outbox import queue_email, send_batch
+
+        settings.EMAIL_BACKEND = 'tests.test_outbox.FailingBackend'
+        settings.EMAIL_OUTBOX = dict(settings.EMAIL_OUTBOX, MAX_ATTEMPTS=2)
+        email = queue_email('Тема', 'Текст', 'user@yamdb.fake')
+        send_batch()
+        OutgoingEmail.objects.update(next_attempt=timezone.now())
+        assert send_batch() == {EmailStatus.dead.value: 1}
+        email.refresh_from_db()
+        assert email.attempts == 2
+        OutgoingEmail.objects.update(next_attempt=timezone.now())
+        assert send_batch() == {}, (
+            'Проверьте, что письма в статусе dead больше не отправляются'
+        )
+
+    def test_other_errors_count_as_attempts(self, settings):
+        from reviews.models import EmailStatus, OutgoingEmail
+        from reviews.outbox import queue_email, send_batch
+
+        settings.EMAIL_BACKEND = 'tests.test_outbox.BrokenBackend'
+        settings.EMAIL_OUTBOX = dict(settings.EMAIL_OUTBOX, MAX_ATTEMPTS=2)
+        email = queue_email('Тема', 'Текст', 'user@yamdb.fake')
+        assert send_batch() == {EmailStatus.pending.value: 1}
+        email.refresh_from_db()
+        assert email.attempts == 1, (
+            'Проверьте, что любая ошибка отправки считается попыткой'
+        )
+        assert 'ValueError' in email.last_error
+        OutgoingEmail.objects.update(next_attempt=timezone.now())
+        assert send_batch() == {EmailStatus.dead.value: 1}
+
+    # Without the transaction every test runs in.
+    @pytest.mark.django_db(transaction=True)
+    def test_sent_outside_transaction(self, settings):
+        from reviews.outbox import queue_email, send_batch
+
+        settings.EMAIL_BACKEND = 'tests.test_outbox.CheckingBackend'
+        CheckingBackend.in_atomic_block.clear()
+        queue_email('Тема', 'Текст', 'user@yamdb.fake')
+        send_batch()
+        assert CheckingBackend.in_atomic_block == [False], (
+            'Проверьте, что письма отправляются вне транзакции, '
+            'которая блокирует строки'
+        )
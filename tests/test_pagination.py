@@ -0,0 +1,96 @@
+import base64
+import json
+
+import pytest
+from django.utils import timezone
+
+
+def walk(client, url, link):
+    '''Follow next or previous links and collect ids of every page.'''
+    pages = []
+    while url:
+        data = client.get(url).json()
+        assert 'count' not in data, (
+            'Проверьте, что при пагинации курсором не выполняется подсчёт'
+        )
+        pages.append([item['id'] for item in data['results']])
+        url = data[link]
+    return pages
+
+
+@pytest.mark.django_db
+class TestKeysetPagination:
+
+    def test_reviews_forward_and_backward(self, client, title,
+                                          create_reviews):
+        reviews = create_reviews(title, 7)
+        # Same pub_date for several rows, the id has to break the tie.
+        title.reviews.filter(pk__in=[r.pk for r in reviews[:4]]).update(
+            pub_date=timezone.now()
+        )
+        expected = list(
+            title.reviews.order_by('-pub_date', '-id')
+            .values_list('id', flat=True)
+        )
+        url = f'/api/v1/titles/{title.id}/reviews/?cursor=&page_size=3'
+        pages = walk(client, url, 'next')
+        assert sum(pages, []) == expected
+        assert [len(page) for page in pages] == [3, 3, 1]
+
+        last_page = client.get(url).json()
+        while last_page['next']:
+            last_page = client.get(last_page['next']).json()
+        backward = walk(client, last_page['previous'], 'previous')
+        assert backward == pages[-2::-1]
+
+    def test_reviews_without_count_query(self, client, title,
+                                         create_reviews,
+                                         django_assert_num_queries):
+        create_reviews(title, 5)
+        url = f'/api/v1/titles/{title.id}/reviews/?cursor=&page_size=2'
+        with django_assert_num_queries(2):
+            client.get(url)
+
+    def test_titles(self, client, create_titles):
+        titles = create_titles(6)
+        url = '/api/v1/titles/?cursor=&page_size=4'
+        pages = walk(client, url, 'next')
+        assert sum(pages, []) == [title.id for title in titles]
+
+    def test_comments(self, client, title, review, create_comments):
+        comments = create_comments(review, 3)
+        url = (f'/api/v1/titles/{title.id}/reviews/{review.id}/comments/'
+               '?cursor=&page_size=2')
+        pages = walk(client, url, 'next')
+        assert sorted(sum(pages, [])) == sorted(c.id for c in comments)
+
+    @pytest.mark.parametrize('position', [
+        ['abc', 'Название', 1],
+        [{'a': 1}, 'Название', 1],
+        [2000, 'Название', None],
+        ['notadate', 1],
+        [[1], 1],
+    ])
+    def test_invalid_cursor(self, client, title, position):
+        assert client.get(
+            '/api/v1/titles/?cursor=nonsense'
+        ).status_code == 404
+        cursor = base64.urlsafe_b64encode(
+            json.dumps({'p': position, 'r': False}).encode('utf-8')
+        ).decode('ascii')
+        for url in ('/api/v1/titles/', f'/api/v1/titles/{title.id}/reviews/'):
+            response = client.get(f'{url}?cursor={cursor}')
+            assert response.status_code == 404, (
+                f'Проверьте, что неверный курсор {position} в `{url}` '
+                'возвращает 404'
+            )
+
+    def test_default_paginators_unchanged(self, client, title,
+                                          create_reviews):
+        create_reviews(title, 3)
+        data = client.get(
+            f'/api/v1/titles/{title.id}/reviews/?limit=2&offset=1'
+        ).json()
+        assert data['count'] == 3 and len(data['results']) == 2
+        data = client.get('/api/v1/titles/?page=1').json()
+        assert data['count'] == 1
@@ -0,0 +1,81 @@
+import pytest
+
+# Number of SQL queries each read endpoint may issue. They must not depend
+# on how many objects are on the page, otherwise an N+1 has crept back in.
+TITLE_LIST_QUERIES = 3  # count, titles with categories, genres
+TITLE_DETAIL_QUERIES = 3  # validators, title with category, genres
+REVIEW_LIST_QUERIES = 3  # title, count, reviews with authors
+REVIEW_DETAIL_QUERIES = 2  # title, review with author
+COMMENT_LIST_QUERIES = 3  # review, count, comments with authors
+COMMENT_DETAIL_QUERIES = 2  # review, comment with author
+
+
+@pytest.mark.django_db
+class TestQueryBudget:
+
+    @pytest.mark.parametrize('count', [1, 5])
+    def test_title_list(self, client, create_titles,
+                        django_assert_num_queries, count):
+        create_titles(count)
+        with django_assert_num_queries(TITLE_LIST_QUERIES):
+            response = client.get('/api/v1/titles/')
+        assert len(response.json()['results']) == count, (
+            'Проверьте, что `/api/v1/titles/` возвращает все произведения'
+        )
+
+    @pytest.mark.parametrize('query', ['genre=drama', 'category=movie'])
+    def test_title_list_filtered(self, client, create_titles,
+                                 django_assert_num_queries, query):
+        create_titles(5)
+        with django_assert_num_queries(TITLE_LIST_QUERIES):
+            response = client.get(f'/api/v1/titles/?{query}')
+        assert response.json()['count'] == 5
+
+    def test_title_detail(self, client, title, django_assert_num_queries):
+        with django_assert_num_queries(TITLE_DETAIL_QUERIES):
+            response = client.get(f'/api/v1/titles/{title.id}/')
+        assert len(response.json()['genre']) == 2
+
+    @pytest.mark.parametrize('count', [1, 10])
+    def test_review_list(self, client, title, create_reviews,
+                         django_assert_num_queries, count):
+        create_reviews(title, count)
+        with django_assert_num_queries(REVIEW_LIST_QUERIES):
+            response = client.get(
+                f'/api/v1/titles/{title.id}/reviews/?limit=20'
+            )
+        assert len(response.json()['results']) == count, (
+            'Проверьте, что `/api/v1/titles/{title_id}/reviews/` '
+            'возвращает все отзывы'
+        )
+
+    def test_review_detail(self, client, title, review,
+                           django_assert_num_queries):
+        with django_assert_num_queries(REVIEW_DETAIL_QUERIES):
+            response = client.get(
+                f'/api/v1/titles/{title.id}/reviews/{review.id}/'
+            )
+        assert response.json()['author'] == review.author.username
+
+    @pytest.mark.parametrize('count', [1, 5])
+    def test_comment_list(self, client, title, review, create_comments,
+                          django_assert_num_queries, count):
+        create_comments(review, count)
+        with django_assert_num_queries(COMMENT_LIST_QUERIES):
+            response = client.get(
+                f'/api/v1/titles/{title.id}/reviews/{review.id}/comments/'
+            )
+        assert len(response.json()['results']) == count, (
+            'Проверьте, что `/api/v1/titles/{title_id}/reviews/'
+            '{review_id}/comments/` возвращает все комментарии'
+        )
+
+    def test_comment_detail(self, client, title, review, create_comments,
+                            django_assert_num_queries):
+        comment = create_comments(review, 1)[0]
+        with django_assert_num_queries(COMMENT_DETAIL_QUERIES):
+            response = client.get(
+                f'/api/v1/titles/{title.id}/reviews/{review.id}/comments/'
+                f'{comment.id}/'
+            )
+        assert response.json()['author'] == comment.author.username
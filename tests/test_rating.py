@@ -0,0 +1,63 @@
+from io import StringIO
+
+import pytest
+from django.core.management import call_command
+
+
+@pytest.mark.django_db
+class TestStoredRating:
+
+    def assert_rating(self, title, rating, count):
+        title.refresh_from_db()
+        assert (title.rating, title.rating_count) == (rating, count), (
+            'Проверьте, что рейтинг произведения обновляется '
+            'при изменении отзывов'
+        )
+
+    def test_review_writes(self, title, create_reviews):
+        first, second = create_reviews(title, 2)
+        self.assert_rating(title, 1.5, 2)
+        first.score = 8
+        first.save()
+        self.assert_rating(title, 5.0, 2)
+        second.delete()
+        self.assert_rating(title, 8.0, 1)
+
+    def test_review_moved_to_other_title(self, create_titles,
+                                         create_reviews):
+        title, other = create_titles(2)
+        review = create_reviews(title, 1)[0]
+        review.title = other
+        review.save()
+        self.assert_rating(title, None, 0)
+        self.assert_rating(other, 1.0, 1)
+
+    def test_rating_through_api(self, client, user_client, title):
+        response = user_client.post(
+            f'/api/v1/titles/{title.id}/reviews/',
+            data={'text': 'Отзыв', 'score': 7}
+        )
+        assert response.status_code == 201
+        response = client.get(f'/api/v1/titles/{title.id}/')
+        assert response.json()['rating'] == 7
+
+    def test_recalculate_command(self, title, create_reviews):
+        create_reviews(title, 3)
+        title.__class__.objects.update(rating=None, rating_count=0)
+        call_command('recalculate_ratings', stdout=StringIO())
+        self.assert_rating(title, 2.0, 3)
+
+    # Commits, so that the cached responses are invalidated.
+    @pytest.mark.django_db(transaction=True)
+    def test_recalculate_invalidates_cache(self, client, title,
+                                           create_reviews):
+        create_reviews(title, 3)
+        url = f'/api/v1/titles/{title.id}/'
+        client.get(url)
+        title.__class__.objects.update(rating=None)
+        call_command('recalculate_ratings', stdout=StringIO())
+        response = client.get(url)
+        assert response['X-Cache'] == 'MISS', (
+            'Проверьте, что recalculate_ratings сбрасывает кэш произведений'
+        )
+        assert response.json()['rating'] == 2
@@ -0,0 +1,86 @@
+import pytest
+from rest_framework.renderers import JSONRenderer
+
+
+def drf_content(serializer_class, instances):
+    return JSONRenderer().render(serializer_class(instances, many=True).data)
+
+
+def compiled_content(serializer_class, instances):
+    from api.renderers import FastJSONRenderer
+    from api.representation import compile_serializer
+
+    represent = compile_serializer(serializer_class)
+    return FastJSONRenderer().render(
+        [represent(instance) for instance in instances]
+    )
+
+
+@pytest.mark.django_db
+class TestCompiledSerializers:
+
+    def test_titles(self, create_titles, create_reviews):
+        from api.serializers import TitleSerializerReadOnly
+        from reviews.models import Title
+
+        titles = create_titles(3)
+        create_reviews(titles[0], 3)
+        titles[1].category = None
+        titles[1].description = 'Строка\u2028с "разделителем"'
+        titles[1].save()
+        titles[2].genre.clear()
+        instances = list(
+            Title.objects.select_related('category').prefetch_related(
+                'genre'
+            ).order_by('id')
+        )
+        content = compiled_content(TitleSerializerReadOnly, instances)
+        assert content == drf_content(TitleSerializerReadOnly, instances), (
+            'Проверьте, что ответ совпадает с ответом сериализатора DRF'
+        )
+        assert b'\\u2028' in content
+
+    def test_reviews_and_comments(self, create_titles, create_reviews,
+                                  create_comments):
+        from api.serializers import CommentSerializer, ReviewSerializer
+
+        titles = create_titles(2)
+        reviews = create_reviews(titles[0], 2) + create_reviews(titles[1], 2)
+        comments = create_comments(reviews[0], 3)
+        for serializer_class, instances in (
+            (ReviewSerializer, reviews), (CommentSerializer, comments)
+        ):
+            assert compiled_content(
+                serializer_class, instances
+            ) == drf_content(serializer_class, instances)
+
+    def test_endpoints(self, client, title, create_reviews, create_comments,
+                       django_assert_num_queries):
+        from api.serializers import CommentSerializer, ReviewSerializer
+
+        reviews = create_reviews(title, 3)
+        create_comments(reviews[0], 2)
+        response = client.get(f'/api/v1/titles/{title.id}/reviews/')
+        assert response.json()['results'] == [
+            dict(data) for data in ReviewSerializer(
+                title.reviews.order_by('-pub_date', '-id')[:5], many=True
+            ).data
+        ]
+        response = client.get(
+            f'/api/v1/titles/{title.id}/reviews/{reviews[0].id}/comments/'
+            f'{reviews[0].comments.first().id}/'
+        )
+        assert response.content == JSONRenderer().render(
+            CommentSerializer(reviews[0].comments.first()).data
+        )
+        # Count, page with categories and genres; the validators are
+        # taken from the cache.
+        with django_assert_num_queries(3):
+            client.get('/api/v1/titles/')
+
+    def test_browsable_api(self, client, title):
+        response = client.get(
+            f'/api/v1/titles/{title.id}/', HTTP_ACCEPT='text/html'
+        )
+        assert response.status_code == 200
+        assert response['Content-Type'].startswith('text/html')
@@ -0,0 +1,107 @@
+import threading
+
+import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from .fixtures.fixture_user import get_client
+
+
+def loaded(context, table):
+    '''Whether full rows of the table were read by the captured queries.'''
+    return any(
+        query['sql'].startswith(f'SELECT "{table}"."id", ')
+        for query in context.captured_queries
+    )
+
+
+@pytest.mark.django_db
+class TestReviewCreate:
+
+    def test_duplicate(self, title, user_client):
+        from reviews.ingestion import UNIQUE_REVIEW_MESSAGE
+        from reviews.models import Review
+
+        url = f'/api/v1/titles/{title.id}/reviews/'
+        data = {'text': 'Отзыв', 'score': 5}
+        assert user_client.post(url, data=data).status_code == 201
+        response = user_client.post(url, data=data)
+        assert response.status_code == 400, (
+            'Проверьте, что повторный отзыв возвращает ошибку валидации'
+        )
+        assert UNIQUE_REVIEW_MESSAGE in str(response.json())
+        assert Review.objects.count() == 1
+        title.refresh_from_db()
+        assert title.rating_count == 1
+
+    def test_unknown_title(self, user_client):
+        response = user_client.post(
+            '/api/v1/titles/999/reviews/', data={'text': 'Отзыв', 'score': 5}
+        )
+        assert response.status_code == 404
+
+    def test_rows_not_loaded(self, title, user_client):
+        with CaptureQueriesContext(connection) as context:
+            response = user_client.post(
+                f'/api/v1/titles/{title.id}/reviews/',
+                data={'text': 'Отзыв', 'score': 5}
+            )
+        assert response.status_code == 201
+        assert not loaded(context, 'reviews_title'), (
+            'Проверьте, что произведение не загружается целиком'
+        )
+        assert not loaded(context, 'reviews_review'), (
+            'Проверьте, что повторный отзыв ловит ограничение уникальности, '
+            'а не отдельный запрос'
+        )
+
+    def test_comment(self, title, review, user_client):
+        with CaptureQueriesContext(connection) as context:
+            response = user_client.post(
+                f'/api/v1/titles/{title.id}/reviews/{review.id}/comments/',
+                data={'text': 'Комментарий'}
+            )
+        assert response.status_code == 201
+        assert not loaded(context, 'reviews_review'), (
+            'Проверьте, что отзыв не загружается целиком'
+        )
+        assert review.comments.get().text == 'Комментарий'
+        assert user_client.post(
+            f'/api/v1/titles/{title.id}/reviews/999/comments/',
+            data={'text': 'Комментарий'}
+        ).status_code == 404
+
+
+@pytest.mark.skipif(
+    connection.vendor == 'sqlite',
+    reason='SQLite locks the whole database for every write, run with '
+    '--ds=api_yamdb.settings_test_postgres'
+)
+@pytest.mark.django_db(transaction=True)
+def test_parallel_duplicates(title, user):
+    from reviews.models import Review
+
+    threads = 8
+    barrier = threading.Barrier(threads)
+    statuses = []
+
+    def post():
+        api_client = get_client(user)
+        barrier.wait()
+        try:
+            statuses.append(api_client.post(
+                f'/api/v1/titles/{title.id}/reviews/',
+                data={'text': 'Отзыв', 'score': 5}
+            ).status_code)
+        finally:
+            connection.close()
+
+    workers = [threading.Thread(target=post) for _ in range(threads)]
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    assert sorted(statuses) == [201] + [400] * (threads - 1), (
+        'Проверьте, что одновременные повторные отзывы не приводят к 500'
+    )
+    assert Review.objects.filter(title=title, author=user).count() == 1
@@ -0,0 +1,75 @@
+import pytest
+
+
+def result_ids(response):
+    return [item['id'] for item in response.json()['results']]
+
+
+@pytest.mark.django_db
+class TestSearch:
+
+    def test_titles_ignore_case_of_cyrillic(self, client, create_titles):
+        titles = create_titles(3)
+        titles[1].name = 'Властелин колец'
+        titles[1].save()
+        response = client.get('/api/v1/titles/?search=КОЛЕЦ')
+        assert response.status_code == 200
+        assert result_ids(response) == [titles[1].id], (
+            'Проверьте, что поиск по названию не зависит от регистра'
+        )
+
+    def test_titles_ranked_by_relevance(self, client, create_titles):
+        titles = create_titles(3)
+        titles[0].name = 'Мир'
+        titles[2].name = 'Война и мир, том первый, часть вторая'
+        for title in titles:
+            title.save()
+        response = client.get('/api/v1/titles/?search=мир')
+        assert result_ids(response) == [titles[0].id, titles[2].id], (
+            'Проверьте, что лучшие совпадения выводятся первыми'
+        )
+
+    def test_titles_search_combines_with_filters(self, client,
+                                                 create_titles):
+        titles = create_titles(3)
+        response = client.get(
+            f'/api/v1/titles/?search=Произведение&year={titles[2].year}'
+        )
+        assert result_ids(response) == [titles[2].id]
+
+    def test_reviews_match_word_prefixes_and_yo(self, client, title,
+                                                create_reviews):
+        reviews = create_reviews(title, 3)
+        reviews[0].text = 'Ёлки, какой неожиданный финал!'
+        reviews[0].save()
+        reviews[2].text = 'Скучно'
+        reviews[2].save()
+        response = client.get(
+            f'/api/v1/titles/{title.id}/reviews/?search=елки+неожидан'
+        )
+        assert response.status_code == 200
+        assert result_ids(response) == [reviews[0].id], (
+            'Проверьте, что поиск по отзывам находит слова по началу '
+            'и не различает е и ё'
+        )
+
+    def test_reviews_search_follows_updates_and_deletes(self, client, title,
+                                                        create_reviews):
+        review = create_reviews(title, 1)[0]
+        url = f'/api/v1/titles/{title.id}/reviews/?search=шедевр'
+        assert result_ids(client.get(url)) == []
+        review.text = 'Настоящий шедевр'
+        review.save()
+        assert result_ids(client.get(url)) == [review.id]
+        review.delete()
+        assert result_ids(client.get(url)) == []
+
+    def test_search_syntax_is_escaped(self, client, title, create_reviews):
+        create_reviews(title, 1)
+        for query in ('"', 'NEAR(', '*', '"мир" OR'):
+            response = client.get(
+                f'/api/v1/titles/{title.id}/reviews/', {'search': query}
+            )
+            assert response.status_code == 200
+            response = client.get('/api/v1/titles/', {'search': query})
+            assert response.status_code == 200
@@ -0,0 +1,68 @@
+import pytest
+
+
+def get_stats(client, title):
+    response = client.get(f'/api/v1/titles/{title.id}/stats/')
+    assert response.status_code == 200
+    return response.json()
+
+
+@pytest.mark.django_db
+class TestTitleStats:
+
+    def test_empty(self, client, title):
+        assert get_stats(client, title) == {
+            'title': title.id,
+            'count': 0,
+            'mean': None,
+            'median': None,
+            'histogram': {str(score): 0 for score in range(1, 11)},
+        }
+
+    def test_single_query(self, client, title, create_reviews,
+                          django_assert_num_queries):
+        create_reviews(title, 25)
+        with django_assert_num_queries(1):
+            client.get(f'/api/v1/titles/{title.id}/stats/')
+
+    def test_follows_review_writes(self, client, title, create_titles,
+                                   create_reviews):
+        # Scores 1, 2, 3, 4.
+        reviews = create_reviews(title, 4)
+        stats = get_stats(client, title)
+        assert stats['count'] == 4
+        assert stats['mean'] == 2.5
+        assert stats['median'] == 2.5
+        assert [stats['histogram'][str(score)] for score in range(1, 6)] == [
+            1, 1, 1, 1, 0
+        ]
+
+        reviews[0].score = 10
+        reviews[0].save()
+        reviews[1].delete()
+        other_title = create_titles(2)[1]
+        reviews[2].title = other_title
+        reviews[2].save()
+        stats = get_stats(client, title)
+        assert stats['histogram'] == {
+            '1': 0, '2': 0, '3': 0, '4': 1, '5': 0,
+            '6': 0, '7': 0, '8': 0, '9': 0, '10': 1,
+        }
+        assert stats['median'] == 7
+        assert get_stats(client, other_title)['histogram']['3'] == 1
+
+    def test_matches_recalculation(self, client, create_titles,
+                                   create_reviews):
+        from reviews.models import ScoreHistogram, Title
+
+        titles = create_titles(2)
+        for title, count in zip(titles, (7, 12)):
+            create_reviews(title, count)
+        expected = [get_stats(client, title) for title in titles]
+        ScoreHistogram.objects.all().delete()
+        Title.objects.recalculate_rating()
+        assert [get_stats(client, title) for title in titles] == expected
+        assert expected[1]['median'] == 4.5
+
+    def test_not_found(self, client):
+        assert client.get('/api/v1/titles/999/stats/').status_code == 404
@@ -0,0 +1,85 @@
+import io
+
+import pytest
+from django.core.management import call_command
+
+TOP_URL = '/api/v1/titles/top/'
+
+
+def add_reviews(title, scores, django_user_model):
+    from reviews.models import Review
+
+    for number, score in enumerate(scores):
+        Review.objects.create(
+            title=title, text='Отзыв', score=score,
+            author=django_user_model.objects.create_user(
+                username=f'top{title.pk}_{number}',
+                email=f'top{title.pk}_{number}@yamdb.fake'
+            )
+        )
+
+
+def top_ids(client, **params):
+    response = client.get(TOP_URL, params)
+    assert response.status_code == 200
+    return [item['id'] for item in response.json()]
+
+
+@pytest.mark.django_db
+class TestTopTitles:
+
+    def test_bayesian_order(self, client, create_titles, django_user_model):
+        titles = create_titles(3)
+        add_reviews(titles[0], [10], django_user_model)
+        add_reviews(titles[1], [9] * 20, django_user_model)
+        add_reviews(titles[2], [2] * 20, django_user_model)
+        call_command('rank_titles', stdout=io.StringIO())
+        assert top_ids(client) == [titles[1].id, titles[0].id, titles[2].id], (
+            'Проверьте, что одна высокая оценка не обгоняет много хороших'
+        )
+        data = client.get(TOP_URL).json()[0]
+        assert data['rating_count'] == 20
+        assert data['weighted_rating'] == pytest.approx(
+            (9 * 20 + 10 * (10 + 9 * 20 + 2 * 20) / 41) / 30
+        )
+
+    def test_filters_and_threshold(self, client, create_titles, genres,
+                                   django_user_model):
+        from reviews.models import Category
+
+        titles = create_titles(3)
+        book = Category.objects.create(name='Книга', slug='book')
+        titles[0].category = book
+        titles[0].save()
+        titles[1].genre.set([genres[1]])
+        for title, count in zip(titles, (1, 2, 3)):
+            add_reviews(title, [8] * count, django_user_model)
+        assert top_ids(client, category='book') == [titles[0].id]
+        assert top_ids(client, genre='drama') == [titles[2].id, titles[0].id]
+        assert top_ids(client, min_reviews=2) == [titles[2].id, titles[1].id]
+        assert top_ids(client, limit=1) == [titles[2].id]
+        assert client.get(TOP_URL, {'limit': 1000}).status_code == 400
+
+    @pytest.mark.django_db(transaction=True)
+    def test_follows_review_writes(self, client, create_titles,
+                                   django_user_model):
+        titles = create_titles(2)
+        add_reviews(titles[0], [6, 6], django_user_model)
+        add_reviews(titles[1], [5, 5], django_user_model)
+        assert top_ids(client) == [titles[0].id, titles[1].id]
+        review = titles[1].reviews.first()
+        review.score = 10
+        review.save()
+        assert top_ids(client) == [titles[1].id, titles[0].id], (
+            'Проверьте, что рейтинг обновляется при изменении отзыва'
+        )
+        titles[1].reviews.all().delete()
+        assert top_ids(client) == [titles[0].id]
+
+    def test_cached(self, client, create_titles, django_user_model,
+                    django_assert_num_queries):
+        add_reviews(create_titles(1)[0], [7], django_user_model)
+        client.get(TOP_URL)
+        with django_assert_num_queries(0):
+            response = client.get(TOP_URL)
+        assert response['X-Cache'] == 'HIT'